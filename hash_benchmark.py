@@ -0,0 +1,405 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Benchmark suite that runs the chaining, open addressing and
+# Swiss table hash maps on seeded synthetic workloads and checks the
+# results against a saved baseline
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import hash_map_oa
+import hash_map_sc
+import hash_map_swiss
+from hash_functions import get_hash_function
+
+
+MAPS = {
+    'chaining': hash_map_sc.HashMap,
+    'open_addressing': hash_map_oa.HashMap,
+    'swiss': hash_map_swiss.HashMap,
+}
+
+# operation codes used in workloads
+PUT = 0
+GET = 1
+CONTAINS = 2
+REMOVE = 3
+
+# number of keys sharing the same letters in the anagram workload
+_ANAGRAM_GROUP = 48
+
+
+def _keys(rng: random.Random, count: int, prefix: str = 'key') -> list:
+    """
+    Returns count distinct string keys in a seeded random order.
+    """
+    keys = [prefix + str(i) for i in range(count)]
+    rng.shuffle(keys)
+    return keys
+
+
+def _zipf_keys(rng: random.Random, keys: list, count: int,
+               exponent: float = 1.1) -> list:
+    """
+    Draws count keys where the key of rank r is chosen with probability
+    proportional to 1 / r ** exponent.
+    """
+    weights = itertools.accumulate(1 / rank ** exponent
+                                   for rank in range(1, len(keys) + 1))
+    return rng.choices(keys, cum_weights=list(weights), k=count)
+
+
+def _anagram_keys(rng: random.Random, count: int) -> list:
+    """
+    Returns count distinct keys made of groups of anagrams, which all
+    hash alike under hash_function_1.
+    """
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    keys = []
+    while len(keys) < count:
+        word = ''.join(rng.sample(letters, 8))
+        group = itertools.islice(itertools.permutations(word), _ANAGRAM_GROUP)
+        keys.extend(''.join(permutation) for permutation in group)
+
+    keys = keys[:count]
+    rng.shuffle(keys)
+    return keys
+
+
+def make_workloads(size: int = 10000, seed: int = 261) -> dict:
+    """
+    Builds the benchmark workloads. Each workload has keys put into the
+    map before timing starts and a list of timed (operation, key) pairs.
+    :param size: number of timed operations in each workload
+    :param seed: integer seed, the same seed always gives the same ops
+    :return: dictionary of workload name to dictionary with 'setup' and
+        'ops' lists
+    """
+    rng = random.Random(seed)
+    workloads = {}
+
+    # fresh keys with some updates, starting from an empty map
+    keys = _keys(rng, size)
+    ops = [(PUT, key) for key in keys[:size * 9 // 10]]
+    ops += [(PUT, key) for key in rng.sample(keys[:len(ops)], size - len(ops))]
+    workloads['insert_heavy'] = {'setup': [], 'ops': ops}
+
+    # lookups of present keys with a few updates
+    keys = _keys(rng, size)
+    ops = [(PUT if rng.random() < .1 else GET, rng.choice(keys))
+           for _ in range(size)]
+    workloads['read_heavy'] = {'setup': keys, 'ops': ops}
+
+    # lookups of keys that are not in the map
+    keys = _keys(rng, size)
+    missing = _keys(rng, size, 'missing')
+    ops = [(GET if index % 2 else CONTAINS, key)
+           for index, key in enumerate(missing)]
+    workloads['miss_heavy'] = {'setup': keys, 'ops': ops}
+
+    # remove a present key and put a new one, keeping the size steady
+    keys = _keys(rng, size // 2)
+    fresh = _keys(rng, size // 2, 'fresh')
+    present = list(keys)
+    ops = []
+    for key in fresh:
+        index = rng.randrange(len(present))
+        present[index], present[-1] = present[-1], present[index]
+        ops.append((REMOVE, present.pop()))
+        ops.append((PUT, key))
+        present.append(key)
+    workloads['delete_churn'] = {'setup': keys, 'ops': ops}
+
+    # skewed puts and gets, a few keys take most operations
+    keys = _keys(rng, size // 4, 'zipf')
+    ops = [(PUT if rng.random() < .5 else GET, key)
+           for key in _zipf_keys(rng, keys, size)]
+    workloads['zipfian'] = {'setup': [], 'ops': ops}
+
+    # groups of anagrams, put then looked up
+    keys = _anagram_keys(rng, size // 2)
+    ops = [(PUT, key) for key in keys] + [(GET, key) for key in keys]
+    workloads['anagram'] = {'setup': [], 'ops': ops}
+
+    return workloads
+
+
+def _build(map_class: type, function: callable, options: dict,
+           setup: list):
+    """
+    Creates a map and puts the setup keys into it.
+    """
+    map = map_class(11, function, **options)
+    for key in setup:
+        map.put(key, key)
+
+    return map
+
+
+def _run(map, ops: list) -> None:
+    """
+    Applies a list of (operation, key) pairs to map.
+    """
+    put, get = map.put, map.get
+    contains_key, remove = map.contains_key, map.remove
+
+    for op, key in ops:
+        if op == PUT:
+            put(key, key)
+        elif op == GET:
+            get(key)
+        elif op == CONTAINS:
+            contains_key(key)
+        else:
+            remove(key)
+
+
+def search_lengths(map) -> list:
+    """
+    Returns the number of chain nodes (chaining), slots (open
+    addressing) or groups (Swiss table) a successful lookup examines,
+    for every key in map.
+    :param map: HashMap of any implementation
+    :return: list of integer lengths
+    """
+    lengths = []
+
+    # groups scanned from the first group of each key to the key's group
+    if isinstance(map, hash_map_swiss.HashMap):
+        group_mask = map._group_mask
+        for index in map._full_slots():
+            mixed = map._hashes[index] * hash_map_swiss.MIX_MULTIPLIER
+            group = mixed >> map._shift & group_mask
+            step = 1
+            while group != index // hash_map_swiss.GROUP_SIZE:
+                group = (group + step) & group_mask
+                step += 1
+            lengths.append(step)
+        return lengths
+
+    map._finish_migration()
+
+    # position of each node in its chain
+    if isinstance(map, hash_map_sc.HashMap):
+        for index in range(map.get_capacity()):
+            for position, _ in enumerate(map._buckets[index], 1):
+                lengths.append(position)
+        return lengths
+
+    # slots probed from the first slot of each key to the key's slot
+    capacity = map.get_capacity()
+    for index in range(capacity):
+        if map._states[index] != hash_map_oa._FULL:
+            continue
+
+        hash2 = None if map._hashes2 is None else map._hashes2[index]
+        slot = map._slot_index(map._hashes[index])
+        step = hash_map_oa._first_step(hash2, capacity, map._shift)
+        probes = 1
+        while slot != index:
+            slot = (slot + step) % capacity
+            step += map._step_growth
+            probes += 1
+        lengths.append(probes)
+
+    return lengths
+
+
+def _percentile(values: list, share: float) -> int:
+    """
+    Returns the value below which share of the sorted values fall.
+    """
+    if not values:
+        return 0
+
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def benchmark(maps: dict = None, workloads: dict = None,
+              function='hash_function_1', options: dict = None,
+              repeat: int = 3) -> list:
+    """
+    Runs every workload on every map. Throughput is the best of repeat
+    timed runs; memory, resizes and search lengths come from one more,
+    untimed run.
+    :param maps: dictionary of name to HashMap class, defaults to MAPS
+    :param workloads: dictionary returned by make_workloads, defaults
+        to make_workloads()
+    :param function: hash function, or its registered name
+    :param options: other HashMap constructor arguments
+    :param repeat: number of timed runs per map and workload
+    :return: list of dictionaries, one per map and workload
+    """
+    if maps is None:
+        maps = MAPS
+    if workloads is None:
+        workloads = make_workloads()
+    if isinstance(function, str):
+        function = get_hash_function(function)
+    if options is None:
+        options = {}
+
+    results = []
+    for workload_name, workload in workloads.items():
+        setup, ops = workload['setup'], workload['ops']
+
+        for map_name, map_class in maps.items():
+            best = None
+            for _ in range(repeat):
+                map = _build(map_class, function, options, setup)
+                start = time.perf_counter()
+                _run(map, ops)
+                elapsed = time.perf_counter() - start
+                if best is None or elapsed < best:
+                    best = elapsed
+
+            # untimed run, tracing allocations slows every operation
+            tracemalloc.start()
+            map = _build(map_class, function, options, setup)
+            resizes = map.stats()['resizes']
+            tracemalloc.reset_peak()
+            _run(map, ops)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            lengths = sorted(search_lengths(map))
+            results.append({
+                'map': map_name,
+                'workload': workload_name,
+                'ops': len(ops),
+                'ops_per_sec': len(ops) / best if best else float('inf'),
+                'memory_bytes': current,
+                'peak_memory_bytes': peak,
+                'resizes': map.stats()['resizes'] - resizes,
+                'size': map.get_size(),
+                'capacity': map.get_capacity(),
+                'search_p50': _percentile(lengths, .5),
+                'search_p90': _percentile(lengths, .9),
+                'search_p99': _percentile(lengths, .99),
+                'search_max': lengths[-1] if lengths else 0,
+            })
+
+    return results
+
+
+def save_results(results: list, path: str, **settings) -> None:
+    """
+    Writes benchmark results and the settings they were run with to a
+    JSON file.
+    :param results: list returned by benchmark
+    :param path: file path to write
+    :param settings: values such as seed and size stored with results
+    :return: none
+    """
+    document = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': settings,
+        'results': results,
+    }
+    with open(path, 'w') as file:
+        json.dump(document, file, indent=2)
+
+
+def load_results(path: str) -> list:
+    """
+    Reads benchmark results written by save_results.
+    :param path: file path to read
+    :return: list of result dictionaries
+    """
+    with open(path) as file:
+        return json.load(file)['results']
+
+
+def check_regressions(results: list, baseline: list,
+                      threshold: float = .1) -> list:
+    """
+    Compares results with a baseline run of the same workloads.
+    :param results: list returned by benchmark
+    :param baseline: list returned by benchmark or load_results
+    :param threshold: share of baseline throughput that may be lost
+        before a result counts as a regression
+    :return: list of strings describing each regression
+    """
+    previous = {(row['map'], row['workload']): row for row in baseline}
+    regressions = []
+
+    for row in results:
+        old = previous.get((row['map'], row['workload']))
+        if old is None:
+            continue
+
+        if row['ops_per_sec'] < old['ops_per_sec'] * (1 - threshold):
+            change = row['ops_per_sec'] / old['ops_per_sec'] - 1
+            regressions.append(f"{row['map']} {row['workload']}: "
+                               f"{row['ops_per_sec']:.0f} ops/sec, "
+                               f"{change:+.1%} from "
+                               f"{old['ops_per_sec']:.0f}")
+
+    return regressions
+
+
+def print_results(results: list) -> None:
+    """
+    Prints benchmark results as a table.
+    :param results: list returned by benchmark
+    :return: none
+    """
+    columns = ('workload', 'map', 'ops_per_sec', 'peak_memory_bytes',
+               'resizes', 'capacity', 'search_p50', 'search_p90',
+               'search_p99', 'search_max')
+    print(' '.join(f'{column:>17}' for column in columns))
+    for row in results:
+        cells = []
+        for column in columns:
+            value = row[column]
+            if isinstance(value, float):
+                value = f'{value:.0f}'
+            cells.append(f'{value:>17}')
+        print(' '.join(cells))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the hash map implementations")
+    parser.add_argument('--size', type=int, default=10000,
+                        help="timed operations per workload")
+    parser.add_argument('--seed', type=int, default=261)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--function', default='hash_function_1',
+                        help="registered hash function name")
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--baseline',
+                        help="results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=.1,
+                        help="throughput share that may be lost")
+    args = parser.parse_args()
+
+    results = benchmark(workloads=make_workloads(args.size, args.seed),
+                        function=args.function, repeat=args.repeat)
+    print_results(results)
+
+    if args.json:
+        save_results(results, args.json, size=args.size, seed=args.seed,
+                     repeat=args.repeat, function=args.function)
+
+    if args.baseline:
+        regressions = check_regressions(results,
+                                        load_results(args.baseline),
+                                        args.threshold)
+        for regression in regressions:
+            print("regression:", regression)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,170 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Capacity policies shared by the hash map implementations:
+# prime capacities from a precomputed prime table, and power of two
+# capacities indexed with a bit mask
+
+from bisect import bisect_left
+
+
+PRIME = 'prime'
+POWER_OF_TWO = 'power_of_two'
+CAPACITY_POLICIES = (PRIME, POWER_OF_TWO)
+
+# odd 64-bit multiplier (2^64 divided by the golden ratio) used to mix
+# hash bits before masking
+MIX_MULTIPLIER = 0x9E3779B97F4A7C15
+
+_PRIME_LIMIT = 1 << 17
+
+
+def _sieve(limit: int) -> bytearray:
+    """
+    Returns a bytearray where index n is 1 if n is prime.
+    """
+    flags = bytearray([1]) * limit
+    flags[0] = flags[1] = 0
+    for factor in range(2, int(limit ** .5) + 1):
+        if flags[factor]:
+            start = factor * factor
+            flags[start::factor] = bytes(len(range(start, limit, factor)))
+
+    return flags
+
+
+_PRIME_FLAGS = _sieve(_PRIME_LIMIT)
+
+# every prime below _PRIME_LIMIT, in increasing order
+PRIMES = [n for n in range(_PRIME_LIMIT) if _PRIME_FLAGS[n]]
+
+
+def is_prime(capacity: int) -> bool:
+    """
+    Determines if given integer is a prime number. Values inside the
+    prime table are looked up; larger values are only divided by primes.
+    :param capacity: integer to check
+    :return: true if capacity is prime
+    """
+    if capacity < _PRIME_LIMIT:
+        return capacity > 1 and _PRIME_FLAGS[capacity] == 1
+
+    for factor in PRIMES:
+        if factor * factor > capacity:
+            break
+        if capacity % factor == 0:
+            return False
+
+    return True
+
+
+def next_prime(capacity: int) -> int:
+    """
+    Returns the smallest odd prime >= capacity.
+    :param capacity: integer to start from
+    :return: integer prime
+    """
+    if capacity < PRIMES[-1]:
+        index = bisect_left(PRIMES, max(capacity, 3))
+        return PRIMES[index]
+
+    if capacity % 2 == 0:
+        capacity += 1
+
+    while not is_prime(capacity):
+        capacity += 2
+
+    return capacity
+
+
+def next_power_of_two(capacity: int) -> int:
+    """
+    Returns the smallest power of two >= capacity, at least 2.
+    :param capacity: integer to start from
+    :return: integer power of two
+    """
+    return 1 << max(capacity - 1, 1).bit_length()
+
+
+def round_capacity(capacity: int, policy: str = PRIME) -> int:
+    """
+    Rounds capacity up to the nearest value allowed by policy. Prime
+    capacities are kept as they are.
+    :param capacity: integer to round
+    :param policy: PRIME or POWER_OF_TWO
+    :return: integer capacity
+    """
+    if policy == POWER_OF_TWO:
+        return next_power_of_two(capacity)
+
+    if is_prime(capacity):
+        return capacity
+
+    return next_prime(capacity)
+
+
+def fit_capacity(capacity: int, count: int, max_load: float,
+                 policy: str = PRIME) -> int:
+    """
+    Doubles capacity, rounding by policy, until count entries fit
+    without the load factor exceeding max_load.
+    :param capacity: integer representing starting capacity
+    :param count: number of entries the table must hold
+    :param max_load: highest load factor allowed
+    :param policy: PRIME or POWER_OF_TWO
+    :return: integer capacity
+    """
+    while count > capacity * max_load:
+        capacity = round_capacity(capacity * 2, policy)
+
+    return capacity
+
+
+def mix_shift(capacity: int) -> int:
+    """
+    Returns the shift that keeps the top log2(capacity) bits of a
+    64-bit mixed hash.
+    :param capacity: integer power of two
+    :return: integer shift
+    """
+    return 64 - (capacity - 1).bit_length()
+
+
+def check_policy(policy: str) -> None:
+    """
+    Raises ValueError if policy is not a known capacity policy.
+    :param policy: string policy name
+    :return: none
+    """
+    if policy not in CAPACITY_POLICIES:
+        raise ValueError(f"capacity policy must be one of "
+                         f"{CAPACITY_POLICIES}, not {policy!r}")
+
+
+def check_load_factors(max_load: float, growth: float, min_load: float,
+                       limit: float = None) -> None:
+    """
+    Raises ValueError unless the resize settings of a map are usable.
+    A shrink leaves the load between max_load / (2 * growth) and
+    max_load / growth, so min_load must stay below that range for a
+    shrink not to be followed straight away by another one.
+    :param max_load: load factor at which put grows the table
+    :param growth: multiplier applied to capacity when growing
+    :param min_load: load factor below which remove shrinks the table,
+        0 to never shrink
+    :param limit: load factor max_load must stay below, if any
+    :return: none
+    """
+    if max_load <= 0 or (limit is not None and max_load >= limit):
+        bound = '' if limit is None else f" and below {limit}"
+        raise ValueError(f"max_load must be above 0{bound}, not {max_load}")
+
+    if growth <= 1:
+        raise ValueError(f"growth must be above 1, not {growth}")
+
+    if not 0 <= min_load < max_load / (2 * growth):
+        raise ValueError(f"min_load must be at least 0 and below "
+                         f"max_load / (2 * growth) = "
+                         f"{max_load / (2 * growth)}, not {min_load}")
@@ -0,0 +1,126 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Per-entry expiry for the hashmaps: the wrapper stored in
+# place of values put with a ttl, and a thread that sweeps expired
+# entries a few buckets at a time
+
+import threading
+import time
+
+
+class Expiring:
+    """
+    Value put with a ttl, stored in its slot or node in place of the
+    value. Deadlines are wall clock times, so they still hold for a map
+    saved and loaded in another process.
+    """
+
+    __slots__ = ('value', 'deadline')
+
+    def __init__(self, value: object, deadline: float) -> None:
+        self.value = value
+        self.deadline = deadline
+
+    def __repr__(self) -> str:
+        return f'Expiring({self.value!r}, {self.deadline!r})'
+
+
+def expiring(value: object, ttl: float) -> object:
+    """
+    Returns what put stores for a value with a time to live.
+    :param value: value to be stored
+    :param ttl: seconds until the entry expires, none to never expire
+    :return: value itself if ttl is none, otherwise an Expiring
+    """
+    if ttl is None:
+        return value
+    if ttl <= 0:
+        raise ValueError(f"ttl must be positive, not {ttl}")
+
+    return Expiring(value, time.time() + ttl)
+
+
+def expired(value: object, now: float = None) -> bool:
+    """
+    Checks if a stored value has passed its deadline.
+    :param value: value stored in a slot or node
+    :param now: current time.time(), read if not given
+    :return: true if value is an Expiring whose deadline has passed
+    """
+    if type(value) is not Expiring:
+        return False
+    return value.deadline <= (time.time() if now is None else now)
+
+
+class Sweeper:
+    """
+    Thread calling sweep(step) on a map every interval seconds, so
+    expired entries are reclaimed while the map is idle. The maps are
+    not thread safe, so every other use of the map must hold lock.
+    """
+
+    def __init__(self, map, interval: float = 1.0, step: int = 64,
+                 lock=None) -> None:
+        """
+        :param map: HashMap to sweep
+        :param interval: seconds between sweeps
+        :param step: buckets or slots scanned per sweep
+        :param lock: lock held around each sweep, a new one by default
+        """
+        self.map = map
+        self.interval = interval
+        self.step = step
+        self.lock = lock if lock is not None else threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "Sweeper":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Starts sweeping in the background.
+        :return: none
+        """
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops sweeping and waits for the thread to finish.
+        :return: none
+        """
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self.lock:
+                self.map.sweep(self.step)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import hash_map_oa
+    import hash_map_sc
+
+    for name, m in (('chaining', hash_map_sc.HashMap(11, 'fnv1a')),
+                    ('open addressing', hash_map_oa.HashMap(11, 'fnv1a'))):
+        print(f"\nTTL entries, {name}")
+        print("----------------------------")
+        for i in range(100):
+            m.put('session' + str(i), i, ttl=.05 if i % 2 else None)
+        print(m.get_size(), m.get('session1'), m.contains_key('session3'))
+        time.sleep(.1)
+        print(m.get('session1'), m.contains_key('session3'), m.get('session2'))
+
+        with Sweeper(m, interval=.01, step=16) as sweeper:
+            time.sleep(.2)
+        print(len(list(m.keys())), m.stats()['expired'] > 0)
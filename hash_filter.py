@@ -0,0 +1,271 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Membership filter the hashmaps check before searching a
+# bucket or probe sequence, so most lookups of missing keys return
+# without touching the table
+
+
+class MembershipFilter:
+    """
+    Bloom filter over the cached hashes of the keys of a map. Each hash
+    sets two bits, the first at the hash modulo the number of bits and
+    the second at the quotient modulo the number of bits, so the two
+    come from different parts of the hash. Checks only use small
+    integer arithmetic, which costs less in Python than the chain scan
+    or probe sequence it saves, and most missing keys stop at the first
+    bit. A check failing means no key with that hash was added, while a
+    check passing means a key with that hash probably was, so keys
+    sharing a hash with a key in the map always pass. Bits cannot be
+    cleared, as keys share them, so removed keys are counted as stale
+    and the map builds a new filter once they make up too much of it.
+    """
+
+    def __init__(self, keys: int, bits_per_key: int = 8) -> None:
+        """
+        Initialize empty filter.
+        :param keys: number of keys the filter is sized for
+        :param bits_per_key: bits of filter per key, more for fewer false
+            positives
+        """
+        if bits_per_key < 1:
+            raise ValueError(f"bits_per_key must be at least 1, not "
+                             f"{bits_per_key}")
+
+        self._bit_count = max(keys, 1) * bits_per_key
+        self._bits = bytearray(-(-self._bit_count // 8))
+        self.keys = keys
+        self.stale = 0
+
+    def add(self, hash: int) -> None:
+        """
+        Adds the hash of a key to the filter.
+        :param hash: integer hash of key
+        :return: none
+        """
+        bit_count, bits = self._bit_count, self._bits
+        index = hash % bit_count
+        bits[index >> 3] |= 1 << (index & 7)
+        index = hash // bit_count % bit_count
+        bits[index >> 3] |= 1 << (index & 7)
+
+    def might_contain(self, hash: int) -> bool:
+        """
+        Checks if a key with this hash may have been added.
+        :param hash: integer hash of key
+        :return: false if no key with this hash was added
+        """
+        bit_count, bits = self._bit_count, self._bits
+        index = hash % bit_count
+        if not bits[index >> 3] >> (index & 7) & 1:
+            return False
+
+        index = hash // bit_count % bit_count
+        return bits[index >> 3] >> (index & 7) & 1 == 1
+
+    def discard(self, hash: int) -> None:
+        """
+        Counts the hash of a removed key as stale. Its bits stay set.
+        :param hash: integer hash of key
+        :return: none
+        """
+        self.stale += 1
+
+    def needs_rebuild(self) -> bool:
+        """
+        Checks if stale hashes outnumber the keys the filter is sized for.
+        :return: true if a new filter should be built
+        """
+        return self.stale > self.keys
+
+    def nbytes(self) -> int:
+        """
+        Returns the bytes taken by the bits of the filter.
+        :return: integer number of bytes
+        """
+        return len(self._bits)
+
+
+class MapFilter:
+    """
+    Membership filter of a hash map, kept as the map adds and removes
+    keys. While an incremental resize runs it also fills a filter for
+    the new table, which replaces the current one when the resize ends.
+    A new filter is built from the hashes of the map's keys once stale
+    hashes fill too much of the current one. It counts the lookups of
+    missing keys it answers and the ones it lets through for stats().
+    """
+
+    def __init__(self, bits_per_key: int, max_load: float,
+                 hashes: callable) -> None:
+        """
+        Initialize without a filter, build() makes the first one.
+        :param bits_per_key: bits of filter per key
+        :param max_load: load factor the map grows at, filters are
+            sized for capacity * max_load keys
+        :param hashes: callable returning an iterable of the hash of
+            every key in the map's current table
+        """
+        self._bits_per_key = bits_per_key
+        self._max_load = max_load
+        self._hashes = hashes
+        self._filter = None
+        self._capacity = 0
+        self._next_capacity = 0
+        self.next = None
+        self.rejects = 0
+        self.false_positives = 0
+
+    def _new(self, capacity: int) -> MembershipFilter:
+        """
+        Returns an empty filter for a table of capacity.
+        :param capacity: integer capacity of the table
+        :return: MembershipFilter
+        """
+        return MembershipFilter(int(capacity * self._max_load),
+                                self._bits_per_key)
+
+    def build(self, capacity: int, hashes=None) -> None:
+        """
+        Replaces the filter with one holding the hash of every key,
+        dropping the stale hashes of removed keys, and stops filling
+        the filter of a resize.
+        :param capacity: integer capacity of the map's table
+        :param hashes: iterable of the hashes of every key, read from
+            the map if not given
+        :return: none
+        """
+        self._filter = self._new(capacity)
+        self._capacity = capacity
+        self.next = None
+        if hashes is None:
+            hashes = self._hashes()
+        for hash in hashes:
+            self._filter.add(hash)
+
+    def start_resize(self, capacity: int) -> None:
+        """
+        Starts filling an empty filter for the new table of a resize.
+        The map adds the hash of every key it moves to next.
+        :param capacity: integer capacity of the new table
+        :return: none
+        """
+        self.next = self._new(capacity)
+        self._next_capacity = capacity
+
+    def finish_resize(self) -> None:
+        """
+        Replaces the filter with the one filled during the resize.
+        :return: none
+        """
+        self._filter = self.next
+        self._capacity = self._next_capacity
+        self.next = None
+
+    def add(self, hash: int) -> None:
+        """
+        Adds the hash of a new key to the filters.
+        :param hash: integer hash of key
+        :return: none
+        """
+        self._filter.add(hash)
+        if self.next is not None:
+            self.next.add(hash)
+
+    def discard(self, hash: int) -> None:
+        """
+        Counts the hash of a removed key as stale, building a new filter
+        once stale hashes fill too much of it. While a resize runs the
+        filter it fills replaces the stale one.
+        :param hash: integer hash of key
+        :return: none
+        """
+        if self.next is not None:
+            self.next.discard(hash)
+            return
+
+        self._filter.discard(hash)
+        if self._filter.needs_rebuild():
+            self.build(self._capacity)
+
+    def rules_out(self, hash: int) -> bool:
+        """
+        Checks the filter for a lookup, counting it if no key with this
+        hash was added.
+        :param hash: integer hash of key
+        :return: true if the map does not contain the key
+        """
+        if self._filter.might_contain(hash):
+            return False
+
+        self.rejects += 1
+        return True
+
+    def missed(self) -> None:
+        """
+        Counts a lookup of a missing key the filter let through.
+        :return: none
+        """
+        self.false_positives += 1
+
+    def stats(self) -> dict:
+        """
+        Returns filter_bytes, filter_rejects, filter_false_positives and
+        filter_fp_rate, the share of lookups of missing keys the filter
+        let through.
+        :return: dictionary of statistics
+        """
+        misses = self.rejects + self.false_positives
+        return {
+            'filter_bytes': self._filter.nbytes(),
+            'filter_rejects': self.rejects,
+            'filter_false_positives': self.false_positives,
+            'filter_fp_rate': self.false_positives / misses if misses else 0,
+        }
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import time
+
+    import hash_map_oa
+    import hash_map_sc
+
+    print("\nFilter of 10000 hashes")
+    print("----------------------")
+    for bits_per_key in (4, 8, 12):
+        membership = MembershipFilter(10000, bits_per_key)
+        for hash in range(0, 10000 * 7919, 7919):
+            membership.add(hash)
+        passed = sum(membership.might_contain(hash)
+                     for hash in range(1, 100000 * 7919, 7919))
+        print(f"{bits_per_key:2} bits per key: {membership.nbytes():6} "
+              f"bytes, {passed / 100000:.2%} false positives")
+
+    print("\nLookups of 100000 missing keys among 50000 keys")
+    print("------------------------------------------------")
+    keys = ['str' + str(i) for i in range(50000)]
+    missing = ['nope' + str(i) for i in range(100000)]
+    for name, map_class in (('chaining', hash_map_sc.HashMap),
+                            ('open addressing', hash_map_oa.HashMap)):
+        for filter_bits in (0, 8):
+            m = map_class(11, 'builtin', filter_bits=filter_bits)
+            for i, key in enumerate(keys):
+                m.put(key, i)
+
+            # tombstones lengthen the probe sequences of missing keys
+            for key in keys[::5]:
+                m.remove(key)
+
+            start = time.perf_counter()
+            for key in missing:
+                m.contains_key(key)
+            seconds = time.perf_counter() - start
+            rate = m.stats().get('filter_fp_rate')
+            print(f"{name:16} filter_bits {filter_bits}: "
+                  f"{seconds * 1e9 / len(missing):6.0f} ns per miss, " +
+                  ("no filter" if rate is None else
+                   f"{rate:.2%} false positives"))
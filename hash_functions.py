@@ -0,0 +1,398 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Registry of hash functions for the hash map implementations,
+# with a benchmark of their speed and bucket/probe distribution
+
+import random
+import sys
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from a6_include import hash_function_1, hash_function_2
+from hash_capacity import next_prime
+
+
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+_FNV_OFFSET = 0xCBF29CE484222325
+_FNV_PRIME = 0x100000001B3
+
+# 2^64 divided by the golden ratio
+_GOLDEN_64 = 0x9E3779B97F4A7C15
+
+# bytes the maps count for each cached hash, taken as a 64-bit integer
+HASH_BYTES = sys.getsizeof(_MASK_64)
+
+HASH_FUNCTIONS = {}
+
+# registered names of functions whose hashes change between processes,
+# which cannot be stored or shared with other processes
+PROCESS_LOCAL_FUNCTIONS = ('builtin',)
+
+# registered names of functions whose hashes only stay the same between
+# processes for keys of these types
+PORTABLE_KEY_TYPES = {'multiplicative': (int, str, bytes)}
+
+# hash function to a NumPy version that hashes a whole batch of keys
+_VECTORIZED = {}
+
+
+def register_hash_function(name: str, function: callable,
+                           vectorized: callable = None) -> None:
+    """
+    Adds a hash function to the registry under name.
+    :param name: string used to look the function up
+    :param function: callable taking a key and returning a non-negative int
+    :param vectorized: optional callable taking a batch of keys and
+        returning a NumPy uint64 array of the same hashes as function,
+        or none if it cannot handle that batch
+    :return: none
+    """
+    HASH_FUNCTIONS[name] = function
+    if vectorized is not None:
+        _VECTORIZED[function] = vectorized
+
+
+def get_hash_function(name: str) -> callable:
+    """
+    Returns the registered hash function with the given name.
+    :param name: string name of hash function
+    :return: hash function
+    """
+    if name not in HASH_FUNCTIONS:
+        raise KeyError(f"no hash function registered as {name!r}")
+
+    return HASH_FUNCTIONS[name]
+
+
+def hash_function_name(function: callable) -> str:
+    """
+    Returns the name a hash function is registered under.
+    :param function: hash function
+    :return: string name, none if function is not registered
+    """
+    for name, registered in HASH_FUNCTIONS.items():
+        if registered is function:
+            return name
+
+    return None
+
+
+def is_portable(name: str, key) -> bool:
+    """
+    Checks if the registered function name gives key the same hash in
+    every process, so the hash can be stored or shared.
+    :param name: string name of hash function
+    :param key: key to be hashed
+    :return: true if the hash of key is the same in every process
+    """
+    if name in PROCESS_LOCAL_FUNCTIONS:
+        return False
+
+    types = PORTABLE_KEY_TYPES.get(name)
+    return types is None or isinstance(key, types)
+
+
+def make_builtin_hash(seed: int = 0) -> callable:
+    """
+    Creates a hash function based on the interpreter's hash(). String
+    hashes are randomised per process unless PYTHONHASHSEED is set, so
+    these values must not be stored outside the process.
+    :param seed: integer mixed into every hash
+    :return: hash function
+    """
+    def builtin_hash(key: str) -> int:
+        return hash((seed, key)) & _MASK_64
+
+    return builtin_hash
+
+
+def _fnv1a_bytes(data: bytes) -> int:
+    """
+    64-bit FNV-1a hash of data.
+    :param data: bytes to be hashed
+    :return: integer hash
+    """
+    hash = _FNV_OFFSET
+    for byte in data:
+        hash = ((hash ^ byte) * _FNV_PRIME) & _MASK_64
+
+    return hash
+
+
+def fnv1a_hash(key: str) -> int:
+    """
+    64-bit FNV-1a hash of the UTF-8 bytes of key.
+    :param key: string to be hashed
+    :return: integer hash
+    """
+    return _fnv1a_bytes(key.encode())
+
+
+def multiplicative_hash(key) -> int:
+    """
+    Fibonacci (multiplicative) hash. Integer keys are used directly,
+    strings and bytes are first reduced with FNV-1a, so their hashes
+    are the same in every process. Other keys are reduced with the
+    interpreter's hash(), whose hashes of strings inside them change
+    between processes.
+    :param key: integer, string or bytes to be hashed
+    :return: integer hash in the range [0, 2^32)
+    """
+    if isinstance(key, str):
+        key = _fnv1a_bytes(key.encode())
+    elif isinstance(key, bytes):
+        key = _fnv1a_bytes(key)
+    elif not isinstance(key, int):
+        key = hash(key)
+
+    # keep the high bits of the product, which depend on every key bit
+    return ((key * _GOLDEN_64) & _MASK_64) >> 32
+
+
+def _fnv1a_many(keys) -> "numpy.ndarray":
+    """
+    NumPy version of fnv1a_hash for a list or array of strings. Keys are
+    laid out as rows of a fixed-width byte matrix and hashed one column
+    at a time, skipping columns past the end of each key.
+    """
+    # the byte matrix pads keys with nulls, so lengths are taken from
+    # the encoded keys, never from the matrix, or keys ending in nulls
+    # would hash as if the nulls were padding
+    if isinstance(keys, numpy.ndarray):
+        if keys.dtype.kind not in 'UO':
+            return None
+        keys = keys.tolist()
+    if not all(type(key) is str for key in keys):
+        return None
+    encoded = [key.encode() for key in keys]
+    lengths = numpy.fromiter(map(len, encoded), dtype=numpy.int64,
+                             count=len(encoded))
+    data = numpy.array(encoded, dtype=bytes)
+
+    count = len(data)
+    width = data.dtype.itemsize
+    columns = data.view(numpy.uint8).reshape(count, width)
+
+    hashes = numpy.full(count, _FNV_OFFSET, dtype=numpy.uint64)
+    prime = numpy.uint64(_FNV_PRIME)
+    for column in range(width):
+        mixed = (hashes ^ columns[:, column]) * prime
+        numpy.copyto(hashes, mixed, where=lengths > column)
+
+    return hashes
+
+
+def _multiplicative_many(keys) -> "numpy.ndarray":
+    """
+    NumPy version of multiplicative_hash for a list or array of integers
+    that fit in 64 bits.
+    """
+    if isinstance(keys, numpy.ndarray):
+        if keys.dtype.kind not in 'iu':
+            return None
+        data = keys
+    else:
+        if not all(type(key) is int for key in keys):
+            return None
+        try:
+            data = numpy.array(keys, dtype=numpy.int64)
+        except OverflowError:
+            return None
+
+    # uint64 products wrap like the masked products in multiplicative_hash
+    data = data.astype(numpy.uint64)
+    return (data * numpy.uint64(_GOLDEN_64)) >> numpy.uint64(32)
+
+
+def hash_batch(function: callable, keys) -> tuple:
+    """
+    Hashes a batch of keys, using the NumPy version of function when one
+    is registered, NumPy is installed and it can handle the keys.
+    :param function: hash function
+    :param keys: iterable of keys, or a NumPy array
+    :return: tuple of list of keys and list of integer hashes
+    """
+    # key comparisons need the keys as a list of Python objects
+    if numpy is not None and isinstance(keys, numpy.ndarray):
+        array, keys = keys, keys.tolist()
+    else:
+        if not isinstance(keys, list):
+            keys = list(keys)
+        array = keys
+
+    vectorized = _VECTORIZED.get(function)
+    if numpy is not None and vectorized is not None and keys:
+        hashes = vectorized(array)
+        if hashes is not None:
+            return keys, hashes.tolist()
+
+    return keys, [function(key) for key in keys]
+
+
+def batch_array(values: list) -> "numpy.ndarray":
+    """
+    Converts a list of batch results to a NumPy array.
+    :param values: list of values
+    :return: NumPy array
+    """
+    if numpy is None:
+        raise ImportError("as_array=True requires NumPy")
+
+    return numpy.array(values)
+
+
+register_hash_function('hash_function_1', hash_function_1)
+register_hash_function('hash_function_2', hash_function_2)
+register_hash_function('builtin', make_builtin_hash())
+register_hash_function('fnv1a', fnv1a_hash, _fnv1a_many)
+register_hash_function('multiplicative', multiplicative_hash,
+                       _multiplicative_many)
+
+
+# ------------------- BENCHMARK -------------------------------------------- #
+
+def make_corpora(size: int = 10000, seed: int = 261) -> dict:
+    """
+    Builds the default key corpora used by benchmark.
+    :param size: number of keys in each corpus
+    :param seed: integer seed for the random corpus
+    :return: dictionary of corpus name to list of string keys
+    """
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+
+    # every permutation of one word, which collide under hash_function_1
+    word = 'abcdefgh'
+    anagrams = set()
+    while len(anagrams) < min(size, 40320):
+        anagrams.add(''.join(rng.sample(word, len(word))))
+
+    return {
+        'sequential': ['key' + str(i) for i in range(size)],
+        'numeric': [str(i * 13) for i in range(size)],
+        'random': [''.join(rng.choice(letters) for _ in range(12))
+                   for _ in range(size)],
+        'anagrams': sorted(anagrams),
+    }
+
+
+def _chain_lengths(hashes: list, capacity: int) -> list:
+    """
+    Returns the chain length of every bucket for a chaining table.
+    """
+    lengths = [0] * capacity
+    for hash in hashes:
+        lengths[hash % capacity] += 1
+
+    return lengths
+
+
+def _probe_counts(hashes: list, capacity: int) -> list:
+    """
+    Returns the number of slots probed to insert each hash into an
+    open addressing table using quadratic probing.
+    """
+    used = bytearray(capacity)
+    counts = []
+    for hash in hashes:
+        index = hash % capacity
+        step = 1
+        probes = 1
+        while used[index]:
+            index = (index + step) % capacity
+            step += 2
+            probes += 1
+        used[index] = 1
+        counts.append(probes)
+
+    return counts
+
+
+def benchmark(functions: dict = None, corpora: dict = None,
+              repeat: int = 3) -> list:
+    """
+    Measures each hash function on each key corpus. Throughput is the
+    best of repeat runs. Chains are measured at load factor 1 and probes
+    at load factor .5, the thresholds the two hash maps resize at.
+    :param functions: dictionary of name to hash function, defaults to
+        every registered function
+    :param corpora: dictionary of corpus name to list of keys, defaults
+        to make_corpora()
+    :param repeat: number of timed runs per function and corpus
+    :return: list of dictionaries, one per function and corpus
+    """
+    if functions is None:
+        functions = HASH_FUNCTIONS
+    if corpora is None:
+        corpora = make_corpora()
+
+    results = []
+    for corpus_name, keys in corpora.items():
+        count = len(keys)
+        chain_capacity = next_prime(count)
+        probe_capacity = next_prime(count * 2)
+
+        for name, function in functions.items():
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                hashes = [function(key) for key in keys]
+                elapsed = time.perf_counter() - start
+                if best is None or elapsed < best:
+                    best = elapsed
+
+            lengths = _chain_lengths(hashes, chain_capacity)
+            probes = _probe_counts(hashes, probe_capacity)
+            used = [length for length in lengths if length]
+
+            results.append({
+                'function': name,
+                'corpus': corpus_name,
+                'keys': count,
+                'hashes_per_sec': count / best if best else float('inf'),
+                'distinct_hashes': len(set(hashes)),
+                'empty_buckets': lengths.count(0) / chain_capacity,
+                'max_chain': max(lengths),
+                'avg_chain': sum(used) / len(used) if used else 0,
+                'avg_probes': sum(probes) / count if count else 0,
+                'max_probes': max(probes) if probes else 0,
+            })
+
+    return results
+
+
+def print_results(results: list) -> None:
+    """
+    Prints benchmark results as a table.
+    :param results: list returned by benchmark
+    :return: none
+    """
+    columns = ('corpus', 'function', 'hashes_per_sec', 'distinct_hashes',
+               'empty_buckets', 'max_chain', 'avg_chain',
+               'avg_probes', 'max_probes')
+    print(' '.join(f'{column:>15}' for column in columns))
+    for row in results:
+        cells = []
+        for column in columns:
+            value = row[column]
+            if isinstance(value, float):
+                value = f'{value:.2f}'
+            cells.append(f'{value:>15}')
+        print(' '.join(cells))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nHash function benchmark")
+    print("-----------------------")
+    print_results(benchmark(corpora=make_corpora(5000)))
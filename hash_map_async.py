@@ -0,0 +1,481 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: asyncio facade for the hashmaps that resizes, bulk loads
+# and iterates in bounded chunks, yielding to the event loop between
+# chunks so map maintenance never stalls it
+
+import asyncio
+import gc
+
+from a6_include import DynamicArray, hash_function_1
+from hash_capacity import fit_capacity
+import hash_map_oa
+import hash_map_sc
+
+
+MAP_CLASSES = {
+    'chaining': hash_map_sc.HashMap,
+    'open_addressing': hash_map_oa.HashMap,
+}
+
+
+class AsyncHashMap:
+    """
+    HashMap for asyncio code. Lookups are plain methods, as they take
+    constant time. Anything that can touch the whole table is a
+    coroutine that works chunk_size buckets, slots or pairs at a time,
+    and lets other tasks run in between. The map stays readable
+    throughout: a resize moves entries with the incremental migration
+    of the underlying map, whose lookups search both tables.
+    """
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function=hash_function_1,
+                 kind: str = 'chaining',
+                 chunk_size: int = 1024,
+                 freeze_gc: bool = False,
+                 **options) -> None:
+        """
+        Initialize new map. It resizes incrementally unless options
+        say otherwise, so a remove that shrinks the table only starts
+        the resize, and a background task finishes it chunk by chunk.
+        :param capacity: integer capacity
+        :param function: hash function, or its registered name
+        :param kind: 'chaining' or 'open_addressing'
+        :param chunk_size: buckets, slots or pairs handled between two
+            yields to the event loop
+        :param freeze_gc: if true, gc.freeze() runs before each yield,
+            so full garbage collections stop scanning the entries added
+            so far. It freezes every object of the process, and cyclic
+            garbage frozen with them is only collected after
+            gc.unfreeze()
+        :param options: other HashMap constructor arguments
+        """
+        if kind not in MAP_CLASSES:
+            raise ValueError(f"kind must be one of {sorted(MAP_CLASSES)}, "
+                             f"not {kind!r}")
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, not "
+                             f"{chunk_size}")
+
+        options.setdefault('incremental_resize', True)
+        self._map = MAP_CLASSES[kind](capacity, function, **options)
+        self.chunk_size = chunk_size
+        self.freeze_gc = freeze_gc
+
+        # task finishing a resize started by a put or remove
+        self._resizer = None
+
+    @property
+    def map(self):
+        """
+        Returns the wrapped HashMap, for synchronous use.
+        """
+        return self._map
+
+    def _schedule(self) -> None:
+        """
+        Starts a task to finish a resize the last change started.
+        :return: none
+        """
+        if self._map._old is not None and self._resizer is None:
+            self._resizer = asyncio.get_running_loop().create_task(
+                self._drain())
+
+    async def _pause(self) -> None:
+        """
+        Lets other tasks run between two chunks, freezing the objects
+        made so far first if freeze_gc is set.
+        :return: none
+        """
+        if self.freeze_gc:
+            gc.freeze()
+        await asyncio.sleep(0)
+
+    async def _drain(self) -> None:
+        """
+        Moves the entries of a running resize chunk_size old buckets or
+        slots at a time until it is done.
+        :return: none
+        """
+        try:
+            while self._map._old is not None:
+                self._map._migrate(self.chunk_size)
+                await self._pause()
+        finally:
+            if asyncio.current_task() is self._resizer:
+                self._resizer = None
+
+    async def finish_resize(self) -> None:
+        """
+        Waits until no resize is running.
+        :return: none
+        """
+        await self._drain()
+
+    async def _make_room(self, count: int) -> None:
+        """
+        Finishes any running resize and grows the table, cooperatively,
+        until count more keys fit, so adding them neither finishes a
+        resize nor grows the table in one go. Expired entries are swept
+        first, chunk by chunk, instead of by the full sweep the map's
+        own put runs before growing.
+        :param count: number of keys about to be added
+        :return: none
+        """
+        map = self._map
+        await self._drain()
+        if map._expiring and \
+                map.get_size() + count > map.get_capacity() * map._max_load:
+            await self.sweep()
+
+        capacity = fit_capacity(map.get_capacity(), map.get_size() + count,
+                                map._max_load, map._capacity_policy)
+        if capacity > map.get_capacity():
+            await self.resize(capacity)
+
+    # ------------------------------------------------------------------ #
+
+    async def put(self, key: str, value: object, ttl: float = None) -> None:
+        """
+        Adds key/value pair to map. If map already contains key,
+        updates value of key. Any running resize is finished and the
+        table grown first, cooperatively.
+        :param key: string representing key
+        :param value: value to be added/updated
+        :param ttl: seconds until key expires, none to never expire
+        :return: none
+        """
+        await self._make_room(1)
+        self._map.put(key, value, ttl)
+        self._schedule()
+
+    async def put_many(self, pairs, ttl: float = None) -> None:
+        """
+        Adds every key/value pair from an iterable to map, chunk_size
+        pairs at a time. The table is grown first, cooperatively, to
+        the capacity all the pairs need.
+        :param pairs: iterable of (key, value) tuples
+        :param ttl: seconds until the keys expire, none to never expire
+        :return: none
+        """
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+
+        await self._make_room(len(pairs))
+        for start in range(0, len(pairs), self.chunk_size):
+            chunk = pairs[start:start + self.chunk_size]
+
+            # other tasks may have filled the table or started a resize
+            # meanwhile, which put_many would finish in one go
+            await self._make_room(len(chunk))
+            self._map.put_many(chunk, ttl)
+            await self._pause()
+
+    async def remove(self, key: str) -> None:
+        """
+        Removes node corresponding to key from map.
+        :param key: key corresponding to node to be removed
+        :return: none
+        """
+        # a remove that shrinks the table finishes any running resize
+        await self._drain()
+        self._map.remove(key)
+        self._schedule()
+
+    async def remove_many(self, keys) -> None:
+        """
+        Removes every key of a batch from map, chunk_size keys at a time.
+        :param keys: iterable of keys
+        :return: none
+        """
+        keys = list(keys)
+        for start in range(0, len(keys), self.chunk_size):
+            await self._drain()
+            self._map.remove_many(keys[start:start + self.chunk_size])
+            self._schedule()
+            await self._pause()
+
+    async def resize(self, new_capacity: int) -> None:
+        """
+        Resizes map like resize_table, moving chunk_size old buckets or
+        slots at a time. Lookups find keys in either table meanwhile.
+        :param new_capacity: integer representing new capacity
+        :return: none
+        """
+        if new_capacity < 1:
+            return
+
+        await self._drain()
+        self._map._start_migration(new_capacity)
+        await self._drain()
+
+    async def clear(self) -> None:
+        """
+        Empties buckets while maintaining capacity, after any running
+        resize.
+        :return: none
+        """
+        await self._drain()
+        self._map.clear()
+
+    async def sweep(self) -> int:
+        """
+        Removes every expired entry, chunk_size buckets or slots at a
+        time.
+        :return: number of entries removed
+        """
+        removed = 0
+        for _ in range(0, self._map.get_capacity(), self.chunk_size):
+            # removing may start a shrink, finished here chunk by chunk
+            await self._drain()
+            removed += self._map.sweep(self.chunk_size)
+            await self._pause()
+
+        return removed
+
+    async def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets in map, once any running resize
+        is done.
+        :return: integer value of empty buckets
+        """
+        await self._drain()
+        return self._map.empty_buckets()
+
+    def get(self, key: str):
+        """
+        Returns the value corresponding to the given key
+        :param key: string representing key
+        :return: value if key found, none if not found
+        """
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if key is found in map.
+        :param key: string representing key to be found
+        :return: true if map contains key, false if not
+        """
+        return self._map.contains_key(key)
+
+    def get_many(self, keys, default: object = None) -> list:
+        """
+        Returns the values corresponding to a batch of keys.
+        :param keys: iterable of keys
+        :param default: value returned for keys not in map
+        :return: list of values, in the order of keys
+        """
+        return self._map.get_many(keys, default)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    def table_load(self) -> float:
+        """
+        Returns the hash table load factor.
+        :return: float representing load factor
+        """
+        return self._map.table_load()
+
+    def stats(self) -> dict:
+        """
+        Returns the stats() of the wrapped map.
+        """
+        return self._map.stats()
+
+    async def items(self):
+        """
+        Yields the key/value pairs in map, reading chunk_size buckets or
+        slots at a time and letting other tasks run between chunks.
+        Raises RuntimeError if keys are added or removed, or the table
+        is resized, before the pairs are all yielded.
+        :return: async generator of (key, value) tuples
+        """
+        await self._drain()
+        map = self._map
+        version = map._version
+
+        for start in range(0, map.get_capacity(), self.chunk_size):
+            for pair in map._pairs(start, start + self.chunk_size):
+                yield pair
+            await self._pause()
+            if map._version != version:
+                raise RuntimeError("HashMap changed during iteration")
+
+    async def keys(self):
+        """
+        Yields the keys in map, chunk by chunk like items.
+        :return: async generator of keys
+        """
+        async for key, _ in self.items():
+            yield key
+
+    async def values(self):
+        """
+        Yields the values in map, chunk by chunk like items.
+        :return: async generator of values
+        """
+        async for _, value in self.items():
+            yield value
+
+    def __aiter__(self):
+        """
+        Iterate through the keys of map with async for
+        :return: async generator of keys
+        """
+        return self.keys()
+
+    async def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns Dynamic Array containing all key/value pairs in map,
+        built chunk by chunk like items.
+        :return: Dynamic Array containing tuples
+        """
+        key_arr = DynamicArray()
+
+        # add each pair of map to array
+        async for pair in self.items():
+            key_arr.append(pair)
+
+        return key_arr
+
+
+async def loop_stall(work) -> float:
+    """
+    Awaits work while a ticker task measures the longest time the event
+    loop went without running it.
+    :param work: awaitable to run
+    :return: longest stall in seconds
+    """
+    loop = asyncio.get_running_loop()
+    longest = 0.0
+    done = False
+
+    async def tick() -> None:
+        nonlocal longest
+        last = loop.time()
+        while not done:
+            await asyncio.sleep(0)
+            now = loop.time()
+            longest = max(longest, now - last)
+            last = now
+
+    ticker = loop.create_task(tick())
+    try:
+        await work
+    finally:
+        done = True
+        await ticker
+
+    return longest
+
+
+async def longest_stall(map: AsyncHashMap, pairs: list) -> float:
+    """
+    Measures the longest event loop stall of loading pairs into map with
+    put_many, resizing it and iterating over it.
+    :param map: AsyncHashMap to load
+    :param pairs: list of (key, value) tuples
+    :return: longest stall in seconds
+    """
+    async def work() -> None:
+        await map.put_many(pairs)
+        await map.resize(map.get_capacity() * 2)
+        async for _ in map.items():
+            pass
+
+    return await loop_stall(work())
+
+
+async def pending_stall(map: AsyncHashMap, pairs: list) -> float:
+    """
+    Measures the longest event loop stall of adding pairs to map, half
+    with put_many and half with put and a ttl, while a resize started
+    before them is still running, and then of growing a table full of
+    expired entries. Puts yield between them, as separate tasks would.
+    :param map: AsyncHashMap holding pairs already
+    :param pairs: list of (key, value) tuples not in map
+    :return: longest stall in seconds
+    """
+    async def work() -> None:
+        half = len(pairs) // 2
+        resize = asyncio.get_running_loop().create_task(
+            map.resize(map.get_capacity() * 4))
+        await asyncio.sleep(0)
+        await map.put_many(pairs[:half])
+        for key, value in pairs[half:]:
+            await map.put(key, value, ttl=.05)
+            await asyncio.sleep(0)
+        await resize
+
+        # every ttl entry expires, the next puts sweep before growing
+        await asyncio.sleep(.1)
+        for key, value in pairs[:half]:
+            await map.put(key + 'x', value)
+            await asyncio.sleep(0)
+
+    return await loop_stall(work())
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    async def main() -> None:
+        print("\nAsync map")
+        print("---------")
+        m = AsyncHashMap(11, kind='open_addressing', chunk_size=4)
+        for i in range(20):
+            await m.put('str' + str(i), i * 100)
+        print(m.get('str5'), m.get_size(), await m.empty_buckets())
+        print(sorted([key async for key in m])[:5])
+        await m.resize(200)
+        print(m.get_capacity(), (await m.get_keys_and_values()).length())
+
+        def report(kind: str, chunk_size: int, freeze_gc: bool,
+                   stall: float) -> None:
+            print(f"{kind:16} chunk_size {chunk_size:>10} freeze_gc "
+                  f"{freeze_gc:d}: {stall * 1000:8.1f} ms")
+
+            # frozen entries go back to the collector between runs
+            gc.unfreeze()
+            gc.collect()
+
+        # stalls include garbage collector pauses, which grow with the
+        # number of objects in the process
+        print("\nLongest event loop stall loading 200000 pairs")
+        print("---------------------------------------------")
+        pairs = [('str' + str(i), i) for i in range(200000)]
+        for kind in ('chaining', 'open_addressing'):
+            for chunk_size, freeze_gc in ((1024, False), (1024, True),
+                                          (1 << 30, False)):
+                m = AsyncHashMap(11, 'fnv1a', kind=kind,
+                                 chunk_size=chunk_size, freeze_gc=freeze_gc)
+                report(kind, chunk_size, freeze_gc,
+                       await longest_stall(m, pairs))
+
+        print("\nLongest stall adding 100000 pairs during a resize")
+        print("-------------------------------------------------")
+        more = [('new' + str(i), i) for i in range(100000)]
+        for kind in ('chaining', 'open_addressing'):
+            for freeze_gc in (False, True):
+                m = AsyncHashMap(11, 'fnv1a', kind=kind, freeze_gc=freeze_gc)
+                await m.put_many(pairs)
+                report(kind, m.chunk_size, freeze_gc,
+                       await pending_stall(m, more))
+
+    asyncio.run(main())
@@ -0,0 +1,425 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Bounded LRU/LFU cache built on the chaining hashmap, with
+# recency and frequency kept as links on the chain nodes themselves
+
+import sys
+import time
+
+from a6_include import hash_function_1
+from hash_capacity import PRIME, fit_capacity
+from hash_expiry import Expiring, expired
+from hash_functions import batch_array, hash_batch
+from hash_map_sc import HashMap, HashNode
+
+
+LRU = 'lru'
+LFU = 'lfu'
+
+
+class CacheNode(HashNode):
+    def __init__(self, key: str, value: object, hash: int,
+                 next: "CacheNode" = None) -> None:
+        """
+        Initialize chain node that is also a member of its use group,
+        a ring of nodes ordered from least to most recently used
+        """
+        super().__init__(key, value, hash, next)
+        self.older = None
+        self.newer = None
+        self.group = None
+        self.cost = 0
+
+
+class _Group:
+    """
+    Nodes used the same number of times, as a ring whose newer link
+    is the least recently used node. Groups form a ring of their own
+    ordered by count, starting from a root group with count 0. Under
+    LRU there is a single group and counts are not kept.
+    """
+
+    def __init__(self, count: int, lower: "_Group" = None) -> None:
+        """
+        Initialize an empty group, linked in after lower if given
+        """
+        self.count = count
+        self.older = self.newer = self
+        if lower is None:
+            self.lower = self.higher = self
+        else:
+            self.lower = lower
+            self.higher = lower.higher
+            lower.higher.lower = self
+            lower.higher = self
+
+    def unlink(self) -> None:
+        """
+        Removes the group from the ring of groups.
+        :return: none
+        """
+        self.lower.higher = self.higher
+        self.higher.lower = self.lower
+
+
+def _link(node: CacheNode, group: _Group) -> None:
+    """
+    Adds node to group as its most recently used node.
+    :param node: CacheNode not in any group
+    :param group: group to add node to
+    :return: none
+    """
+    node.group = group
+    node.newer = group
+    node.older = group.older
+    group.older.newer = node
+    group.older = node
+
+
+def _unlink(node: CacheNode) -> None:
+    """
+    Removes node from its group.
+    :param node: CacheNode in a group
+    :return: none
+    """
+    node.older.newer = node.newer
+    node.newer.older = node.older
+
+
+class CacheHashMap(HashMap):
+    """
+    Chaining HashMap bounded by a number of entries, a byte budget or
+    both. Going over either evicts the least recently used entry (LRU)
+    or the least frequently used one, oldest first among equals (LFU).
+    Each node is linked into its use group, so hits and evictions
+    update a few links and never scan the map.
+    """
+
+    _node_class = CacheNode
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 max_entries: int = None,
+                 max_bytes: int = None,
+                 policy: str = LRU,
+                 sizeof: callable = None,
+                 **options) -> None:
+        """
+        Initialize new cache. With max_entries the table starts big
+        enough to hold every entry, so a full cache never resizes.
+        :param capacity: integer representing minimum capacity
+        :param function: hash function, or its registered name
+        :param max_entries: most entries kept, none for no limit
+        :param max_bytes: most bytes kept, as measured by sizeof, none
+            for no limit
+        :param policy: LRU or LFU
+        :param sizeof: callable taking a key and value and returning
+            their size in bytes, sys.getsizeof of both by default
+        :param options: other HashMap constructor arguments, except
+            incremental_resize
+        """
+        if policy not in (LRU, LFU):
+            raise ValueError(f"policy must be {LRU!r} or {LFU!r}, "
+                             f"not {policy!r}")
+        if max_entries is not None and max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1, not "
+                             f"{max_entries}")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError(f"max_bytes must be at least 1, not {max_bytes}")
+        if options.get('incremental_resize'):
+            raise ValueError("a cache cannot resize incrementally")
+
+        # room for one entry over the limit, added before it is evicted
+        if max_entries is not None:
+            capacity = fit_capacity(capacity, max_entries + 1,
+                                    options.get('max_load', 1.0),
+                                    options.get('capacity_policy', PRIME))
+
+        super().__init__(capacity, function, **options)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._policy = policy
+        self._sizeof = sizeof or (lambda key, value: sys.getsizeof(key) +
+                                  sys.getsizeof(value))
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._rejected = 0
+        self._reset_groups()
+
+    def _reset_groups(self) -> None:
+        """
+        Starts with no nodes in any group.
+        :return: none
+        """
+        self._root = _Group(0)
+        if self._policy == LRU:
+            _Group(1, self._root)
+
+    def _cost(self, key: str, value: object) -> int:
+        """
+        Returns the bytes an entry counts against max_bytes. A value put
+        with a ttl is measured without its Expiring wrapper.
+        """
+        if self._max_bytes is None:
+            return 0
+        if type(value) is Expiring:
+            value = value.value
+        return self._sizeof(key, value)
+
+    def _touch(self, node: CacheNode) -> None:
+        """
+        Records a use of node: under LRU it becomes the most recently
+        used node, under LFU it moves to the group one count higher.
+        :param node: CacheNode in a group
+        :return: none
+        """
+        _unlink(node)
+        group = node.group
+        if self._policy == LFU:
+            higher = group.higher
+            if higher.count != group.count + 1:
+                higher = _Group(group.count + 1, group)
+            if group.newer is group:
+                group.unlink()
+            group = higher
+
+        _link(node, group)
+
+    def _add(self, node: CacheNode) -> None:
+        """
+        Links a new node in as used once.
+        :param node: CacheNode not in any group
+        :return: none
+        """
+        group = self._root.higher
+        if group.count != 1:
+            group = _Group(1, self._root)
+        _link(node, group)
+
+    def _evict(self) -> None:
+        """
+        Evicts entries until the cache is within its limits.
+        :return: none
+        """
+        while (self._max_entries is not None and
+               self._size > self._max_entries) or \
+                (self._max_bytes is not None and
+                 self._bytes > self._max_bytes):
+            # least recently used node of the lowest group, none left
+            # when the only entry over the limit is still being added
+            node = self._root.higher.newer
+            if node is self._root.higher:
+                return
+            self._forget(node)
+            super()._remove(node.key, node.hash)
+            self._evictions += 1
+
+    def _forget(self, node: CacheNode) -> None:
+        """
+        Takes a node being removed out of its group and the byte count.
+        :param node: CacheNode in a group
+        :return: none
+        """
+        _unlink(node)
+        group = node.group
+        if self._policy == LFU and group.newer is group:
+            group.unlink()
+        self._bytes -= node.cost
+
+    def _insert(self, key: str, value: object,
+                hash: int = None) -> CacheNode:
+        """
+        Adds or updates key/value pair, then evicts entries until the
+        cache is within its limits. Updating a key counts as a use. An
+        entry bigger than max_bytes on its own is not kept and evicts
+        nothing, it only drops an older value of the same key.
+        :param key: string representing key
+        :param value: value to be added/updated
+        :param hash: integer hash of key, computed if not given
+        :return: CacheNode holding key, none if the entry was rejected
+        """
+        cost = self._cost(key, value)
+        if self._max_bytes is not None and cost > self._max_bytes:
+            if hash is None:
+                hash = self._hash_function(key)
+            self._remove(key, hash)
+            self._rejected += 1
+            return None
+
+        size = self._size
+        node = super()._insert(key, value, hash)
+        self._bytes += cost - node.cost
+        node.cost = cost
+
+        # a new node joins its group after eviction, so it is never
+        # the entry chosen to make room for itself
+        if self._size == size:
+            self._touch(node)
+            self._evict()
+        else:
+            self._evict()
+            self._add(node)
+
+        return node
+
+    def _remove(self, key: str, hash: int) -> None:
+        """
+        Removes node corresponding to key from map.
+        :param key: key corresponding to node to be removed
+        :param hash: integer hash of key
+        :return: none
+        """
+        node = self._buckets[self._bucket_index(hash)].find(key, hash)
+        if node is not None:
+            self._forget(node)
+            super()._remove(key, hash)
+
+    def _increment(self, key: str, amount: int = 1,
+                   insert: bool = True) -> int:
+        """
+        Adds amount to the value of key as a put of the new value.
+        :param key: string representing key
+        :param amount: number added to the value of key
+        :param insert: if false, keys not in map are not added
+        :return: new value of key, 0 if key was not in map and not added
+        """
+        hash = self._hash_function(key)
+        node = self._buckets[self._bucket_index(hash)].find(key, hash)
+        if node is None and not insert:
+            return 0
+
+        value = amount if node is None else node.value + amount
+        self.put(key, value)
+        return value
+
+    def get(self, key: str):
+        """
+        Returns the value corresponding to the given key, counting a
+        hit or a miss. A hit is a use of the entry.
+        :param key: string representing key
+        :return: value if key found, none if not found
+        """
+        hash = self._hash_function(key)
+        node = self._buckets[self._bucket_index(hash)].find(key, hash)
+        if node is None or (type(node.value) is Expiring and
+                            self._expire(node)):
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._touch(node)
+        value = node.value
+        return value.value if type(value) is Expiring else value
+
+    def get_many(self, keys, default: object = None,
+                 as_array: bool = False):
+        """
+        Returns the values corresponding to a batch of keys, counting
+        each as a hit or a miss.
+        :param keys: iterable of keys, or a NumPy array
+        :param default: value returned for keys not in map
+        :param as_array: if true, return a NumPy array instead of a list
+        :return: list or NumPy array of values, in the order of keys
+        """
+        keys, hashes = hash_batch(self._hash_function, keys)
+        now = time.time()
+        values = []
+        for node in self._find_many(keys, hashes):
+            if node is None or expired(node.value, now):
+                self._misses += 1
+                values.append(default)
+            else:
+                self._hits += 1
+                self._touch(node)
+                value = node.value
+                values.append(value.value if type(value) is Expiring
+                              else value)
+
+        return batch_array(values) if as_array else values
+
+    def clear(self) -> None:
+        """
+        Empties buckets while maintaining capacity. Counters are kept.
+        :return: none
+        """
+        super().clear()
+        self._bytes = 0
+        self._reset_groups()
+
+    def stats(self) -> dict:
+        """
+        Returns the stats() of the map with the cache counters added.
+        :return: dictionary with the map's stats and hits, misses,
+            hit_rate, evictions, rejected (entries bigger than
+            max_bytes, which are not kept) and bytes
+        """
+        stats = super().stats()
+        lookups = self._hits + self._misses
+        stats.update({
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': self._hits / lookups if lookups else 0,
+            'evictions': self._evictions,
+            'rejected': self._rejected,
+            'bytes': self._bytes,
+        })
+
+        return stats
+
+    @classmethod
+    def load(cls, path: str, lazy: bool = False) -> "CacheHashMap":
+        """
+        Caches are not loaded from snapshots, whose nodes carry no use
+        order. Load a plain HashMap and pass its items() to from_pairs.
+        """
+        raise ValueError("a cache cannot be loaded from a snapshot")
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nLRU cache of 3 entries")
+    print("----------------------")
+    m = CacheHashMap(max_entries=3)
+    for key in ('a', 'b', 'c'):
+        m.put(key, key.upper())
+    m.get('a')
+    m.put('d', 'D')
+    print(sorted(m.keys()), m.get('b'))
+    stats = m.stats()
+    print(stats['hits'], stats['misses'], stats['evictions'])
+
+    print("\nLFU cache of 3 entries")
+    print("----------------------")
+    m = CacheHashMap(max_entries=3, policy=LFU)
+    for key in ('a', 'b', 'c'):
+        m.put(key, key.upper())
+    for key in ('a', 'a', 'b', 'c'):
+        m.get(key)
+    m.put('d', 'D')
+    m.put('e', 'E')
+    print(sorted(m.keys()))
+
+    print("\nByte budget")
+    print("-----------")
+    m = CacheHashMap(max_bytes=1000, sizeof=lambda key, value: len(value))
+    for i in range(10):
+        m.put('str' + str(i), 'x' * 300)
+    print(m.get_size(), m.stats()['bytes'], m.stats()['evictions'])
+
+    # an entry bigger than the budget is rejected, evicting nothing
+    m.put('big', 'x' * 5000)
+    print(m.get_size(), m.stats()['bytes'], m.stats()['evictions'],
+          m.stats()['rejected'], m.get('big'))
+
+    # entries put with a ttl are measured by their value
+    m.put('big', 'x' * 5000, ttl=10)
+    m.put('ttl', 'x' * 300, ttl=10)
+    print(m.get_size(), m.stats()['bytes'], m.get('big'), m.contains_key('ttl'))
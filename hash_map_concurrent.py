@@ -0,0 +1,540 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Thread-safe variant of the chaining hashmap, with writers
+# locking one stripe of buckets and readers taking no lock at all
+
+import random
+import threading
+import time
+
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+from hash_capacity import check_load_factors, fit_capacity, next_prime
+from hash_functions import get_hash_function
+from hash_map_sc import HashLinkedList, HashNode
+import hash_map_sc
+
+
+class _Table:
+    """
+    Buckets of a ConcurrentHashMap together with their capacity. A table
+    is published by one attribute assignment, so a reader always sees
+    buckets and capacity that belong together.
+    """
+    __slots__ = ('buckets', 'capacity')
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.buckets = [HashLinkedList() for _ in range(capacity)]
+
+
+class ConcurrentHashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 stripes: int = 16,
+                 max_load: float = 1.0,
+                 growth: float = 2) -> None:
+        """
+        Initialize new HashMap that uses separate chaining and can be
+        shared between threads. Buckets are split into stripes of
+        neighbouring buckets, and put and remove lock only the stripe
+        of their key. get, contains_key and iteration take no lock.
+        :param capacity: integer minimum capacity, rounded up to a prime
+        :param function: hash function, or the name it is registered
+            under in hash_functions
+        :param stripes: number of locks the buckets are split between
+        :param max_load: load factor at which put grows the table
+        :param growth: multiplier applied to capacity when growing
+        """
+        check_load_factors(max_load, growth, 0)
+        if stripes < 1:
+            raise ValueError(f"stripes must be at least 1, not {stripes}")
+        self._max_load = max_load
+        self._growth = growth
+
+        # hash function may be given by its registered name
+        if isinstance(function, str):
+            function = get_hash_function(function)
+        self._hash_function = function
+
+        self._table = _Table(next_prime(capacity))
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+        # size and non-empty buckets of each stripe, only changed while
+        # holding its lock
+        self._sizes = [0] * stripes
+        self._used = [0] * stripes
+
+        self._resizes = 0
+        self._resize_seconds = 0.0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        table = self._table
+
+        out = ''
+        for i in range(table.capacity):
+            out += str(i) + ': ' + str(table.buckets[i]) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map. While other threads are writing, the result
+        may leave out or include their latest changes.
+        """
+        return sum(self._sizes)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._table.capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _lock_bucket(self, hash: int) -> tuple:
+        """
+        Acquires the lock of the stripe holding the bucket of hash in the
+        current table. Retries if the table was replaced while waiting,
+        since the bucket then lives in another table.
+        :param hash: integer hash of key
+        :return: tuple of table, bucket index and stripe index, with
+            the stripe lock held
+        """
+        locks = self._locks
+        while True:
+            table = self._table
+            index = hash % table.capacity
+            stripe = index * len(locks) // table.capacity
+            locks[stripe].acquire()
+            if self._table is table:
+                return table, index, stripe
+            locks[stripe].release()
+
+    def _lock_all(self) -> None:
+        """
+        Acquires every stripe lock, always in the same order so two
+        threads doing this cannot deadlock.
+        :return: none
+        """
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """
+        Releases every stripe lock.
+        :return: none
+        """
+        for lock in reversed(self._locks):
+            lock.release()
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Adds key/value pair to map. If map already contains key,
+        updates value of key.
+        :param key: string representing key
+        :param value: value to be added/updated
+        :return: none
+        """
+        hash = self._hash_function(key)
+        table, index, stripe = self._lock_bucket(hash)
+        try:
+            chain = table.buckets[index]
+            node = chain.find(key, hash)
+
+            # key in map
+            if node is not None:
+                node.value = value
+                return
+
+            # the node is complete before insert_node makes it the head,
+            # so readers walking the chain never see a half-built node
+            if chain.insert_node(HashNode(key, value, hash)) == 1:
+                self._used[stripe] += 1
+            self._sizes[stripe] += 1
+        finally:
+            self._locks[stripe].release()
+
+        if self.get_size() > table.capacity * self._max_load:
+            self._resize(table, int(table.capacity * self._growth))
+
+    def get(self, key: str):
+        """
+        Returns the value corresponding to the given key, without taking
+        a lock
+        :param key: string representing key
+        :return: value if key found, none if not found
+        """
+        hash = self._hash_function(key)
+        table = self._table
+        node = table.buckets[hash % table.capacity].find(key, hash)
+
+        return None if node is None else node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if key is found in map, without taking a lock.
+        :param key: string representing key to be found
+        :return: true if map contains key, false if not
+        """
+        hash = self._hash_function(key)
+        table = self._table
+
+        return table.buckets[hash % table.capacity].find(key, hash) \
+            is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes node corresponding to key from map. The node keeps its
+        link to the rest of the chain, so a reader standing on it can
+        still walk past it.
+        :param key: key corresponding to node to be removed
+        :return: none
+        """
+        table, index, stripe = self._lock_bucket(self._hash_function(key))
+        try:
+            chain = table.buckets[index]
+            if chain.remove(key):
+                self._sizes[stripe] -= 1
+                if chain.length() == 0:
+                    self._used[stripe] -= 1
+        finally:
+            self._locks[stripe].release()
+
+    def _resize(self, table: _Table, new_capacity: int) -> None:
+        """
+        Copies every node into a new table of new capacity and publishes
+        it, holding every stripe lock. Nodes are copied rather than
+        relinked so readers still walking the old table see it intact.
+        Does nothing if table was already replaced by another thread.
+        :param table: table the caller saw when deciding to resize
+        :param new_capacity: integer representing new capacity
+        :return: none
+        """
+        self._lock_all()
+        try:
+            if self._table is not table:
+                return
+
+            start = time.perf_counter()
+            new_capacity = fit_capacity(next_prime(new_capacity),
+                                        self.get_size(), self._max_load)
+            new_table = _Table(new_capacity)
+            buckets = new_table.buckets
+            for chain in table.buckets:
+                for node in chain:
+                    buckets[node.hash % new_capacity].insert_node(
+                        HashNode(node.key, node.value, node.hash))
+
+            # stripes cover other buckets in the new table
+            stripes = len(self._locks)
+            sizes = [0] * stripes
+            used = [0] * stripes
+            for index in range(new_capacity):
+                length = buckets[index].length()
+                if length:
+                    stripe = index * stripes // new_capacity
+                    sizes[stripe] += length
+                    used[stripe] += 1
+            self._sizes, self._used = sizes, used
+
+            self._table = new_table
+            self._resizes += 1
+            self._resize_seconds += time.perf_counter() - start
+        finally:
+            self._unlock_all()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes map to new capacity or closest prime number if not
+        prime, growing further if the current pairs would overfill it.
+        :param new_capacity: integer representing new capacity
+        :return: none
+        """
+        if new_capacity < 1:
+            return
+
+        self._resize(self._table, new_capacity)
+
+    def clear(self) -> None:
+        """
+        Empties buckets while maintaining capacity.
+        :return: none
+        """
+        self._lock_all()
+        try:
+            self._table = _Table(self._table.capacity)
+            self._sizes = [0] * len(self._locks)
+            self._used = [0] * len(self._locks)
+        finally:
+            self._unlock_all()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets in map
+        :return: integer value of empty buckets
+        """
+        return self._table.capacity - sum(self._used)
+
+    def table_load(self) -> float:
+        """
+        Returns the hash table load factor.
+        :return: float representing load factor
+        """
+        return self.get_size() / self._table.capacity
+
+    def stats(self) -> dict:
+        """
+        Returns counters kept up to date by the map operations.
+        :return: dictionary with size, capacity, table_load,
+            empty_buckets, stripes, resizes and resize_seconds
+        """
+        return {
+            'size': self.get_size(),
+            'capacity': self.get_capacity(),
+            'table_load': self.table_load(),
+            'empty_buckets': self.empty_buckets(),
+            'stripes': len(self._locks),
+            'resizes': self._resizes,
+            'resize_seconds': self._resize_seconds,
+        }
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns Dynamic Array containing all key/value pairs in map
+        :return: Dynamic Array containing tuples
+        """
+        key_arr = DynamicArray()
+
+        # add each pair of map to array
+        for pair in self.items():
+            key_arr.append(pair)
+
+        return key_arr
+
+    def _nodes(self):
+        """
+        Yields every node of the table current when iteration starts,
+        without taking a lock. Unlike the single-threaded maps, changes
+        made by other threads do not raise RuntimeError: each key in the
+        map for the whole iteration is yielded once, and keys added or
+        removed meanwhile may or may not be.
+        :return: generator of HashNodes
+        """
+        for chain in self._table.buckets:
+            yield from chain
+
+    def keys(self):
+        """
+        Returns a lazy view of the keys in map.
+        :return: generator of keys
+        """
+        for node in self._nodes():
+            yield node.key
+
+    def values(self):
+        """
+        Returns a lazy view of the values in map.
+        :return: generator of values
+        """
+        for node in self._nodes():
+            yield node.value
+
+    def items(self):
+        """
+        Returns a lazy view of the key/value pairs in map.
+        :return: generator of (key, value) tuples
+        """
+        for node in self._nodes():
+            yield node.key, node.value
+
+    def __iter__(self):
+        """
+        Iterate through the keys of map
+        :return: generator of keys
+        """
+        return self.keys()
+
+
+class LockedHashMap:
+    """
+    Chaining HashMap behind one global lock, the way maps were shared
+    between threads before ConcurrentHashMap. Used as the throughput
+    baseline.
+    """
+
+    def __init__(self, capacity: int = 11,
+                 function: callable = hash_function_1, **options) -> None:
+        self._map = hash_map_sc.HashMap(capacity, function, **options)
+        self._lock = threading.Lock()
+
+    def put(self, key: str, value: object) -> None:
+        with self._lock:
+            self._map.put(key, value)
+
+    def get(self, key: str):
+        with self._lock:
+            return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        with self._lock:
+            return self._map.contains_key(key)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._map.remove(key)
+
+    def get_size(self) -> int:
+        return self._map.get_size()
+
+
+# ------------------- STRESS TEST ------------------------------------------ #
+
+def _run_threads(count: int, target: callable) -> float:
+    """
+    Starts count threads running target(thread_number) together and
+    waits for all of them.
+    :return: seconds from start to the last thread finishing
+    """
+    barrier = threading.Barrier(count + 1)
+    errors = []
+
+    def run(number: int) -> None:
+        barrier.wait()
+        try:
+            target(number)
+        except BaseException as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=run, args=(number,))
+               for number in range(count)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if errors:
+        raise errors[0]
+
+    return elapsed
+
+
+def stress_test(threads: int = 8, ops: int = 20000, keys: int = 500,
+                seed: int = 261, **options) -> ConcurrentHashMap:
+    """
+    Runs writer threads that each own a set of keys alongside reader
+    threads, starting from a small table so it resizes many times.
+    Readers check that every value they see belongs to its key and that
+    keys put before the threads started are never missing. Afterwards
+    the map must hold exactly the keys each writer last put.
+    :param threads: number of writer threads, and of reader threads
+    :param ops: number of operations per thread
+    :param keys: number of keys owned by each writer
+    :param seed: integer seed for the operations of each thread
+    :param options: other ConcurrentHashMap constructor arguments
+    :return: the map after the test
+    """
+    map = ConcurrentHashMap(3, hash_function_2, **options)
+    for number in range(keys):
+        map.put('stable' + str(number), ('stable' + str(number), 0))
+
+    expected = [dict() for _ in range(threads)]
+
+    def writer(number: int) -> None:
+        rng = random.Random(seed + number)
+        owned = expected[number]
+        for op in range(ops):
+            key = 'w' + str(number) + '_' + str(rng.randrange(keys))
+            if rng.random() < .7:
+                map.put(key, (key, op))
+                owned[key] = (key, op)
+            else:
+                map.remove(key)
+                owned.pop(key, None)
+
+    def reader(number: int) -> None:
+        rng = random.Random(seed - number - 1)
+        for _ in range(ops):
+            writer_number = rng.randrange(threads)
+            key = 'w' + str(writer_number) + '_' + str(rng.randrange(keys))
+            value = map.get(key)
+            if value is not None and value[0] != key:
+                raise AssertionError(f"{key} has value of {value[0]}")
+
+            stable = 'stable' + str(rng.randrange(keys))
+            if not map.contains_key(stable):
+                raise AssertionError(f"{stable} missing during resize")
+
+    _run_threads(threads * 2, lambda number: writer(number)
+                 if number < threads else reader(number - threads))
+
+    final = {'stable' + str(number): ('stable' + str(number), 0)
+             for number in range(keys)}
+    for owned in expected:
+        final.update(owned)
+    if dict(map.items()) != final or map.get_size() != len(final):
+        raise AssertionError("map does not hold the keys last put")
+
+    return map
+
+
+def throughput(map_class: type, threads: int = 4, ops: int = 50000,
+               keys: int = 10000, reads: float = .9,
+               seed: int = 261) -> float:
+    """
+    Measures operations per second of threads sharing one map, on a mix
+    of gets and puts over a common set of keys.
+    :param map_class: ConcurrentHashMap, LockedHashMap or another class
+        taking (capacity, function)
+    :param threads: number of threads
+    :param ops: number of operations per thread
+    :param keys: number of distinct keys
+    :param reads: share of operations that are gets
+    :param seed: integer seed for the operations of each thread
+    :return: float operations per second across all threads
+    """
+    map = map_class(11, hash_function_2)
+    for number in range(keys):
+        map.put('key' + str(number), number)
+
+    work = []
+    for number in range(threads):
+        rng = random.Random(seed + number)
+        work.append([(rng.random() < reads, 'key' + str(rng.randrange(keys)))
+                     for _ in range(ops)])
+
+    def run(number: int) -> None:
+        get, put = map.get, map.put
+        for is_read, key in work[number]:
+            if is_read:
+                get(key)
+            else:
+                put(key, key)
+
+    return threads * ops / _run_threads(threads, run)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nStress test")
+    print("-----------")
+    m = stress_test()
+    print(m.stats())
+
+    print("\nThroughput, 90% gets")
+    print("--------------------")
+    for count in (1, 2, 4, 8):
+        locked = throughput(LockedHashMap, count)
+        striped = throughput(ConcurrentHashMap, count)
+        print(count, 'threads:', round(locked), 'global lock,',
+              round(striped), 'striped')
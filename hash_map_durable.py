@@ -0,0 +1,586 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Durable hashmap that appends every change to a write-ahead
+# log with group commit, recovers by replaying the log over the latest
+# snapshot, and compacts the log in a background thread
+
+import os
+import struct
+import tempfile
+import threading
+import zlib
+
+from a6_include import DynamicArray
+import hash_map_oa
+import hash_map_sc
+from hash_snapshot import decode, encode
+
+
+MAP_CLASSES = {
+    'chaining': hash_map_sc.HashMap,
+    'open_addressing': hash_map_oa.HashMap,
+}
+
+# log record operations
+_PUT = 1
+_REMOVE = 2
+_CLEAR = 3
+
+# checksum, operation, key length, value length
+_RECORD = struct.Struct('<IBII')
+
+
+def _record(operation: int, key=None, value=None) -> bytes:
+    """
+    Builds one log record. The checksum covers everything after it, so
+    a record cut short by a crash is detected on replay.
+    :param operation: _PUT, _REMOVE or _CLEAR
+    :param key: key of the change, none for _CLEAR
+    :param value: value of a _PUT
+    :return: bytes of the record
+    """
+    key = b'' if operation == _CLEAR else encode(key)
+    value = encode(value) if operation == _PUT else b''
+    body = _RECORD.pack(0, operation, len(key), len(value))[4:] + key + value
+
+    return struct.pack('<I', zlib.crc32(body)) + body
+
+
+class DurableHashMap:
+    def __init__(self,
+                 directory: str,
+                 kind: str = 'chaining',
+                 capacity: int = 11,
+                 function='fnv1a',
+                 sync_every: int = 64,
+                 fsync: bool = True,
+                 compact_bytes: int = 1 << 22,
+                 **options) -> None:
+        """
+        Opens the durable map stored in directory, creating it if needed.
+        The map is rebuilt from the newest snapshot there, and then every
+        log written since that snapshot is replayed over it.
+        :param directory: path of the directory holding the snapshot and
+            log files
+        :param kind: 'chaining' or 'open_addressing'
+        :param capacity: integer capacity of a new map
+        :param function: registered name of the hash function, which
+            must give the same hashes in every process
+        :param sync_every: number of changes written and synced to disk
+            together (group commit). 1 syncs every change, 0 only syncs
+            when sync or close is called
+        :param fsync: if false, changes are only handed to the operating
+            system, which survives a crash of this process but not of
+            the machine
+        :param compact_bytes: log size at which a background compaction
+            writes a new snapshot and starts an empty log
+        :param options: other HashMap constructor arguments
+        """
+        if kind not in MAP_CLASSES:
+            raise ValueError(f"kind must be one of {sorted(MAP_CLASSES)}, "
+                             f"not {kind!r}")
+        if sync_every < 0:
+            raise ValueError(f"sync_every must be at least 0, not "
+                             f"{sync_every}")
+
+        self._directory = directory
+        self._map_class = MAP_CLASSES[kind]
+        self._capacity = capacity
+        self._function = function
+        self._options = options
+        self._sync_every = sync_every
+        self._fsync = fsync
+        self._compact_bytes = compact_bytes
+
+        # records written since the last sync, waiting for the group commit
+        self._pending = []
+        self._log = None
+        self._log_bytes = 0
+        self._syncs = 0
+        self._compactions = 0
+
+        # background compaction and the error it hit, if any
+        self._compactor = None
+        self._compaction_error = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    def __enter__(self) -> "DurableHashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _path(self, name: str, generation: int) -> str:
+        """
+        Returns the path of a snapshot or log file of a generation.
+        """
+        extension = '.bin' if name == 'snapshot' else '.wal'
+        return os.path.join(self._directory,
+                            f'{name}-{generation:08d}{extension}')
+
+    def _generations(self, name: str) -> list:
+        """
+        Returns the sorted generations of the snapshot or log files in
+        the directory.
+        """
+        extension = '.bin' if name == 'snapshot' else '.wal'
+        generations = []
+        for file_name in os.listdir(self._directory):
+            if file_name.startswith(name + '-') and \
+                    file_name.endswith(extension):
+                generations.append(int(file_name[len(name) + 1:
+                                                 -len(extension)]))
+
+        return sorted(generations)
+
+    def _recover(self) -> None:
+        """
+        Loads the newest snapshot, replays the logs that follow it and
+        opens the newest log for appending. Snapshot n holds the map as
+        it was when log n was started.
+        :return: none
+        """
+        self._map, start, logs = self._rebuild()
+        self._generation = logs[-1] if logs else start
+        self._remove_before(start)
+        self._open_log()
+
+    def _rebuild(self, end: int = None) -> tuple:
+        """
+        Builds a map from the files alone: the newest snapshot before
+        generation end, with the logs that follow it replayed over it.
+        :param end: integer generation to stop before, none for every
+            snapshot and log
+        :return: tuple of the map, the generation of its snapshot (0
+            without one) and the list of generations of logs replayed
+        """
+        snapshots = [generation for generation in self._generations('snapshot')
+                     if end is None or generation < end]
+        if snapshots:
+            start = snapshots[-1]
+            map = self._map_class.load(self._path('snapshot', start))
+        else:
+            start = 0
+            map = self._map_class(self._capacity, self._function,
+                                  **self._options)
+
+        logs = [generation for generation in self._generations('log')
+                if generation >= start and (end is None or generation < end)]
+        for generation in logs:
+            self._replay(self._path('log', generation), map)
+
+        return map, start, logs
+
+    def _replay(self, path: str, map) -> None:
+        """
+        Applies every complete record of a log to a map. A record cut
+        short or damaged by a crash ends the log, and is cut off the
+        file so new records follow the last good one.
+        :param path: log file path
+        :param map: HashMap to apply the records to
+        :return: none
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        offset = 0
+        while offset + _RECORD.size <= len(data):
+            checksum, operation, key_length, value_length = \
+                _RECORD.unpack_from(data, offset)
+            end = offset + _RECORD.size + key_length + value_length
+            if end > len(data) or \
+                    zlib.crc32(data[offset + 4:end]) != checksum:
+                break
+
+            start = offset + _RECORD.size
+            if operation == _PUT:
+                map.put(decode(data, start, key_length),
+                        decode(data, start + key_length, value_length))
+            elif operation == _REMOVE:
+                map.remove(decode(data, start, key_length))
+            else:
+                map.clear()
+            offset = end
+
+        if offset < len(data):
+            with open(path, 'r+b') as file:
+                file.truncate(offset)
+
+    def _open_log(self) -> None:
+        """
+        Opens the log of the current generation for appending.
+        :return: none
+        """
+        path = self._path('log', self._generation)
+        self._log = open(path, 'ab')
+        self._log_bytes = self._log.tell()
+
+    def _remove_before(self, generation: int) -> None:
+        """
+        Deletes snapshots and logs older than generation, which a newer
+        snapshot has replaced, and temporary files left by a crash.
+        :param generation: integer generation of the newest snapshot
+        :return: none
+        """
+        for name in ('snapshot', 'log'):
+            for old in self._generations(name):
+                if old < generation:
+                    os.remove(self._path(name, old))
+
+        for file_name in os.listdir(self._directory):
+            if file_name.endswith('.tmp'):
+                os.remove(os.path.join(self._directory, file_name))
+
+    def _append(self, record: bytes) -> None:
+        """
+        Adds a record to the group waiting to be written, syncing once
+        the group is sync_every records long and compacting once the log
+        passes compact_bytes.
+        :param record: bytes of the record
+        :return: none
+        """
+        self._pending.append(record)
+        self._log_bytes += len(record)
+        if self._sync_every and len(self._pending) >= self._sync_every:
+            self.sync()
+
+        if self._log_bytes >= self._compact_bytes and \
+                (self._compactor is None or not self._compactor.is_alive()):
+            self.compact()
+
+    def sync(self) -> None:
+        """
+        Writes every pending record to the log in one write and, unless
+        fsync is false, waits until it is on disk.
+        :return: none
+        """
+        if not self._pending:
+            return
+
+        self._log.write(b''.join(self._pending))
+        self._log.flush()
+        if self._fsync:
+            os.fsync(self._log.fileno())
+        self._pending.clear()
+        self._syncs += 1
+
+    def compact(self, wait: bool = False) -> None:
+        """
+        Starts a new log and writes a snapshot in a background thread.
+        The snapshot is built from the files, by replaying the closed
+        logs over the previous snapshot, so the map is not copied and
+        can keep changing while it is written. Once the snapshot is in
+        place, the older snapshot and logs are deleted.
+        :param wait: if true, return only once the snapshot is written
+        :return: none
+        """
+        self._join_compactor()
+
+        # only the log is switched here, every earlier change is synced
+        # to the logs the snapshot is built from
+        self.sync()
+        self._log.close()
+        self._generation += 1
+        self._open_log()
+
+        self._compactor = threading.Thread(
+            target=self._write_snapshot, args=(self._generation,),
+            daemon=True)
+        self._compactor.start()
+        if wait:
+            self._join_compactor()
+
+    def _write_snapshot(self, generation: int) -> None:
+        """
+        Runs in the compaction thread. Writes the map as it was when log
+        generation was started as the snapshot of generation, then
+        deletes what it replaces.
+        :param generation: integer generation of the snapshot
+        :return: none
+        """
+        try:
+            map, _, _ = self._rebuild(generation)
+
+            # write beside the final name, then rename, so a crash never
+            # leaves a partial snapshot
+            descriptor, temporary = tempfile.mkstemp(
+                suffix='.tmp', dir=self._directory)
+            os.close(descriptor)
+            map.save(temporary)
+            with open(temporary, 'rb') as file:
+                os.fsync(file.fileno())
+            os.replace(temporary, self._path('snapshot', generation))
+            self._sync_directory()
+
+            self._remove_before(generation)
+            self._compactions += 1
+        except Exception as error:
+            self._compaction_error = error
+
+    def _sync_directory(self) -> None:
+        """
+        Makes a rename in the directory durable, where the platform
+        allows syncing a directory.
+        :return: none
+        """
+        try:
+            descriptor = os.open(self._directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(descriptor)
+        except OSError:
+            pass
+        finally:
+            os.close(descriptor)
+
+    def _join_compactor(self) -> None:
+        """
+        Waits for a running compaction, raising the error it hit.
+        :return: none
+        """
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+        if self._compaction_error is not None:
+            error, self._compaction_error = self._compaction_error, None
+            raise error
+
+    def close(self) -> None:
+        """
+        Syncs pending records, waits for a running compaction and closes
+        the log. The map cannot be used afterwards.
+        :return: none
+        """
+        if self._log is None:
+            return
+
+        self.sync()
+        self._log.close()
+        self._log = None
+        self._join_compactor()
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Adds key/value pair to map. If map already contains key,
+        updates value of key. The change is durable after the next sync.
+        :param key: string representing key
+        :param value: value to be added/updated
+        :return: none
+        """
+        self._map.put(key, value)
+        self._append(_record(_PUT, key, value))
+
+    def put_many(self, pairs) -> None:
+        """
+        Adds every key/value pair from an iterable to map.
+        :param pairs: iterable of (key, value) tuples
+        :return: none
+        """
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+
+        self._map.put_many(pairs)
+        for key, value in pairs:
+            self._append(_record(_PUT, key, value))
+
+    def remove(self, key: str) -> None:
+        """
+        Removes node corresponding to key from map. Keys not in map are
+        not logged.
+        :param key: key corresponding to node to be removed
+        :return: none
+        """
+        if self._map.contains_key(key):
+            self._map.remove(key)
+            self._append(_record(_REMOVE, key))
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key of a batch from map.
+        :param keys: iterable of keys
+        :return: none
+        """
+        for key in keys:
+            self.remove(key)
+
+    def clear(self) -> None:
+        """
+        Empties buckets while maintaining capacity.
+        :return: none
+        """
+        self._map.clear()
+        self._append(_record(_CLEAR))
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the map in memory. Capacity is not logged, a recovered
+        map has the capacity of its snapshot and the puts replayed.
+        :param new_capacity: integer representing new capacity
+        :return: none
+        """
+        self._map.resize_table(new_capacity)
+
+    def get(self, key: str):
+        """
+        Returns the value corresponding to the given key
+        :param key: string representing key
+        :return: value if key found, none if not found
+        """
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if key is found in map.
+        :param key: string representing key to be found
+        :return: true if map contains key, false if not
+        """
+        return self._map.contains_key(key)
+
+    def get_many(self, keys, default: object = None) -> list:
+        """
+        Returns the values corresponding to a batch of keys.
+        :param keys: iterable of keys
+        :param default: value returned for keys not in map
+        :return: list of values, in the order of keys
+        """
+        return self._map.get_many(keys, default)
+
+    def contains_many(self, keys) -> list:
+        """
+        Checks if each key of a batch is found in map.
+        :param keys: iterable of keys
+        :return: list of booleans, in the order of keys
+        """
+        return self._map.contains_many(keys)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    def table_load(self) -> float:
+        """
+        Returns the hash table load factor.
+        :return: float representing load factor
+        """
+        return self._map.table_load()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets in map
+        :return: integer value of empty buckets
+        """
+        return self._map.empty_buckets()
+
+    def stats(self) -> dict:
+        """
+        Returns the stats() of the map with the log counters added.
+        :return: dictionary with the map's stats and generation,
+            log_bytes, pending, syncs and compactions
+        """
+        stats = self._map.stats()
+        stats.update({
+            'generation': self._generation,
+            'log_bytes': self._log_bytes,
+            'pending': len(self._pending),
+            'syncs': self._syncs,
+            'compactions': self._compactions,
+        })
+
+        return stats
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns Dynamic Array containing all key/value pairs in map
+        :return: Dynamic Array containing tuples
+        """
+        return self._map.get_keys_and_values()
+
+    def keys(self):
+        """
+        Returns a lazy view of the keys in map.
+        :return: generator of keys
+        """
+        return self._map.keys()
+
+    def values(self):
+        """
+        Returns a lazy view of the values in map.
+        :return: generator of values
+        """
+        return self._map.values()
+
+    def items(self):
+        """
+        Returns a lazy view of the key/value pairs in map.
+        :return: generator of (key, value) tuples
+        """
+        return self._map.items()
+
+    def __iter__(self):
+        """
+        Iterate through the keys of map
+        :return: generator of keys
+        """
+        return self._map.keys()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import subprocess
+    import sys
+    import time
+
+    print("\nDurable map recovered after close")
+    print("---------------------------------")
+    with tempfile.TemporaryDirectory() as directory:
+        with DurableHashMap(directory, compact_bytes=1 << 14) as m:
+            for i in range(1000):
+                m.put('str' + str(i), i * 100)
+            for i in range(0, 1000, 2):
+                m.remove('str' + str(i))
+            print(m.get_size(), m.stats()['compactions'] > 0)
+
+        with DurableHashMap(directory) as m:
+            print(m.get_size(), m.get('str1'), m.get('str2'),
+                  m.get('str999'))
+            print(sorted(os.listdir(directory)))
+
+    print("\nCompacted multiplicative map reopened under another hash seed")
+    print("-------------------------------------------------------------")
+    with tempfile.TemporaryDirectory() as directory:
+        with DurableHashMap(directory, function='multiplicative',
+                            compact_bytes=1 << 30) as m:
+            m.put_many(('str' + str(i), i) for i in range(200000))
+            start = time.perf_counter()
+            m.compact()
+            print(f"compact() returned after "
+                  f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+        code = ("import sys\n"
+                "from hash_map_durable import DurableHashMap\n"
+                "with DurableHashMap(sys.argv[1]) as m:\n"
+                "    print(m.get_size(), m.get('str1'), m.get('str199999'))")
+        seed = '2' if os.environ.get('PYTHONHASHSEED') == '1' else '1'
+        print(subprocess.run([sys.executable, '-c', code, directory],
+                             env=dict(os.environ, PYTHONHASHSEED=seed),
+                             check=True, capture_output=True,
+                             text=True).stdout.strip(),
+              sorted(os.listdir(directory)))
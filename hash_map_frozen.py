@@ -0,0 +1,405 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Read-only hashmap built over a fixed key set with a
+# minimal perfect hash (hash and displace, as in CHD), so every lookup is
+# one hash, one slot and one key comparison
+
+import sys
+import time
+from array import array
+
+from a6_include import DynamicArray
+
+
+_MASK64 = (1 << 64) - 1
+
+# multipliers are kept below 2 ** 63 to fit a signed array
+_MASK63 = (1 << 63) - 1
+
+# odd constants scattering the bits of displacements and hashes
+_MIX = 0x9E3779B97F4A7C15
+_MIX2 = 0xBF58476D1CE4E5B9
+_MIX3 = 0x94D049BB133111EB
+
+# average keys per bucket, more is smaller but slower to build
+_BUCKET_SIZE = 2
+
+# displacements tried for one bucket before its keys go to the overflow
+_MAX_TRIES = 1 << 16
+
+# held by slots left without a key, which no key compares equal to
+_NO_KEY = object()
+
+
+def _multiplier(displacement: int) -> int:
+    """
+    Returns the multiplier a bucket's displacement stands for, mixed
+    (as in splitmix64) so each displacement sends a key to an unrelated
+    slot. Multipliers are odd, so keys with different hashes keep
+    different products, and land in the same slot under few of them.
+    :param displacement: integer displacement, from 1
+    :return: odd integer multiplier below 2 ** 63
+    """
+    mixed = displacement * _MIX & _MASK64
+    mixed = (mixed ^ mixed >> 30) * _MIX2 & _MASK64
+    mixed = (mixed ^ mixed >> 27) * _MIX3 & _MASK64
+    return (mixed ^ mixed >> 31) & _MASK63 | 1
+
+
+def _mix(key_hash: int) -> int:
+    """
+    Scatters the bits of a builtin hash, so keys with hashes in a run,
+    like integers, still fall into buckets of random sizes. Different
+    hashes keep different results. FrozenHashMap.get repeats this
+    inline.
+    :param key_hash: integer builtin hash of key
+    :return: integer below 2 ** 64
+    """
+    return (key_hash ^ _MIX) * _MIX2 & _MASK64
+
+
+def _bucket(mixed: int, buckets: int) -> int:
+    """
+    Returns the bucket of a mixed hash, picked by its high bits.
+    :param mixed: integer returned by _mix
+    :param buckets: integer number of buckets
+    :return: integer bucket index
+    """
+    return mixed * buckets >> 64
+
+
+def _slot(mixed: int, multiplier: int, slots: int) -> int:
+    """
+    Returns the slot a bucket's multiplier sends a mixed hash to. The
+    high bits of the product pick the slot, so every bit counts.
+    :param mixed: integer returned by _mix
+    :param multiplier: integer multiplier of the key's bucket
+    :param slots: integer number of slots
+    :return: integer slot index
+    """
+    return (mixed * multiplier & _MASK64) * slots >> 64
+
+
+class FrozenHashMap:
+    """
+    Map that cannot change after it is built. Keys are split into
+    buckets by hash, and each bucket, largest first, gets the
+    displacement (a hash multiplier) that sends all of its keys to free
+    slots, so n keys fill exactly n slots. Buckets of one key take the free slots left over
+    directly. A lookup hashes the key once with the builtin hash(),
+    reads the multiplier of its bucket and compares the one key in
+    the slot it lands on. The rare distinct keys sharing a whole hash
+    (hash(-1) == hash(-2)) are kept in a small overflow dict. Hashes are
+    those of this process, so the map is not saved.
+    """
+
+    def __init__(self, pairs=()) -> None:
+        """
+        Builds the map from key/value pairs, later pairs replacing
+        earlier ones with the same key.
+        :param pairs: iterable of (key, value) tuples
+        """
+        start = time.perf_counter()
+        values = {}
+        for key, value in pairs:
+            values[key] = value
+
+        self._size = len(values)
+        self._bucket_count = max(1, -(-self._size // _BUCKET_SIZE))
+        self._overflow = {}
+
+        # distinct keys with the same hash cannot be told apart by any
+        # displacement
+        buckets = [[] for _ in range(self._bucket_count)]
+        seen = set()
+        for key in values:
+            mixed = _mix(hash(key))
+            if mixed in seen:
+                self._overflow[key] = values[key]
+                continue
+            seen.add(mixed)
+            buckets[_bucket(mixed, self._bucket_count)].append((mixed, key))
+
+        self._slot_count = max(1, self._size - len(self._overflow))
+        self._keys = [_NO_KEY] * self._slot_count
+        self._values = [None] * self._slot_count
+        self._displacements = array('q', bytes(8 * self._bucket_count))
+        self._place(buckets, values)
+        self._build_seconds = time.perf_counter() - start
+
+    def _place(self, buckets: list, values: dict) -> None:
+        """
+        Finds the displacement of every bucket and stores each key and
+        value in its slot.
+        :param buckets: list of lists of (mixed hash, key) tuples
+        :param values: dictionary of the value of each key
+        :return: none
+        """
+        slots = self._slot_count
+        taken = bytearray(slots)
+        order = sorted(range(len(buckets)), key=lambda index:
+                       len(buckets[index]), reverse=True)
+
+        for position, index in enumerate(order):
+            bucket = buckets[index]
+            if len(bucket) < 2:
+                break
+
+            # first displacement sending every key to a different free slot
+            for displacement in range(1, _MAX_TRIES):
+                multiplier = _multiplier(displacement)
+                chosen = {_slot(mixed, multiplier, slots)
+                          for mixed, _ in bucket}
+                if len(chosen) == len(bucket) and \
+                        not any(taken[slot] for slot in chosen):
+                    break
+            else:
+                for _, key in bucket:
+                    self._overflow[key] = values[key]
+                continue
+
+            self._displacements[index] = multiplier
+            for mixed, key in bucket:
+                slot = _slot(mixed, multiplier, slots)
+                taken[slot] = 1
+                self._keys[slot] = key
+                self._values[slot] = values[key]
+        else:
+            position = len(order)
+
+        # buckets of one key point straight at a free slot, stored as
+        # -1 - slot, and empty buckets keep multiplier 0
+        free = (slot for slot in range(slots) if not taken[slot])
+        for index in order[position:]:
+            bucket = buckets[index]
+            if not bucket:
+                break
+            key = bucket[0][1]
+            slot = next(free)
+            self._displacements[index] = -1 - slot
+            self._keys[slot] = key
+            self._values[slot] = values[key]
+
+    @classmethod
+    def from_map(cls, map) -> "FrozenHashMap":
+        """
+        Builds a frozen copy of the current pairs of a map.
+        :param map: any map with items()
+        :return: new FrozenHashMap
+        """
+        return cls(map.items())
+
+    def get(self, key: str):
+        """
+        Returns the value corresponding to the given key
+        :param key: string representing key
+        :return: value if key found, none if not found
+        """
+        mixed = (hash(key) ^ _MIX) * _MIX2 & _MASK64
+        multiplier = self._displacements[mixed * self._bucket_count >> 64]
+        if multiplier < 0:
+            slot = -1 - multiplier
+        else:
+            slot = (mixed * multiplier & _MASK64) * self._slot_count >> 64
+
+        if self._keys[slot] == key:
+            return self._values[slot]
+
+        # only keys sharing a hash with another key are kept aside
+        if self._overflow:
+            return self._overflow.get(key)
+        return None
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if key is found in map.
+        :param key: string representing key to be found
+        :return: true if map contains key, false if not
+        """
+        mixed = (hash(key) ^ _MIX) * _MIX2 & _MASK64
+        multiplier = self._displacements[mixed * self._bucket_count >> 64]
+        if multiplier < 0:
+            slot = -1 - multiplier
+        else:
+            slot = (mixed * multiplier & _MASK64) * self._slot_count >> 64
+
+        return self._keys[slot] == key or key in self._overflow
+
+    def get_many(self, keys, default: object = None) -> list:
+        """
+        Returns the values corresponding to a batch of keys.
+        :param keys: iterable of keys
+        :param default: value returned for keys not in map
+        :return: list of values, in the order of keys
+        """
+        values = []
+        for key in keys:
+            value = self.get(key)
+
+            # a stored none is told apart from a missing key
+            if value is None and not self.contains_key(key):
+                value = default
+            values.append(value)
+
+        return values
+
+    def contains_many(self, keys) -> list:
+        """
+        Checks if each key of a batch is found in map.
+        :param keys: iterable of keys
+        :return: list of booleans, in the order of keys
+        """
+        return [self.contains_key(key) for key in keys]
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Frozen maps cannot change.
+        """
+        raise RuntimeError("map is frozen")
+
+    def remove(self, key: str) -> None:
+        """
+        Frozen maps cannot change.
+        """
+        raise RuntimeError("map is frozen")
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return number of slots of map, its size unless keys overflowed
+        """
+        return self._slot_count
+
+    def table_load(self) -> float:
+        """
+        Returns the hash table load factor.
+        :return: float representing load factor
+        """
+        return (self._size - len(self._overflow)) / self._slot_count
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of slots without a key, 0 unless keys overflowed
+        :return: integer value of empty slots
+        """
+        return self._keys.count(_NO_KEY)
+
+    def stats(self) -> dict:
+        """
+        Returns the layout of the map.
+        :return: dictionary with size, capacity, buckets, overflow,
+            table_bytes (of the slot and displacement arrays) and
+            build_seconds
+        """
+        return {
+            'size': self._size,
+            'capacity': self._slot_count,
+            'buckets': self._bucket_count,
+            'overflow': len(self._overflow),
+            'table_bytes': sys.getsizeof(self._keys) +
+            sys.getsizeof(self._values) +
+            sys.getsizeof(self._displacements),
+            'build_seconds': self._build_seconds,
+        }
+
+    def items(self):
+        """
+        Returns a lazy view of the key/value pairs in map.
+        :return: generator of (key, value) tuples
+        """
+        for key, value in zip(self._keys, self._values):
+            if key is not _NO_KEY:
+                yield key, value
+        yield from self._overflow.items()
+
+    def keys(self):
+        """
+        Returns a lazy view of the keys in map.
+        :return: generator of keys
+        """
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        """
+        Returns a lazy view of the values in map.
+        :return: generator of values
+        """
+        for _, value in self.items():
+            yield value
+
+    def __iter__(self):
+        """
+        Iterate through the keys of map
+        :return: generator of keys
+        """
+        return self.keys()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns Dynamic Array containing all key/value pairs in map
+        :return: Dynamic Array containing tuples
+        """
+        key_arr = DynamicArray()
+
+        # add each pair of map to array
+        for pair in self.items():
+            key_arr.append(pair)
+
+        return key_arr
+
+
+def table_bytes(map) -> int:
+    """
+    Returns the bytes taken by the slot or bucket arrays of a map,
+    counting chain nodes but not the keys and values themselves, as
+    the map reports them in stats().
+    :param map: chaining, open addressing or frozen HashMap
+    :return: integer number of bytes
+    """
+    return map.stats()['table_bytes']
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import hash_map_oa
+    import hash_map_sc
+
+    print("\nFrozen map")
+    print("----------")
+    m = hash_map_sc.HashMap(11, 'fnv1a')
+    for i in range(10):
+        m.put('str' + str(i), i * 100)
+    frozen = m.freeze()
+    print(frozen.get('str3'), frozen.contains_key('str10'),
+          frozen.get_size(), frozen.get_capacity(), frozen.empty_buckets())
+
+    print("\nLookups and table bytes for 100000 keys")
+    print("---------------------------------------")
+    keys = ['str' + str(i) for i in range(100000)]
+    for name, m in (
+            ('chaining', hash_map_sc.HashMap(11, 'builtin')),
+            ('open addressing', hash_map_oa.HashMap(11, 'builtin')),
+            ('frozen', None)):
+        if m is None:
+            m = base.freeze()
+        else:
+            for i, key in enumerate(keys):
+                m.put(key, i)
+            base = m
+
+        start = time.perf_counter()
+        for key in keys:
+            m.get(key)
+        seconds = time.perf_counter() - start
+        print(f"{name:16} {seconds * 1e9 / len(keys):6.0f} ns per get "
+              f"{table_bytes(m) / len(keys):6.1f} bytes per key")
@@ -3,73 +3,490 @@
 # Course: CS261 - Data Structures
 # Assignment: 6
 # Due Date: 08-15-2023
-# Description: Implementation of hashmap using dynamic array and open addressing
-# with quadratic probing for collision resolution
+# Description: Implementation of hashmap using parallel arrays and open
+# addressing for collision resolution, with linear, quadratic (triangular
+# for power of two capacities), double hashing or Robin Hood probing
 
-from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
+import sys
+import time
+
+from a6_include import (DynamicArray, HashEntry,
                         hash_function_1, hash_function_2)
+from hash_expiry import Expiring, expired, expiring
+from hash_filter import MapFilter
+from hash_capacity import (MIX_MULTIPLIER, POWER_OF_TWO, PRIME,
+                           check_load_factors, check_policy, fit_capacity, is_prime, mix_shift,
+                           next_power_of_two, next_prime, round_capacity)
+from hash_functions import (HASH_BYTES, batch_array, get_hash_function,
+                            hash_batch)
+from hash_map_frozen import FrozenHashMap
+from hash_snapshot import LazyList, Snapshot, function_id, write_snapshot
+
+
+# slot states stored in the state byte array
+_EMPTY = 0
+_FULL = 1
+_TOMBSTONE = 2
+
+# stands in for the value of keys not found by batch lookups
+_MISSING = object()
+
+# probing strategies
+LINEAR = 'linear'
+QUADRATIC = 'quadratic'
+DOUBLE_HASHING = 'double_hashing'
+ROBIN_HOOD = 'robin_hood'
+PROBING_STRATEGIES = (LINEAR, QUADRATIC, DOUBLE_HASHING, ROBIN_HOOD)
+
+
+def _first_step(hash2: int, capacity: int, shift: int) -> int:
+    """
+    Returns the first probe step of a key.
+    :param hash2: second hash of key under double hashing, none otherwise
+    :param capacity: integer capacity of the table probed
+    :param shift: mix shift of a power of two table, none if prime
+    :return: integer step, which shares no factor with capacity
+    """
+    if hash2 is None:
+        return 1
+
+    # any step below a prime capacity, or any odd step below a power
+    # of two, visits every slot
+    if shift is None:
+        return hash2 % (capacity - 1) + 1
+    return (hash2 | 1) & (capacity - 1)
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function,
+                 tombstone_ratio: float = .25,
+                 capacity_policy: str = PRIME,
+                 incremental_resize: bool = False,
+                 migration_step: int = 8,
+                 track_stats: bool = False,
+                 max_load: float = .5,
+                 growth: float = 2,
+                 min_load: float = 0,
+                 probing: str = QUADRATIC,
+                 second_function=hash_function_2,
+                 sweep_step: int = 8,
+                 filter_bits: int = 0) -> None:
         """
         Initialize new HashMap that uses
-        quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        open addressing for collision resolution
+        :param function: hash function, or the name it is registered
+            under in hash_functions
+        :param tombstone_ratio: share of the table tombstones may take up
+            before the table is rehashed at the same capacity
+        :param capacity_policy: PRIME to index slots by hash % capacity,
+            POWER_OF_TWO to index by mixed hash bits and a mask and
+            probe by triangular numbers
+        :param incremental_resize: if true, resizes keep the old slot
+            arrays next to the new ones and move migration_step old
+            slots on each later put, get, contains_key and remove
+            instead of moving every entry at once
+        :param migration_step: number of old slots moved per operation
+        :param track_stats: if true, keep a histogram of the slots
+            probed by each put, get, contains_key and remove, and time
+            incremental migration steps, for stats()
+        :param max_load: load factor at which put grows the table, below
+            1. Quadratic probing is only sure to find a free slot below .5,
+            above that put grows the table when a probe sequence is full
+        :param growth: multiplier applied to capacity when growing
+        :param min_load: load factor below which remove shrinks the
+            table, 0 to never shrink. Must be below
+            max_load / (2 * growth) so resizes cannot thrash
+        :param probing: LINEAR, QUADRATIC, DOUBLE_HASHING or ROBIN_HOOD.
+            Robin Hood probing is linear, moves entries closer to their
+            first slot along to make room, and removes by shifting the
+            following entries back instead of leaving tombstones
+        :param second_function: hash function, or registered name, whose
+            hash sets the probe step of each key under DOUBLE_HASHING
+        :param sweep_step: number of slots each put scans for expired
+            entries once any key has been put with a ttl
+        :param filter_bits: bits per key of a membership filter that get,
+            contains_key and the batch lookups check before probing, 0
+            for no filter. It is sized for capacity * max_load keys and
+            rebuilt whenever the table is rehashed
         """
-        self._buckets = DynamicArray()
+        check_policy(capacity_policy)
+        check_load_factors(max_load, growth, min_load, limit=1)
+        if filter_bits < 0:
+            raise ValueError(f"filter_bits must be at least 0, not "
+                             f"{filter_bits}")
+        if probing not in PROBING_STRATEGIES:
+            raise ValueError(f"probing must be one of "
+                             f"{PROBING_STRATEGIES}, not {probing!r}")
+        self._probing = probing
+        self._robin_hood = probing == ROBIN_HOOD
+
+        # second hash is only used, and cached, under double hashing
+        if probing != DOUBLE_HASHING:
+            second_function = None
+        elif isinstance(second_function, str):
+            second_function = get_hash_function(second_function)
+        self._second_function = second_function
+
+        self._capacity_policy = capacity_policy
+        self._max_load = max_load
+        self._growth = growth
+        self._min_load = min_load
+
+        # capacity must be a prime number, or a power of two
+        if capacity_policy == POWER_OF_TWO:
+            self._set_capacity(next_power_of_two(capacity))
+        else:
+            self._set_capacity(self._next_prime(capacity))
+        self._allocate()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        # shrinking never goes below the starting capacity
+        self._min_capacity = self._capacity
 
+        # hash function may be given by its registered name
+        if isinstance(function, str):
+            function = get_hash_function(function)
         self._hash_function = function
-        self._size = 0
+        self._tombstone_ratio = tombstone_ratio
+
+        # (hashes, keys, values, states, capacity, shift, step growth,
+        # second hashes) of a table being migrated from
+        self._old = None
+        self._incremental_resize = incremental_resize
+        self._migration_step = migration_step
+
+        # counts changes to the set of keys or the slot layout, so
+        # iterators can tell the map changed under them
+        self._version = 0
+
+        self._resizes = 0
+        self._resize_seconds = 0.0
+
+        # index n is the number of operations that probed n slots, none
+        # unless stats are tracked
+        self._probe_counts = [0] if track_stats else None
+
+        # expired entries are reclaimed when found, and by sweeps that
+        # only run once a key has been put with a ttl
+        self._expiring = False
+        self._sweep_step = sweep_step
+        self._sweep_index = 0
+        self._expired = 0
+
+        # membership filter of every key, none without filter_bits
+        self._filter_bits = filter_bits
+        self._filter = None
+        if filter_bits:
+            self._filter = MapFilter(filter_bits, max_load, self._key_hashes)
+            self._filter.build(self._capacity, ())
 
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
+        self._finish_migration()
+
         out = ''
-        for i in range(self._buckets.length()):
-            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+        for i in range(self._capacity):
+            out += str(i) + ': ' + str(self._entry(i)) + '\n'
         return out
 
-    def _next_prime(self, capacity: int) -> int:
+    def _allocate(self) -> None:
         """
-        Increment from given number to find the closest prime number
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Creates empty slot arrays for the current capacity. Each slot
+        has a cached hash, key, value and state byte, and a cached second
+        hash under double hashing.
+        :return: none
         """
-        if capacity % 2 == 0:
-            capacity += 1
+        self._hashes = [0] * self._capacity
+        self._hashes2 = None
+        if self._second_function is not None:
+            self._hashes2 = [0] * self._capacity
+        self._keys = [None] * self._capacity
+        self._values = [None] * self._capacity
+        self._states = bytearray(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def _entry(self, index: int) -> HashEntry:
+        """
+        Builds a HashEntry for the slot at index.
+        :param index: integer representing slot index
+        :return: HashEntry, or none if slot is empty
+        """
+        state = self._states[index]
+        if state == _EMPTY:
+            return None
 
-        while not self._is_prime(capacity):
-            capacity += 2
+        value = self._values[index]
+        if type(value) is Expiring:
+            value = value.value
+        entry = HashEntry(self._keys[index], value)
+        entry.is_tombstone = state == _TOMBSTONE
+        return entry
 
-        return capacity
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Find the closest prime number from given number
+        using the precomputed prime table
+        """
+        return next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
         """
         Determine if given integer is a prime number and return boolean
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
-        if capacity == 2 or capacity == 3:
+        return is_prime(capacity)
+
+    def _set_capacity(self, capacity: int) -> None:
+        """
+        Sets capacity, the shift used to index power of two tables and
+        how much the probe step grows each probe.
+        :param capacity: integer representing capacity
+        :return: none
+        """
+        self._capacity = capacity
+        if self._capacity_policy == POWER_OF_TWO:
+            self._shift = mix_shift(capacity)
+        else:
+            self._shift = None
+
+        # only quadratic probing grows the step, other strategies keep
+        # the first step of each key
+        if self._probing != QUADRATIC:
+            self._step_growth = 0
+
+        # steps 1, 3, 5... give quadratic offsets
+        elif self._shift is None:
+            self._step_growth = 2
+
+        # steps 1, 2, 3... give triangular offsets, which visit every
+        # slot of a power of two table
+        else:
+            self._step_growth = 1
+
+    def _slot_index(self, hash: int) -> int:
+        """
+        Returns the first slot probed for a hash.
+        :param hash: integer hash of key
+        :return: integer index
+        """
+        if self._shift is None:
+            return hash % self._capacity
+
+        # mix hash bits so the mask does not only keep the low bits
+        return (hash * MIX_MULTIPLIER) >> self._shift & (self._capacity - 1)
+
+    def _key_hashes(self):
+        """
+        Yields the hash of every full slot, which the membership filter
+        is built from. Expired entries stay in, lookups must still find
+        them to expire them.
+        :return: generator of integer hashes
+        """
+        states, hashes = self._states, self._hashes
+        for index in range(self._capacity):
+            if states[index] == _FULL:
+                yield hashes[index]
+
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Switches to empty slot arrays of new capacity, keeping the
+        current arrays as the old table. Later operations move the old
+        entries across a few slots at a time.
+        :param new_capacity: integer representing new capacity
+        :return: none
+        """
+        self._finish_migration()
+
+        new_capacity = round_capacity(new_capacity, self._capacity_policy)
+        new_capacity = fit_capacity(new_capacity, self._size, self._max_load,
+                                    self._capacity_policy)
+
+        start = time.perf_counter()
+        self._old = (self._hashes, self._keys, self._values, self._states,
+                     self._capacity, self._shift, self._step_growth,
+                     self._hashes2)
+        self._migrate_index = 0
+        self._version += 1
+        if self._filter is not None:
+            self._filter.start_resize(new_capacity)
+
+        size = self._size
+        self._set_capacity(new_capacity)
+        self._allocate()
+        self._size = size
+
+        self._resizes += 1
+        self._resize_seconds += time.perf_counter() - start
+
+    def _migrate(self, count: int = None) -> None:
+        """
+        Moves the entries in the next count slots of the old table into
+        the new one. Moved slots become tombstones so probe sequences in
+        the old table stay intact.
+        :param count: number of old slots to move, defaults to
+            migration_step
+        :return: none
+        """
+        hashes, keys, values, states, capacity, _, _, hashes2 = self._old
+        if count is None:
+            count = self._migration_step
+
+        # migration steps are only timed when stats are tracked
+        timed = self._probe_counts is not None
+        if timed:
+            start = time.perf_counter()
+
+        end = min(self._migrate_index + count, capacity)
+        next_filter = None if self._filter is None else self._filter.next
+        for index in range(self._migrate_index, end):
+            if states[index] == _FULL:
+                if next_filter is not None:
+                    next_filter.add(hashes[index])
+                hash2 = None if hashes2 is None else hashes2[index]
+                while not self._place(hashes[index], keys[index],
+                                      values[index], hash2):
+                    # probe sequence in new table has no free slot
+                    self._rehash(self._capacity * 2)
+                states[index] = _TOMBSTONE
+                keys[index] = values[index] = None
+        self._migrate_index = end
+
+        if end == capacity:
+            self._old = None
+            if next_filter is not None:
+                self._filter.finish_resize()
+
+        if timed:
+            self._resize_seconds += time.perf_counter() - start
+
+    def _finish_migration(self) -> None:
+        """
+        Moves every remaining entry of the old table, if there is one.
+        :return: none
+        """
+        if self._old is not None:
+            self._migrate(self._old[4])
+
+    def _place(self, hash: int, key: str, value: object,
+               hash2: int = None) -> bool:
+        """
+        Stores an entry known not to be in the table in the first free
+        slot of its probe sequence. Does not change the size.
+        :param hash: integer hash of key
+        :param key: string representing key
+        :param value: value to be stored
+        :param hash2: second hash of key under double hashing
+        :return: false if the probe sequence has no free slot
+        """
+        if self._robin_hood:
+            self._place_robin_hood(hash, key, value)
             return True
 
-        if capacity == 1 or capacity % 2 == 0:
+        states = self._states
+        capacity = self._capacity
+        step_growth = self._step_growth
+
+        index = self._slot_index(hash)
+        step = _first_step(hash2, capacity, self._shift)
+        for _ in range(capacity):
+            state = states[index]
+            if state != _FULL:
+                break
+            index = (index + step) % capacity
+            step += step_growth
+
+        # quadratic probing on a prime table visits only half the slots
+        else:
             return False
 
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
+        if state == _TOMBSTONE:
+            self._tombstones -= 1
+
+        self._hashes[index] = hash
+        self._keys[index] = key
+        self._values[index] = value
+        states[index] = _FULL
+        if hash2 is not None:
+            self._hashes2[index] = hash2
 
         return True
 
+    def _place_robin_hood(self, hash: int, key: str, value: object) -> None:
+        """
+        Stores an entry known not to be in the table by linear probing,
+        taking the slot of the first entry that is closer to its own
+        first slot and carrying that entry on instead.
+        :param hash: integer hash of key
+        :param key: string representing key
+        :param value: value to be stored
+        :return: none
+        """
+        hashes, keys = self._hashes, self._keys
+        values, states = self._values, self._states
+        capacity, shift = self._capacity, self._shift
+        mask = capacity - 1
+
+        index = self._slot_index(hash)
+        distance = 0
+
+        # table is never full, and has no tombstones under Robin Hood
+        while states[index] == _FULL:
+            resident = hashes[index]
+            if shift is None:
+                home = resident % capacity
+            else:
+                home = (resident * MIX_MULTIPLIER) >> shift & mask
+
+            # swap with an entry closer to its first slot
+            resident_distance = (index - home) % capacity
+            if resident_distance < distance:
+                hashes[index], hash = hash, resident
+                keys[index], key = key, keys[index]
+                values[index], value = value, values[index]
+                distance = resident_distance
+
+            index = (index + 1) % capacity
+            distance += 1
+
+        hashes[index] = hash
+        keys[index] = key
+        values[index] = value
+        states[index] = _FULL
+
+    def _shift_back(self, index: int) -> None:
+        """
+        Empties the slot at index under Robin Hood probing. Following
+        entries are moved back one slot until an empty slot or an entry
+        in its first slot is reached, so no tombstone is needed.
+        :param index: integer index of slot to empty
+        :return: none
+        """
+        hashes, keys = self._hashes, self._keys
+        values, states = self._values, self._states
+        capacity, shift = self._capacity, self._shift
+        mask = capacity - 1
+
+        following = (index + 1) % capacity
+        while states[following] == _FULL:
+            hash = hashes[following]
+            if shift is None:
+                home = hash % capacity
+            else:
+                home = (hash * MIX_MULTIPLIER) >> shift & mask
+            if home == following:
+                break
+
+            hashes[index] = hash
+            keys[index] = keys[following]
+            values[index] = values[following]
+            index = following
+            following = (following + 1) % capacity
+
+        states[index] = _EMPTY
+        keys[index] = values[index] = None
+
     def get_size(self) -> int:
         """
         Return size of map
@@ -86,46 +503,313 @@ class HashMap:
 
     # ------------------------------------------------------------------ #
 
-    def put(self, key: str, value: object) -> None:
+    def put(self, key: str, value: object, ttl: float = None) -> None:
         """
         Adds key/value pair to map. If map already contains key,
-        updates value of key.
+        updates value of key, and its ttl.
         :param key: string representing key
         :param value: value to be added/updated
+        :param ttl: seconds until key expires, none to never expire
         :return: none
         """
-        # resize if load factor >= .5
-        if self.table_load() >= .5:
-            self.resize_table(self._capacity * 2)
+        if self._old is not None:
+            self._migrate()
 
-        # find initial index
-        hash = self._hash_function(key)
-        index_initial = hash % self._capacity
-        entry = self._buckets[index_initial]
+        if ttl is not None:
+            value = expiring(value, ttl)
+            self._expiring = True
+        if self._expiring:
+            self.sweep(self._sweep_step)
+
+        # grow if load factor >= max_load, unless reclaiming expired
+        # entries makes room
+        if self.table_load() >= self._max_load and not self._reclaim():
+            self._grow()
+
+        self._insert(key, value)
+
+    def _reclaim(self) -> bool:
+        """
+        Sweeps every slot before the table grows, if any key has been
+        put with a ttl. Growing moves every slot anyway.
+        :return: true if the load is below max_load afterwards
+        """
+        if not self._expiring or self._old is not None:
+            return False
+
+        self.sweep(self._capacity)
+        return self.table_load() < self._max_load
+
+    def sweep(self, count: int = None) -> int:
+        """
+        Removes the expired entries of the next count slots, carrying
+        on from where the last sweep stopped. Slots of a table being
+        migrated from are swept once they are moved.
+        :param count: number of slots to scan, defaults to sweep_step
+        :return: number of entries removed
+        """
+        if count is None:
+            count = self._sweep_step
+        count = min(count, self._capacity)
+
+        now = time.time()
+        found = []
+        keys, values = self._keys, self._values
+        hashes, states = self._hashes, self._states
+        capacity = self._capacity
+        start = self._sweep_index % capacity
+        for index in range(start, start + count):
+            index %= capacity
+            if states[index] == _FULL and expired(values[index], now):
+                found.append((keys[index], hashes[index]))
+        self._sweep_index = start + count
+
+        # remove after scanning, removing may move entries or resize
+        for key, hash in found:
+            self._remove(key, hash)
+        self._expired += len(found)
+
+        return len(found)
+
+    def _grow(self) -> None:
+        """
+        Grows the table by the growth multiplier, all at once or
+        incrementally.
+        :return: none
+        """
+        capacity = max(int(self._capacity * self._growth), self._capacity + 1)
+        if self._incremental_resize:
+            self._start_migration(capacity)
+        else:
+            self.resize_table(capacity)
+
+    def _shrink(self) -> bool:
+        """
+        Shrinks the table to the smallest capacity, doubling from the
+        starting capacity, that keeps the load at most max_load / growth,
+        the load right after a grow.
+        :return: true if the table was shrunk
+        """
+        capacity = fit_capacity(self._min_capacity, self._size,
+                                self._max_load / self._growth,
+                                self._capacity_policy)
+        if capacity >= self._capacity:
+            return False
+
+        if self._incremental_resize:
+            self._start_migration(capacity)
+        else:
+            self.resize_table(capacity)
+        return True
+
+    def put_many(self, pairs, ttl: float = None) -> None:
+        """
+        Adds every key/value pair from an iterable to map. The table is
+        resized at most once, before any pair is added.
+        :param pairs: iterable of (key, value) tuples
+        :param ttl: seconds until the keys expire, none to never expire
+        :return: none
+        """
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+        if ttl is not None:
+            pairs = [(key, expiring(value, ttl)) for key, value in pairs]
+            self._expiring = True
+
+        self._finish_migration()
+
+        # grow once to the capacity the whole load needs
+        capacity = fit_capacity(self._capacity, self._size + len(pairs),
+                                self._max_load, self._capacity_policy)
+        if capacity != self._capacity:
+            self.resize_table(capacity)
+
+        self._insert_many(pairs)
+
+    @classmethod
+    def from_pairs(cls, pairs, capacity: int = 11,
+                   function=hash_function_1, **options) -> "HashMap":
+        """
+        Creates a new map holding every key/value pair from an iterable.
+        Buckets are allocated once, at the final capacity.
+        :param pairs: iterable of (key, value) tuples
+        :param capacity: integer representing minimum capacity
+        :param function: hash function used by the new map
+        :param options: other HashMap constructor arguments
+        :return: new HashMap
+        """
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+
+        policy = options.get('capacity_policy', PRIME)
+        max_load = options.get('max_load', .5)
+        capacity = fit_capacity(capacity, len(pairs), max_load, policy)
+        map = cls(capacity, function, **options)
+        map._insert_many(pairs)
+
+        return map
+
+    def _insert_many(self, pairs) -> None:
+        """
+        Adds or updates key/value pairs without checking the table load.
+        Every key is hashed before any pair is added.
+        :param pairs: list or tuple of (key, value) tuples
+        :return: none
+        """
+        keys, hashes = hash_batch(self._hash_function,
+                                  [pair[0] for pair in pairs])
+        for key, hash, pair in zip(keys, hashes, pairs):
+            self._insert(key, pair[1], hash)
+
+    def _insert(self, key: str, value: object, hash: int = None) -> None:
+        """
+        Adds or updates key/value pair without checking the table load.
+        :param key: string representing key
+        :param value: value to be added/updated
+        :param hash: integer hash of key, computed if not given
+        :return: none
+        """
+        if hash is None:
+            hash = self._hash_function(key)
+        hash2 = self._second_hash(key)
+
+        # key may still be in the table being migrated from
+        if self._old is not None:
+            index = self._find(key, hash, True, hash2)
+            if index >= 0:
+                self._old[2][index] = value
+                return
+
+        # key in map
+        index = self._find(key, hash, hash2=hash2)
+        if index >= 0:
+            self._values[index] = value
+            return
+
+        self._size += 1
+        self._version += 1
+
+        # key not in map, store it in the first free slot the lookup
+        # passed if there was one
+        free = -1 - index
+        if free == self._capacity or self._robin_hood:
+            # grow until its probe sequence has a free slot, a rehash
+            # builds the filter before key is added to it
+            while not self._place(hash, key, value, hash2):
+                self._rehash(self._capacity * 2)
+            if self._filter is not None:
+                self._filter.add(hash)
+            return
 
-        index = None
-        next = 1
+        if self._states[free] == _TOMBSTONE:
+            self._tombstones -= 1
 
-        # use quadratic programing to find valid index
-        while entry is not None and entry.key != key\
-                and entry.is_tombstone is False:
-            index = (index_initial + next**2) % self._capacity
-            entry = self._buckets[index]
-            next += 1
+        self._hashes[free] = hash
+        self._keys[free] = key
+        self._values[free] = value
+        self._states[free] = _FULL
+        if hash2 is not None:
+            self._hashes2[free] = hash2
+        if self._filter is not None:
+            self._filter.add(hash)
 
-        # no probing needed
-        if index is None:
-            index = index_initial
+    def _find(self, key: str, hash: int, old: bool = False,
+              hash2: int = None) -> int:
+        """
+        Finds the slot holding key. Every operation and probing strategy
+        looks keys up through this method.
+        :param key: string representing key
+        :param hash: integer hash of key
+        :param old: if true, search the table being migrated from
+        :param hash2: second hash of key under double hashing, computed
+            if not given
+        :return: integer index of slot if key is in table, otherwise
+            -1 - the index of the first free slot passed (-1 - capacity
+            if the probe sequence has no free slot)
+        """
+        if old:
+            hashes, keys, _, states, capacity, shift, step_growth, _ = \
+                self._old
+        else:
+            hashes, keys, states = self._hashes, self._keys, self._states
+            capacity, shift = self._capacity, self._shift
+            step_growth = self._step_growth
 
-        # key not in map, make new entry
-        if entry is None or entry.is_tombstone:
-            self._buckets[index] = HashEntry(key, value)
-            self._size += 1
+        if hash2 is None:
+            hash2 = self._second_hash(key)
 
-        # key in map, update value
+        # find initial index of key
+        mask = capacity - 1
+        if shift is None:
+            index = hash % capacity
         else:
-            entry.value = value
+            index = (hash * MIX_MULTIPLIER) >> shift & mask
+        step = _first_step(hash2, capacity, shift)
+        robin_hood = self._robin_hood
+        free = capacity
+
+        # follow probe sequence to find key, passing over tombstones
+        for probes in range(1, capacity + 1):
+            state = states[index]
+            if state == _EMPTY:
+                if free == capacity:
+                    free = index
+                index = -1 - free
+                break
+
+            if state == _TOMBSTONE:
+                if free == capacity:
+                    free = index
+
+            # compare cached hash before key
+            elif hashes[index] == hash and keys[index] == key:
+                break
+
+            # under Robin Hood probing, key would have taken the slot of
+            # an entry closer to its first slot than key is to its own
+            elif robin_hood:
+                resident = hashes[index]
+                if shift is None:
+                    home = resident % capacity
+                else:
+                    home = (resident * MIX_MULTIPLIER) >> shift & mask
+                if (index - home) % capacity < probes - 1:
+                    index = -1 - free
+                    break
+
+            index = (index + step) % capacity
+            step += step_growth
+
+        # probe sequence ends without an empty slot
+        else:
+            index = -1 - free
+
+        if self._probe_counts is not None:
+            self._count_probes(probes)
+
+        return index
+
+    def _second_hash(self, key: str) -> int:
+        """
+        Returns the second hash of key under double hashing.
+        :param key: string representing key
+        :return: integer hash, none under other probing strategies
+        """
+        if self._second_function is None:
+            return None
+
+        return self._second_function(key)
 
+    def _count_probes(self, probes: int) -> None:
+        """
+        Adds one operation that probed probes slots to the histogram.
+        :param probes: integer number of slots probed
+        :return: none
+        """
+        counts = self._probe_counts
+        if probes >= len(counts):
+            counts.extend([0] * (probes + 1 - len(counts)))
+        counts[probes] += 1
 
     def table_load(self) -> float:
         """
@@ -139,44 +823,277 @@ class HashMap:
         Returns number of empty buckets in map
         :return: integer value of empty buckets
         """
-        empty = 0
+        self._finish_migration()
 
-        # add empty buckets to count
-        for index in range(self._capacity):
-            if self._buckets[index] is None:
-                empty += 1
-
-        return empty
+        # every slot is full, a tombstone or empty
+        return self._capacity - self._size - self._tombstones
 
     def resize_table(self, new_capacity: int) -> None:
         """
         Resizes map to new capacity or closest prime number if
-        not prime.
+        not prime (closest power of two under the POWER_OF_TWO
+        policy). Cached hashes are reused, so keys are not rehashed.
         :param new_capacity: integer representing new capacity
         :return: none
         """
         if new_capacity < self._size:
             return
 
-        if not self._is_prime(new_capacity):
-            new_capacity = self._next_prime(new_capacity)
+        self._finish_migration()
 
-        # store values of current map
-        values = self.get_keys_and_values()
+        new_capacity = round_capacity(new_capacity, self._capacity_policy)
 
-        # create new map with new capacity
-        self._capacity = new_capacity
-        self._buckets = DynamicArray()
-        self._size = 0
+        # grow further if the current pairs would overfill new capacity
+        new_capacity = fit_capacity(new_capacity, self._size, self._max_load,
+                                    self._capacity_policy)
 
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        self._rehash(new_capacity)
 
-        # add values to new map
-        length = values.length()
-        for index in range(length):
-            key, value = values[index]
-            self.put(key, value)
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves the entries of the current slot arrays into new arrays of
+        new capacity, doubling it until every probe sequence has a free
+        slot. Cached hashes are reused, so keys are not rehashed.
+        :param new_capacity: integer representing new capacity
+        :return: none
+        """
+        start = time.perf_counter()
+
+        # keep arrays of current map
+        hashes, keys = self._hashes, self._keys
+        values, states = self._values, self._states
+        hashes2 = self._hashes2
+        size = self._size
+        self._version += 1
+
+        placed = False
+        while not placed:
+            # create new arrays with new capacity
+            new_capacity = round_capacity(new_capacity, self._capacity_policy)
+            self._set_capacity(new_capacity)
+            self._allocate()
+            new_hashes, new_keys = self._hashes, self._keys
+            new_values, new_states = self._values, self._states
+            new_hashes2 = self._hashes2
+            shift, mask = self._shift, new_capacity - 1
+            step_growth = self._step_growth
+
+            # move entries to new arrays, keys are unique so only an
+            # empty slot has to be found
+            placed = True
+            for index in range(len(states)):
+                if states[index] != _FULL:
+                    continue
+
+                hash = hashes[index]
+                if self._robin_hood:
+                    self._place_robin_hood(hash, keys[index], values[index])
+                    continue
+
+                if shift is None:
+                    slot = hash % new_capacity
+                else:
+                    slot = (hash * MIX_MULTIPLIER) >> shift & mask
+                hash2 = None if hashes2 is None else hashes2[index]
+                step = _first_step(hash2, new_capacity, shift)
+                probes = 1
+                while new_states[slot]:
+                    slot = (slot + step) % new_capacity
+                    step += step_growth
+                    probes += 1
+
+                    # quadratic probing on a prime table visits only
+                    # half the slots
+                    if probes > new_capacity:
+                        break
+                else:
+                    new_hashes[slot] = hash
+                    new_keys[slot] = keys[index]
+                    new_values[slot] = values[index]
+                    new_states[slot] = _FULL
+                    if hash2 is not None:
+                        new_hashes2[slot] = hash2
+                    continue
+
+                placed = False
+                new_capacity *= 2
+                break
+
+        self._size = size
+
+        # a table being migrated from still holds keys of the filter
+        if self._old is None and self._filter is not None:
+            self._filter.build(self._capacity)
+        self._resizes += 1
+        self._resize_seconds += time.perf_counter() - start
+
+    def stats(self) -> dict:
+        """
+        Returns counters kept up to date by the map operations. While an
+        incremental resize is running, empty_buckets and tombstones
+        describe the new table.
+        :return: dictionary with size, capacity, table_load,
+            empty_buckets, tombstones, resizes, resize_seconds,
+            migrating and expired (entries reclaimed after their ttl),
+            with a membership filter also filter_bytes, filter_rejects
+            (misses answered by the filter), filter_false_positives
+            (misses it let through) and filter_fp_rate, and with
+            track_stats=True also max_probes, avg_probes and
+            probe_histogram, where index n is the number of operations
+            that probed n slots. table_bytes is the bytes taken by the
+            slot arrays and cached hashes, counted as 64-bit integers,
+            not counting keys and values
+        """
+        if self._old is None:
+            empty = self._capacity - self._size - self._tombstones
+        else:
+            empty = self._states.count(_EMPTY)
+
+        stats = {
+            'size': self._size,
+            'capacity': self._capacity,
+            'table_load': self.table_load(),
+            'empty_buckets': empty,
+            'tombstones': self._tombstones,
+            'resizes': self._resizes,
+            'resize_seconds': self._resize_seconds,
+            'migrating': self._old is not None,
+            'expired': self._expired,
+            'table_bytes': self._table_bytes(),
+        }
+
+        if self._filter is not None:
+            stats.update(self._filter.stats())
+
+        counts = self._probe_counts
+        if counts is not None:
+            operations = sum(counts)
+            probes = sum(probes * count for probes, count in enumerate(counts))
+
+            stats['max_probes'] = len(counts) - 1
+            stats['avg_probes'] = probes / operations if operations else 0
+            stats['probe_histogram'] = list(counts)
+
+        return stats
+
+    def _table_bytes(self) -> int:
+        """
+        Returns the bytes taken by the slot arrays, of both tables while
+        a migration runs, and by the cached hashes of full slots and
+        tombstones, without scanning the table.
+        :return: integer number of bytes
+        """
+        tables = [(self._hashes, self._keys, self._values, self._states,
+                   self._hashes2)]
+        if self._old is not None:
+            old = self._old
+            tables.append((old[0], old[1], old[2], old[3], old[7]))
+
+        total = 0
+        for arrays in tables:
+            total += sum(sys.getsizeof(array_) for array_ in arrays
+                         if array_ is not None)
+
+        hashes = self._size + self._tombstones
+        if self._hashes2 is not None:
+            hashes *= 2
+        return total + hashes * HASH_BYTES
+
+    def save(self, path: str) -> None:
+        """
+        Writes map to a snapshot file that load can rebuild it from. The
+        file keeps the capacity, settings, slot states and cached hashes,
+        so every key stays in its slot.
+        :param path: file path to write
+        :return: none
+        """
+        self._finish_migration()
+
+        # saved hashes must not depend on the process for these keys
+        keys, states = self._keys, self._states
+
+        def full_keys():
+            return (keys[index] for index in range(self._capacity)
+                    if states[index] == _FULL)
+
+        settings = {
+            'function': function_id(self._hash_function, full_keys()),
+            'options': {
+                'tombstone_ratio': self._tombstone_ratio,
+                'capacity_policy': self._capacity_policy,
+                'incremental_resize': self._incremental_resize,
+                'migration_step': self._migration_step,
+                'track_stats': self._probe_counts is not None,
+                'max_load': self._max_load,
+                'growth': self._growth,
+                'min_load': self._min_load,
+                'probing': self._probing,
+                'second_function': function_id(self._second_function,
+                                               full_keys()),
+                'sweep_step': self._sweep_step,
+                'filter_bits': self._filter_bits,
+            },
+            'min_capacity': self._min_capacity,
+            'tombstones': self._tombstones,
+            'expiring': self._expiring,
+        }
+
+        # one entry per slot, empty slots hold nothing
+        hashes, hashes2, values = self._hashes, self._hashes2, self._values
+        entries = ((hashes[index],
+                    None if hashes2 is None else hashes2[index],
+                    None if states[index] == _EMPTY else keys[index],
+                    values[index])
+                   for index in range(self._capacity))
+
+        write_snapshot(path, 'open_addressing', self._capacity, self._size,
+                       settings, bytes(states), entries)
+
+    @classmethod
+    def load(cls, path: str, lazy: bool = False) -> "HashMap":
+        """
+        Rebuilds a map written by save. Slot states and cached hashes
+        are copied back as they are, so no key is hashed or placed
+        again.
+        :param path: file path to read
+        :param lazy: if true, keep the file memory-mapped and decode each
+            key and value the first time it is read
+        :return: new HashMap
+        """
+        snapshot = Snapshot(path, 'open_addressing')
+        settings = snapshot.settings
+        map = cls(snapshot.capacity, snapshot.function, **settings['options'])
+
+        entries = snapshot.entries()
+        map._states = bytearray(snapshot.table())
+        map._hashes = [entry[0] for entry in entries]
+        if map._hashes2 is not None:
+            map._hashes2 = [entry[1] for entry in entries]
+        map._keys = LazyList(lambda index: snapshot.key(entries[index]),
+                             snapshot.capacity)
+        map._values = LazyList(lambda index: snapshot.value(entries[index]),
+                               snapshot.capacity)
+        if not lazy:
+            map._keys, map._values = list(map._keys), list(map._values)
+            snapshot.close()
+
+        map._size = snapshot.size
+        map._tombstones = settings['tombstones']
+        map._min_capacity = settings['min_capacity']
+        map._expiring = settings.get('expiring', False)
+        if map._filter is not None:
+            map._filter.build(map._capacity)
+
+        return map
+
+    def freeze(self) -> FrozenHashMap:
+        """
+        Returns a read-only copy of the current pairs, indexed by a
+        minimal perfect hash so lookups probe no slots. Entries put
+        with a ttl are copied without it.
+        :return: new FrozenHashMap
+        """
+        return FrozenHashMap.from_map(self)
 
     def get(self, key: str) -> object:
         """
@@ -184,25 +1101,61 @@ class HashMap:
         :param key: string representing key
         :return: value if key found, none if not found
         """
-        # find initial index of key
+        if self._old is not None:
+            self._migrate()
+
+        # probe for key, unless the filter rules it out
         hash = self._hash_function(key)
-        index_initial = hash % self._capacity
-        entry = self._buckets[index_initial]
+        membership = self._filter
+        if membership is not None and membership.rules_out(hash):
+            return None
+        index = self._find(key, hash)
 
-        next = 1
+        # key in map
+        if index >= 0:
+            value = self._values[index]
 
-        # use quadratic probing to find key if necessary
-        while entry is not None and entry.key != key:
-            index = (index_initial + next ** 2) % self._capacity
-            entry = self._buckets[index]
-            next += 1
+        # key may still be in the table being migrated from
+        elif self._old is not None:
+            index = self._find(key, hash, True)
+            if index < 0:
+                return self._missed(None)
+            value = self._old[2][index]
 
         # key not in map
-        if entry is None or entry.is_tombstone:
-            return None
+        else:
+            return self._missed(None)
 
-        # key in map
-        return entry.value
+        # key put with a ttl, unless it has expired
+        if type(value) is Expiring:
+            return None if self._expire(key, hash, value) else value.value
+        return value
+
+    def _missed(self, result: object) -> object:
+        """
+        Counts a lookup of a missing key the membership filter let
+        through, if there is a filter.
+        :param result: value the lookup returns
+        :return: result
+        """
+        if self._filter is not None:
+            self._filter.missed()
+        return result
+
+    def _expire(self, key: str, hash: int, value: Expiring) -> bool:
+        """
+        Removes a key put with a ttl if it has expired.
+        :param key: string representing key
+        :param hash: integer hash of key
+        :param value: Expiring stored for key
+        :return: true if key expired and was removed
+        """
+        if not expired(value):
+            return False
+
+        self._remove(key, hash)
+        self._expired += 1
+        return True
 
     def contains_key(self, key: str) -> bool:
         """
@@ -210,25 +1163,31 @@ class HashMap:
         :param key: string representing key to be found
         :return: true if map contains key, false if not
         """
-        # find initial index of key
-        hash = self._hash_function(key)
-        index_initial = hash % self._capacity
-        entry = self._buckets[index_initial]
+        if self._old is not None:
+            self._migrate()
 
-        next = 1
+        # probe for key, unless the filter rules it out
+        hash = self._hash_function(key)
+        membership = self._filter
+        if membership is not None and membership.rules_out(hash):
+            return False
+        index = self._find(key, hash)
+        if index >= 0:
+            value = self._values[index]
 
-        # use quadratic probing if necessary
-        while entry is not None and entry.key != key:
-            index = (index_initial + next ** 2) % self._capacity
-            entry = self._buckets[index]
-            next += 1
+        # key may still be in the table being migrated from
+        elif self._old is not None:
+            index = self._find(key, hash, True)
+            if index < 0:
+                return self._missed(False)
+            value = self._old[2][index]
 
-        # key not in map
-        if entry is None or entry.is_tombstone:
-            return False
+        else:
+            return self._missed(False)
 
-        # key in map
-        return True
+        # contains key, unless it has expired
+        return type(value) is not Expiring or \
+            not self._expire(key, hash, value)
 
     def remove(self, key: str) -> None:
         """
@@ -236,38 +1195,162 @@ class HashMap:
         :param key: key corresponding to node to be removed
         :return: none
         """
-        # find initial index
-        hash = self._hash_function(key)
-        index_initial = hash % self._capacity
-        entry = self._buckets[index_initial]
+        if self._old is not None:
+            self._migrate()
 
-        next = 1
+        self._remove(key, self._hash_function(key))
 
-        # use quadratic probing as necessary
-        while entry is not None and entry.key != key:
-            index = (index_initial + next ** 2) % self._capacity
-            entry = self._buckets[index]
-            next += 1
+    def _remove(self, key: str, hash: int) -> None:
+        """
+        Removes node corresponding to key from map.
+        :param key: key corresponding to node to be removed
+        :param hash: integer hash of key
+        :return: none
+        """
+        hash2 = self._second_hash(key)
+        index = self._find(key, hash, hash2=hash2)
+
+        # key may still be in the table being migrated from
+        if index < 0 and self._old is not None:
+            index = self._find(key, hash, True, hash2)
+            if index >= 0:
+                _, keys, values, states = self._old[:4]
+                states[index] = _TOMBSTONE
+                keys[index] = values[index] = None
+                self._size -= 1
+                self._version += 1
+                if self._filter is not None:
+                    self._filter.discard(hash)
+            return
 
         # key not in map
-        if entry is None or entry.is_tombstone:
+        if index < 0:
             return
 
         # key in map
-        entry.is_tombstone = True
         self._size -= 1
+        self._version += 1
+        if self._filter is not None:
+            self._filter.discard(hash)
+        if self._robin_hood:
+            self._shift_back(index)
+        else:
+            # drop the key and value so they are not kept alive
+            self._states[index] = _TOMBSTONE
+            self._keys[index] = self._values[index] = None
+            self._tombstones += 1
+
+        # shrink once load factor falls below min_load, which also
+        # clears tombstones
+        if self._size < self._capacity * self._min_load and self._shrink():
+            return
 
-    def clear(self) -> None:
+        # rehash at same capacity once tombstones fill too much of table
+        if self._tombstones > self._capacity * self._tombstone_ratio:
+            if self._incremental_resize:
+                self._start_migration(self._capacity)
+            else:
+                self.resize_table(self._capacity)
+
+    def get_many(self, keys, default: object = None,
+                 as_array: bool = False):
         """
-        Empties buckets while maintaining capacity.
+        Returns the values corresponding to a batch of keys. Every key
+        is hashed before any slot is probed.
+        :param keys: iterable of keys, or a NumPy array
+        :param default: value returned for keys not in map
+        :param as_array: if true, return a NumPy array instead of a list
+        :return: list or NumPy array of values, in the order of keys
+        """
+        keys, hashes = hash_batch(self._hash_function, keys)
+        values = [default if value is _MISSING else value
+                  for value in self._lookup_many(keys, hashes)]
+
+        return batch_array(values) if as_array else values
+
+    def contains_many(self, keys, as_array: bool = False):
+        """
+        Checks if each key of a batch is found in map. Every key is
+        hashed before any slot is probed.
+        :param keys: iterable of keys, or a NumPy array
+        :param as_array: if true, return a NumPy array instead of a list
+        :return: list or NumPy array of booleans, in the order of keys
+        """
+        keys, hashes = hash_batch(self._hash_function, keys)
+        found = [value is not _MISSING
+                 for value in self._lookup_many(keys, hashes)]
+
+        return batch_array(found) if as_array else found
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key of a batch from map. Every key is hashed
+        before any slot is probed.
+        :param keys: iterable of keys, or a NumPy array
         :return: none
         """
-        self._buckets = DynamicArray()
+        keys, hashes = hash_batch(self._hash_function, keys)
+        if self._old is not None:
+            self._migrate(self._migration_step * len(keys))
 
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        for key, hash in zip(keys, hashes):
+            self._remove(key, hash)
 
-        self._size = 0
+    def _lookup_many(self, keys: list, hashes: list) -> list:
+        """
+        Finds the values of a batch of already hashed keys.
+        :param keys: list of keys
+        :param hashes: list of integer hashes of keys
+        :return: list of values, _MISSING for keys not in map
+        """
+        # move as many slots as the same number of single lookups would
+        if self._old is not None:
+            self._migrate(self._migration_step * len(keys))
+
+        find, values, old = self._find, self._values, self._old
+        membership = self._filter
+        now = time.time()
+        results = []
+        for key, hash in zip(keys, hashes):
+            # keys the filter rules out are not probed for
+            if membership is not None and membership.rules_out(hash):
+                results.append(_MISSING)
+                continue
+
+            hash2 = self._second_hash(key)
+            index = find(key, hash, hash2=hash2)
+            if index >= 0:
+                value = values[index]
+
+            # key may still be in the table being migrated from
+            elif old is not None:
+                index = find(key, hash, True, hash2)
+                value = old[2][index] if index >= 0 else _MISSING
+
+            else:
+                value = _MISSING
+
+            if value is _MISSING and membership is not None:
+                membership.missed()
+
+            # keys put with a ttl count as missing once expired
+            if type(value) is Expiring:
+                value = _MISSING if value.deadline <= now else value.value
+            results.append(value)
+
+        return results
+
+    def clear(self) -> None:
+        """
+        Empties buckets while maintaining capacity.
+        :return: none
+        """
+        self._old = None
+        self._allocate()
+        self._version += 1
+        self._expiring = False
+        if self._filter is not None:
+            self._filter.build(self._capacity, ())
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -276,45 +1359,101 @@ class HashMap:
         """
         key_arr = DynamicArray()
 
-        # iterate through each list in map and add value to array
-        for index in range(self._capacity):
-            entry = self._buckets[index]
-            if entry is not None and not entry.is_tombstone:
-                key_arr.append((entry.key, entry.value))
+        # add each pair of map to array
+        for pair in self.items():
+            key_arr.append(pair)
 
         return key_arr
 
-    def __iter__(self):
+    def _full_slots(self):
         """
-        Create iterator for loop
-        :return: self
+        Yields the index of every full slot, skipping expired entries.
+        Raises RuntimeError if keys are added or removed, or the table
+        is resized, while the indices are being yielded.
+        :return: generator of integer indices
         """
-        self._index = 0
-
-        return self
+        self._finish_migration()
+        version = self._version
+        states, values = self._states, self._values
+        now = time.time()
 
-    def __next__(self):
+        for index in range(self._capacity):
+            if states[index] == _FULL:
+                value = values[index]
+                if type(value) is Expiring and value.deadline <= now:
+                    continue
+                yield index
+                if self._version != version:
+                    raise RuntimeError("HashMap changed during iteration")
+
+    def _pairs(self, start: int, stop: int) -> list:
+        """
+        Returns the key/value pairs in slots start to stop - 1, skipping
+        expired entries, so callers can walk the table a piece at a
+        time. No table may be migrating.
+        :param start: index of first slot
+        :param stop: index after last slot
+        :return: list of (key, value) tuples
         """
-        Iterate through array and return valid entries
-        :return: valid entries
+        keys, values, states = self._keys, self._values, self._states
+        now = time.time()
+        pairs = []
+        for index in range(start, min(stop, self._capacity)):
+            if states[index] != _FULL:
+                continue
+            value = values[index]
+            if type(value) is Expiring:
+                if value.deadline <= now:
+                    continue
+                value = value.value
+            pairs.append((keys[index], value))
+
+        return pairs
+
+    def keys(self):
         """
-        # check if index is within range
-        try:
-            entry = self._buckets[self._index]
-        except DynamicArrayException:
-            raise StopIteration
+        Returns a lazy view of the keys in map. Each call gets its own
+        generator, and no pairs are copied.
+        :return: generator of keys
+        """
+        # arrays are read once any migration is done
+        self._finish_migration()
+        keys = self._keys
+        for index in self._full_slots():
+            yield keys[index]
 
-        # find next valid index
-        while entry is None or entry.is_tombstone is True:
-            self._index += 1
-            if self._index >= self._capacity:
-                raise StopIteration
-            entry = self._buckets[self._index]
+    def values(self):
+        """
+        Returns a lazy view of the values in map. Each call gets its own
+        generator, and no pairs are copied.
+        :return: generator of values
+        """
+        self._finish_migration()
+        values = self._values
+        for index in self._full_slots():
+            value = values[index]
+            yield value.value if type(value) is Expiring else value
 
-        self._index += 1
+    def items(self):
+        """
+        Returns a lazy view of the key/value pairs in map. Each call gets
+        its own generator, and no pairs are copied.
+        :return: generator of (key, value) tuples
+        """
+        self._finish_migration()
+        keys, values = self._keys, self._values
+        for index in self._full_slots():
+            value = values[index]
+            yield keys[index], value.value if type(value) is Expiring else value
 
-        # return valid entry
-        return entry
+    def __iter__(self):
+        """
+        Iterate through map. Each call gets its own generator, so
+        iterations can be nested.
+        :return: generator of HashEntry objects for valid entries
+        """
+        for index in self._full_slots():
+            yield self._entry(index)
 
 
 
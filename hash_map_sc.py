@@ -7,34 +7,233 @@
 # for collision resolution
 
 
-from a6_include import (DynamicArray, LinkedList,
+import sys
+import time
+
+from a6_include import (DynamicArray, LinkedList, SLNode,
                         hash_function_1, hash_function_2)
+from hash_expiry import Expiring, expired, expiring
+from hash_filter import MapFilter
+from hash_capacity import (MIX_MULTIPLIER, POWER_OF_TWO, PRIME,
+                           check_load_factors, check_policy, fit_capacity, is_prime, mix_shift,
+                           next_power_of_two, next_prime, round_capacity)
+from hash_functions import (HASH_BYTES, batch_array, get_hash_function,
+                            hash_batch)
+from hash_map_frozen import FrozenHashMap
+from hash_snapshot import (BUCKET, LazyList, Snapshot, function_id,
+                           write_snapshot)
+
+
+class HashNode(SLNode):
+    def __init__(self, key: str, value: object, hash: int,
+                 next: "HashNode" = None) -> None:
+        """
+        Initialize linked list node that also stores the hash of its key
+        """
+        super().__init__(key, value)
+        self.next = next
+        self.hash = hash
+
+
+class HashLinkedList(LinkedList):
+    """
+    Singly linked list of HashNodes, used as a bucket of the chaining
+    HashMap. Nodes can be looked up by cached hash and moved between
+    lists without being copied.
+    """
+
+    def insert_node(self, node: HashNode) -> int:
+        """
+        Adds an existing node to the front of the list.
+        :param node: HashNode to be added
+        :return: new length of list
+        """
+        node.next = self._head
+        self._head = node
+        self._size += 1
+        return self._size
+
+    def find(self, key: str, hash: int) -> HashNode:
+        """
+        Returns the node holding key, comparing cached hashes first.
+        :param key: string representing key
+        :param hash: integer hash of key
+        :return: HashNode if key found, none if not found
+        """
+        node = self._head
+        while node is not None:
+            if node.hash == hash and node.key == key:
+                return node
+            node = node.next
+
+        return None
+
+    def relink(self, chains: list, capacity: int, shift: int = None,
+               lengths: list = None) -> int:
+        """
+        Moves every node into the list its cached hash indexes to,
+        leaving this list empty.
+        :param chains: list of HashLinkedLists (or none for lists not
+            created yet) to move nodes into
+        :param capacity: integer number of lists in chains
+        :param shift: mix shift when capacity is a power of two,
+            none when it is prime
+        :param lengths: optional chain length histogram of chains,
+            updated as nodes are moved
+        :return: number of lists in chains that were empty before
+        """
+        mask = capacity - 1
+        filled = 0
+        node = self._head
+        while node is not None:
+            next = node.next
+            if shift is None:
+                index = node.hash % capacity
+            else:
+                index = (node.hash * MIX_MULTIPLIER) >> shift & mask
+
+            # buckets of a table being migrated into are created lazily
+            chain = chains[index]
+            if chain is None:
+                chain = chains[index] = HashLinkedList()
+
+            node.next = chain._head
+            chain._head = node
+            chain._size += 1
+            if chain._size == 1:
+                filled += 1
+            if lengths is not None:
+                _count_chain(lengths, chain._size - 1, chain._size)
+            node = next
+
+        self._head = None
+        self._size = 0
+
+        return filled
+
+
+def _count_chain(lengths: list, old: int, new: int) -> None:
+    """
+    Moves one chain from length old to length new in a chain length
+    histogram.
+    :param lengths: list where index n is the number of chains of length n
+    :param old: previous length of chain
+    :param new: new length of chain
+    :return: none
+    """
+    lengths[old] -= 1
+    if new == len(lengths):
+        lengths.append(0)
+    lengths[new] += 1
 
 
 class HashMap:
+    # class of the nodes put adds, subclasses may store more per node
+    _node_class = HashNode
+
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 capacity_policy: str = PRIME,
+                 incremental_resize: bool = False,
+                 migration_step: int = 4,
+                 track_stats: bool = False,
+                 max_load: float = 1.0,
+                 growth: float = 2,
+                 min_load: float = 0,
+                 sweep_step: int = 4,
+                 filter_bits: int = 0) -> None:
         """
         Initialize new HashMap that uses
         separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        :param function: hash function, or the name it is registered
+            under in hash_functions
+        :param capacity_policy: PRIME to index buckets by hash % capacity,
+            POWER_OF_TWO to index by mixed hash bits and a mask
+        :param incremental_resize: if true, put grows the table by moving
+            migration_step buckets on each later put, get, contains_key
+            and remove instead of rehashing every bucket at once
+        :param migration_step: number of old buckets moved per operation
+        :param track_stats: if true, keep a chain length histogram and
+            time incremental migration steps for stats()
+        :param max_load: load factor at which put grows the table
+        :param growth: multiplier applied to capacity when growing
+        :param min_load: load factor below which remove shrinks the
+            table, 0 to never shrink. Must be below
+            max_load / (2 * growth) so resizes cannot thrash
+        :param sweep_step: number of buckets each put scans for expired
+            entries once any key has been put with a ttl
+        :param filter_bits: bits per key of a membership filter that get,
+            contains_key and the batch lookups check before searching a
+            bucket, 0 for no filter. It is sized for capacity * max_load
+            keys and rebuilt whenever the table is resized
         """
+        check_policy(capacity_policy)
+        check_load_factors(max_load, growth, min_load)
+        if filter_bits < 0:
+            raise ValueError(f"filter_bits must be at least 0, not "
+                             f"{filter_bits}")
+        self._capacity_policy = capacity_policy
+        self._max_load = max_load
+        self._growth = growth
+        self._min_load = min_load
         self._buckets = DynamicArray()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number, or a power of two
+        if capacity_policy == POWER_OF_TWO:
+            self._set_capacity(next_power_of_two(capacity))
+        else:
+            self._set_capacity(self._next_prime(capacity))
         for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+            self._buckets.append(HashLinkedList())
+
+        # shrinking never goes below the starting capacity
+        self._min_capacity = self._capacity
 
+        # hash function may be given by its registered name
+        if isinstance(function, str):
+            function = get_hash_function(function)
         self._hash_function = function
         self._size = 0
 
+        # counts changes to the set of keys or the table layout, so
+        # iterators can tell the map changed under them
+        self._version = 0
+
+        # number of non-empty buckets, so empty_buckets does not scan
+        self._used = 0
+        self._resizes = 0
+        self._resize_seconds = 0.0
+
+        # index n is the number of buckets holding n nodes, none unless
+        # stats are tracked
+        self._chain_lengths = [self._capacity] if track_stats else None
+
+        # (buckets, capacity, shift) of a table being migrated from
+        self._old = None
+        self._incremental_resize = incremental_resize
+        self._migration_step = migration_step
+
+        # expired entries are reclaimed when found, and by sweeps that
+        # only run once a key has been put with a ttl
+        self._expiring = False
+        self._sweep_step = sweep_step
+        self._sweep_index = 0
+        self._expired = 0
+
+        # membership filter of every key, none without filter_bits
+        self._filter_bits = filter_bits
+        self._filter = None
+        if filter_bits:
+            self._filter = MapFilter(filter_bits, max_load, self._key_hashes)
+            self._filter.build(self._capacity, ())
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
+        self._finish_migration()
+
         out = ''
         for i in range(self._buckets.length()):
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
@@ -42,36 +241,177 @@ class HashMap:
 
     def _next_prime(self, capacity: int) -> int:
         """
-        Increment from given number and the find the closest prime number
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Find the closest prime number from given number
+        using the precomputed prime table
         """
-        if capacity % 2 == 0:
-            capacity += 1
-
-        while not self._is_prime(capacity):
-            capacity += 2
-
-        return capacity
+        return next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
         """
         Determine if given integer is a prime number and return boolean
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
-        if capacity == 2 or capacity == 3:
-            return True
+        return is_prime(capacity)
 
-        if capacity == 1 or capacity % 2 == 0:
-            return False
+    def _set_capacity(self, capacity: int) -> None:
+        """
+        Sets capacity and the shift used to index power of two tables.
+        :param capacity: integer representing capacity
+        :return: none
+        """
+        self._capacity = capacity
+        if self._capacity_policy == POWER_OF_TWO:
+            self._shift = mix_shift(capacity)
+        else:
+            self._shift = None
 
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
+    def _bucket_index(self, hash: int) -> int:
+        """
+        Returns the bucket index for a hash.
+        :param hash: integer hash of key
+        :return: integer index
+        """
+        if self._shift is None:
+            return hash % self._capacity
 
-        return True
+        # mix hash bits so the mask does not only keep the low bits
+        return (hash * MIX_MULTIPLIER) >> self._shift & (self._capacity - 1)
+
+    def _key_hashes(self):
+        """
+        Yields the hash of every node, which the membership filter is
+        built from. Expired nodes stay in, lookups must still find them
+        to expire them.
+        :return: generator of integer hashes
+        """
+        for index in range(self._capacity):
+            for node in self._buckets[index]:
+                yield node.hash
+
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Switches to an empty table of new capacity, keeping the current
+        buckets as the old table. Later operations move the old buckets
+        across a few at a time.
+        :param new_capacity: integer representing new capacity
+        :return: none
+        """
+        self._finish_migration()
+
+        new_capacity = round_capacity(new_capacity, self._capacity_policy)
+        new_capacity = fit_capacity(new_capacity, self._size, self._max_load,
+                                    self._capacity_policy)
+
+        # new buckets are created as nodes reach them, or by _migrate
+        start = time.perf_counter()
+        self._version += 1
+        self._old = (self._buckets, self._capacity, self._shift)
+        self._set_capacity(new_capacity)
+        self._buckets = DynamicArray([None] * new_capacity)
+        self._migrate_index = 0
+        self._fill_index = 0
+        self._used = 0
+        if self._filter is not None:
+            self._filter.start_resize(self._capacity)
+        if self._chain_lengths is not None:
+            self._chain_lengths = [new_capacity]
+
+        self._resizes += 1
+        self._resize_seconds += time.perf_counter() - start
+
+    def _migrate(self, count: int = None) -> None:
+        """
+        Moves the next count buckets of the old table into the new one.
+        :param count: number of old buckets to move, defaults to
+            migration_step
+        :return: none
+        """
+        old_buckets, old_capacity, _ = self._old
+        if count is None:
+            count = self._migration_step
+
+        # migration steps are only timed when stats are tracked
+        lengths = self._chain_lengths
+        if lengths is not None:
+            start = time.perf_counter()
+
+        end = min(self._migrate_index + count, old_capacity)
+        next_filter = None if self._filter is None else self._filter.next
+        for index in range(self._migrate_index, end):
+            if next_filter is not None:
+                for node in old_buckets[index]:
+                    next_filter.add(node.hash)
+            self._used += old_buckets[index].relink(
+                self._buckets, self._capacity, self._shift, lengths)
+
+            # release old buckets as they empty, not all at the end
+            old_buckets[index] = None
+        self._migrate_index = end
+
+        # create empty new buckets at the same pace, at most two per old
+        # bucket moved, so a resize to many times the capacity does not
+        # create them all in one step. The migration lasts until every
+        # bucket exists
+        fill_end = max(-(-end * self._capacity // old_capacity),
+                       self._fill_index)
+        fill_end = min(fill_end, self._fill_index + 2 * count, self._capacity)
+        for index in range(self._fill_index, fill_end):
+            if self._buckets[index] is None:
+                self._buckets[index] = HashLinkedList()
+        self._fill_index = fill_end
+
+        if end == old_capacity and fill_end == self._capacity:
+            self._old = None
+            if next_filter is not None:
+                self._filter.finish_resize()
+
+        if lengths is not None:
+            self._resize_seconds += time.perf_counter() - start
+
+    def _finish_migration(self) -> None:
+        """
+        Moves every remaining bucket of the old table, if there is one.
+        :return: none
+        """
+        if self._old is not None:
+            self._migrate(max(self._old[1], self._capacity))
+
+    def _old_bucket(self, hash: int) -> HashLinkedList:
+        """
+        Returns the bucket of the old table that hash indexes to.
+        :param hash: integer hash of key
+        :return: HashLinkedList, none if that bucket was already moved
+        """
+        buckets, capacity, shift = self._old
+        if shift is None:
+            index = hash % capacity
+        else:
+            index = (hash * MIX_MULTIPLIER) >> shift & (capacity - 1)
+
+        if index < self._migrate_index:
+            return None
+
+        return buckets[index]
+
+    def _find_migrating(self, key: str, hash: int) -> HashNode:
+        """
+        Returns the node holding key while a migration is in progress,
+        checking the new table before the old one.
+        :param key: string representing key
+        :param hash: integer hash of key
+        :return: HashNode if key found, none if not found
+        """
+        l_list = self._buckets[self._bucket_index(hash)]
+        if l_list is not None:
+            node = l_list.find(key, hash)
+            if node is not None:
+                return node
+
+        l_list = self._old_bucket(hash)
+        if l_list is None:
+            return None
+
+        return l_list.find(key, hash)
 
     def get_size(self) -> int:
         """
@@ -89,48 +429,267 @@ class HashMap:
 
     # ------------------------------------------------------------------ #
 
-    def put(self, key: str, value: object) -> None:
+    def put(self, key: str, value: object, ttl: float = None) -> None:
         """
         Adds key/value pair to map. If map already contains key,
-        updates value of key.
+        updates value of key, and its ttl.
         :param key: string representing key
         :param value: value to be added/updated
+        :param ttl: seconds until key expires, none to never expire
+        :return: none
+        """
+        if self._old is not None:
+            self._migrate()
+
+        if ttl is not None:
+            value = expiring(value, ttl)
+            self._expiring = True
+        if self._expiring:
+            self.sweep(self._sweep_step)
+
+        # grow if table load >= max_load, unless reclaiming expired
+        # entries makes room
+        if self.table_load() >= self._max_load and not self._reclaim():
+            self._grow()
+
+        self._insert(key, value)
+
+    def _reclaim(self) -> bool:
+        """
+        Sweeps every bucket before the table grows, if any key has been
+        put with a ttl. Growing scans every bucket anyway.
+        :return: true if the load is below max_load afterwards
+        """
+        if not self._expiring or self._old is not None:
+            return False
+
+        self.sweep(self._capacity)
+        return self.table_load() < self._max_load
+
+    def sweep(self, count: int = None) -> int:
+        """
+        Removes the expired entries of the next count buckets, carrying
+        on from where the last sweep stopped.
+        :param count: number of buckets to scan, defaults to sweep_step
+        :return: number of entries removed
+        """
+        if count is None:
+            count = self._sweep_step
+        count = min(count, self._capacity)
+
+        now = time.time()
+        found = []
+        buckets, capacity = self._buckets, self._capacity
+        start = self._sweep_index % capacity
+        for index in range(start, start + count):
+            chain = buckets[index % capacity]
+            if chain is None:
+                continue
+            for node in chain:
+                if expired(node.value, now):
+                    found.append(node)
+        self._sweep_index = start + count
+
+        # remove after scanning, removing may resize the table
+        for node in found:
+            self._remove(node.key, node.hash)
+        self._expired += len(found)
+
+        return len(found)
+
+    def _grow(self) -> None:
+        """
+        Grows the table by the growth multiplier, all at once or
+        incrementally.
+        :return: none
+        """
+        capacity = max(int(self._capacity * self._growth), self._capacity + 1)
+        if self._incremental_resize:
+            self._start_migration(capacity)
+        else:
+            self.resize_table(capacity)
+
+    def _shrink(self) -> None:
+        """
+        Shrinks the table to the smallest capacity, doubling from the
+        starting capacity, that keeps the load at most max_load / growth,
+        the load right after a grow.
         :return: none
         """
-        # double size if table load >= 1
-        if self.table_load() >= 1:
-            self.resize_table(self._capacity*2)
+        capacity = fit_capacity(self._min_capacity, self._size,
+                                self._max_load / self._growth,
+                                self._capacity_policy)
+        if capacity >= self._capacity:
+            return
 
+        if self._incremental_resize:
+            self._start_migration(capacity)
+        else:
+            self.resize_table(capacity)
+
+    def put_many(self, pairs, ttl: float = None) -> None:
+        """
+        Adds every key/value pair from an iterable to map. The table is
+        resized at most once, before any pair is added.
+        :param pairs: iterable of (key, value) tuples
+        :param ttl: seconds until the keys expire, none to never expire
+        :return: none
+        """
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+        if ttl is not None:
+            pairs = [(key, expiring(value, ttl)) for key, value in pairs]
+            self._expiring = True
+
+        self._finish_migration()
+
+        # grow once to the capacity the whole load needs
+        capacity = fit_capacity(self._capacity, self._size + len(pairs),
+                                self._max_load, self._capacity_policy)
+        if capacity != self._capacity:
+            self.resize_table(capacity)
+
+        self._insert_many(pairs)
+
+    @classmethod
+    def from_pairs(cls, pairs, capacity: int = 11,
+                   function: callable = hash_function_1,
+                   **options) -> "HashMap":
+        """
+        Creates a new map holding every key/value pair from an iterable.
+        Buckets are allocated once, at the final capacity.
+        :param pairs: iterable of (key, value) tuples
+        :param capacity: integer representing minimum capacity
+        :param function: hash function used by the new map
+        :param options: other HashMap constructor arguments
+        :return: new HashMap
+        """
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+
+        policy = options.get('capacity_policy', PRIME)
+        max_load = options.get('max_load', 1.0)
+        capacity = fit_capacity(capacity, len(pairs), max_load, policy)
+        map = cls(capacity, function, **options)
+        map._insert_many(pairs)
+
+        return map
+
+    def _insert_many(self, pairs) -> None:
+        """
+        Adds or updates key/value pairs without checking the table load.
+        Every key is hashed before any pair is added.
+        :param pairs: list or tuple of (key, value) tuples
+        :return: none
+        """
+        keys, hashes = hash_batch(self._hash_function,
+                                  [pair[0] for pair in pairs])
+        for key, hash, pair in zip(keys, hashes, pairs):
+            self._insert(key, pair[1], hash)
+
+    def _insert(self, key: str, value: object,
+                hash: int = None) -> HashNode:
+        """
+        Adds or updates key/value pair without checking the table load.
+        :param key: string representing key
+        :param value: value to be added/updated
+        :param hash: integer hash of key, computed if not given
+        :return: HashNode holding key
+        """
         # find location of key
-        hash = self._hash_function(key)
-        index = hash % self._capacity
+        if hash is None:
+            hash = self._hash_function(key)
+        index = self._bucket_index(hash)
+
+        # key may still be in a bucket that has not been migrated
+        if self._old is not None:
+            old_lst = self._old_bucket(hash)
+            node = old_lst.find(key, hash) if old_lst is not None else None
+            if node is not None:
+                node.value = value
+                return node
+
+            if self._buckets[index] is None:
+                self._buckets[index] = HashLinkedList()
+
         index_lst = self._buckets[index]
-        node = index_lst.contains(key)
+        node = index_lst.find(key, hash)
 
         # map does not contain key
         if node is None:
-            index_lst.insert(key, value)
+            node = self._node_class(key, value, hash)
+            length = index_lst.insert_node(node)
             self._size += 1
+            self._version += 1
+            if self._filter is not None:
+                self._filter.add(hash)
+            if length == 1:
+                self._used += 1
+            if self._chain_lengths is not None:
+                _count_chain(self._chain_lengths, length - 1, length)
 
         # map contains key
         else:
             node.value = value
 
+        return node
+
+    def _increment(self, key: str, amount: int = 1,
+                   insert: bool = True) -> int:
+        """
+        Adds amount to the value of key with a single hash and chain
+        scan, adding key with value amount if it is not in map.
+        :param key: string representing key
+        :param amount: number added to the value of key
+        :param insert: if false, keys not in map are not added
+        :return: new value of key, 0 if key was not in map and not added
+        """
+        if self._old is not None:
+            self._migrate()
+
+        hash = self._hash_function(key)
+        if self._old is not None:
+            node = self._find_migrating(key, hash)
+        else:
+            node = self._buckets[self._bucket_index(hash)].find(key, hash)
+
+        # map contains key
+        if node is not None:
+            node.value += amount
+            return node.value
+
+        if not insert:
+            return 0
+
+        # grow if table load >= max_load, key is in neither table
+        # afterwards so it can be added without searching again
+        if self.table_load() >= self._max_load:
+            self._grow()
+
+        index = self._bucket_index(hash)
+        if self._buckets[index] is None:
+            self._buckets[index] = HashLinkedList()
+        length = self._buckets[index].insert_node(HashNode(key, amount, hash))
+        self._size += 1
+        self._version += 1
+        if self._filter is not None:
+            self._filter.add(hash)
+        if length == 1:
+            self._used += 1
+        if self._chain_lengths is not None:
+            _count_chain(self._chain_lengths, length - 1, length)
+
+        return amount
 
     def empty_buckets(self) -> int:
         """
         Returns number of empty buckets in map
         :return: integer value of empty buckets
         """
-        empty = 0
+        self._finish_migration()
 
-        # check length of list at each index in map
-        for index in range(self._capacity):
-            l_list = self._buckets[index]
-            if l_list.length() == 0:
-                empty += 1
-
-        return empty
+        # non-empty buckets are counted as nodes are added and removed
+        return self._capacity - self._used
 
     def table_load(self) -> float:
         """
@@ -144,42 +703,224 @@ class HashMap:
         Empties buckets while maintaining capacity.
         :return: none
         """
+        self._old = None
         self._buckets = DynamicArray()
 
         for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+            self._buckets.append(HashLinkedList())
 
         self._size = 0
+        self._version += 1
+        self._used = 0
+        self._expiring = False
+        if self._chain_lengths is not None:
+            self._chain_lengths = [self._capacity]
+        if self._filter is not None:
+            self._filter.build(self._capacity, ())
 
     def resize_table(self, new_capacity: int) -> None:
         """
         Resizes map to new capacity or closest prime number if
-        not prime.
+        not prime (closest power of two under the POWER_OF_TWO
+        policy). Nodes keep their cached hash and are relinked into
+        the new buckets, so keys are not rehashed.
         :param new_capacity: integer representing new capacity
         :return: none
         """
         if new_capacity < 1:
             return
 
-        if not self._is_prime(new_capacity):
-            new_capacity = self._next_prime(new_capacity)
-
-        # store values of current map
-        values = self.get_keys_and_values()
+        self._finish_migration()
+
+        new_capacity = round_capacity(new_capacity, self._capacity_policy)
+
+        # grow further if the current pairs would overfill new capacity
+        new_capacity = fit_capacity(new_capacity, self._size, self._max_load,
+                                    self._capacity_policy)
+
+        # move existing nodes into new buckets by cached hash,
+        # keys are unique so no duplicate check is needed
+        start = time.perf_counter()
+        old_capacity = self._capacity
+        self._version += 1
+        self._set_capacity(new_capacity)
+        chains = [HashLinkedList() for _ in range(new_capacity)]
+        lengths = None
+        if self._chain_lengths is not None:
+            lengths = self._chain_lengths = [new_capacity]
+
+        self._used = 0
+        for index in range(old_capacity):
+            self._used += self._buckets[index].relink(
+                chains, new_capacity, self._shift, lengths)
+
+        self._buckets = DynamicArray(chains)
+        if self._filter is not None:
+            self._filter.build(self._capacity)
+        self._resizes += 1
+        self._resize_seconds += time.perf_counter() - start
+
+    def stats(self) -> dict:
+        """
+        Returns counters kept up to date by the map operations, without
+        scanning the table. While an incremental resize is running the
+        bucket counters describe the new table.
+        :return: dictionary with size, capacity, table_load,
+            empty_buckets, resizes, resize_seconds, migrating and
+            expired (entries reclaimed after their ttl), with a
+            membership filter also filter_bytes, filter_rejects (misses
+            answered by the filter), filter_false_positives (misses it
+            let through) and filter_fp_rate, and with track_stats=True
+            also max_chain, avg_chain and chain_histogram, where index
+            n is the number of buckets holding n nodes. table_bytes is
+            the bytes taken by the bucket array, chains and nodes, not
+            counting keys and values. Every chain and node takes the
+            same space, so one of each is measured, and cached hashes
+            are counted as 64-bit integers
+        """
+        stats = {
+            'size': self._size,
+            'capacity': self._capacity,
+            'table_load': self.table_load(),
+            'empty_buckets': self._capacity - self._used,
+            'resizes': self._resizes,
+            'resize_seconds': self._resize_seconds,
+            'migrating': self._old is not None,
+            'expired': self._expired,
+            'table_bytes': self._table_bytes(),
+        }
+
+        if self._filter is not None:
+            stats.update(self._filter.stats())
+
+        lengths = self._chain_lengths
+        if lengths is not None:
+            max_chain = len(lengths) - 1
+            while max_chain > 0 and lengths[max_chain] == 0:
+                max_chain -= 1
+            nodes = sum(length * count for length, count in enumerate(lengths))
+
+            stats['max_chain'] = max_chain
+            stats['avg_chain'] = nodes / self._used if self._used else 0
+            stats['chain_histogram'] = lengths[:max_chain + 1]
+
+        return stats
+
+    def _table_bytes(self) -> int:
+        """
+        Returns the bytes taken by the bucket array, chains and nodes,
+        without scanning the table.
+        :return: integer number of bytes
+        """
+        chain = HashLinkedList()
+        node = self._node_class(None, None, 0)
+        chain_bytes = sys.getsizeof(chain) + sys.getsizeof(chain.__dict__)
+        node_bytes = sys.getsizeof(node) + sys.getsizeof(node.__dict__)
 
-        # create new map with new capacity
-        self._capacity = new_capacity
-        self._buckets = DynamicArray()
-        self._size = 0
+        return sys.getsizeof([None] * self._capacity) + \
+            self._capacity * chain_bytes + \
+            self._size * (node_bytes + HASH_BYTES)
 
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+    def save(self, path: str) -> None:
+        """
+        Writes map to a snapshot file that load can rebuild it from. The
+        file keeps the capacity, settings, cached hashes and the nodes of
+        each bucket in chain order.
+        :param path: file path to write
+        :return: none
+        """
+        self._finish_migration()
 
-        # add values to new map
-        length = values.length()
-        for index in range(length):
-            key, value = values[index]
-            self.put(key, value)
+        # bucket n holds the entries from its first entry up to the
+        # first entry of bucket n + 1
+        table = bytearray()
+        entries = []
+        for index in range(self._capacity):
+            chain = self._buckets[index]
+            table += BUCKET.pack(len(entries), chain.length())
+            for node in chain:
+                entries.append((node.hash, None, node.key, node.value))
+
+        settings = {
+            'function': function_id(self._hash_function,
+                                    (entry[2] for entry in entries)),
+            'options': {
+                'capacity_policy': self._capacity_policy,
+                'incremental_resize': self._incremental_resize,
+                'migration_step': self._migration_step,
+                'track_stats': self._chain_lengths is not None,
+                'max_load': self._max_load,
+                'growth': self._growth,
+                'min_load': self._min_load,
+                'sweep_step': self._sweep_step,
+                'filter_bits': self._filter_bits,
+            },
+            'min_capacity': self._min_capacity,
+            'used': self._used,
+            'expiring': self._expiring,
+        }
+
+        write_snapshot(path, 'chaining', self._capacity, self._size,
+                       settings, table, entries)
+
+    @classmethod
+    def load(cls, path: str, lazy: bool = False) -> "HashMap":
+        """
+        Rebuilds a map written by save. Nodes keep their cached hash and
+        go back into the bucket they were saved from, so no key is hashed
+        again.
+        :param path: file path to read
+        :param lazy: if true, keep the file memory-mapped and build the
+            nodes of each bucket the first time the bucket is used
+        :return: new HashMap
+        """
+        snapshot = Snapshot(path, 'chaining')
+        settings = snapshot.settings
+
+        # start small, the empty buckets are replaced straight away
+        map = cls(1, snapshot.function, **settings['options'])
+        map._set_capacity(snapshot.capacity)
+
+        ranges = list(BUCKET.iter_unpack(snapshot.table()))
+        entries = snapshot.entries()
+
+        def load_chain(index: int) -> HashLinkedList:
+            chain = HashLinkedList()
+            first, count = ranges[index]
+
+            # nodes are added at the front, so add them last to first
+            for entry in reversed(entries[first:first + count]):
+                chain.insert_node(HashNode(snapshot.key(entry),
+                                           snapshot.value(entry), entry[0]))
+            return chain
+
+        map._buckets = LazyList(load_chain, snapshot.capacity)
+        if not lazy:
+            map._buckets = DynamicArray(list(map._buckets))
+            snapshot.close()
+
+        map._size = snapshot.size
+        map._used = settings['used']
+        map._min_capacity = settings['min_capacity']
+        map._expiring = settings.get('expiring', False)
+        if map._filter is not None:
+            map._filter.build(map._capacity, (entry[0] for entry in entries))
+        if map._chain_lengths is not None:
+            lengths = [0] * (max(count for _, count in ranges) + 1)
+            for _, count in ranges:
+                lengths[count] += 1
+            map._chain_lengths = lengths
+
+        return map
+
+    def freeze(self) -> FrozenHashMap:
+        """
+        Returns a read-only copy of the current pairs, indexed by a
+        minimal perfect hash so lookups probe no buckets. Entries put
+        with a ttl are copied without it.
+        :return: new FrozenHashMap
+        """
+        return FrozenHashMap.from_map(self)
 
     def get(self, key: str):
         """
@@ -187,38 +928,75 @@ class HashMap:
         :param key: string representing key
         :return: value if key found, none if not found
         """
-        # find location of key
-        hash = self._hash_function(key)
-        index = hash % self._capacity
+        if self._old is not None:
+            self._migrate()
 
-        l_list = self._buckets[index]
-        node = l_list.contains(key)
+        # find location of key, unless the filter rules it out
+        hash = self._hash_function(key)
+        membership = self._filter
+        if membership is not None and membership.rules_out(hash):
+            return None
+        if self._old is not None:
+            node = self._find_migrating(key, hash)
+        else:
+            index = self._bucket_index(hash)
+            l_list = self._buckets[index]
+            node = l_list.find(key, hash)
 
-        # key found
+        # key found, unless it has expired
         if node:
-            return node.value
+            value = node.value
+            if type(value) is Expiring:
+                return None if self._expire(node) else value.value
+            return value
 
         # key not found
+        if membership is not None:
+            membership.missed()
         return None
 
+    def _expire(self, node: HashNode) -> bool:
+        """
+        Removes the node of a key put with a ttl if it has expired.
+        :param node: HashNode whose value is an Expiring
+        :return: true if node expired and was removed
+        """
+        if not expired(node.value):
+            return False
+
+        self._remove(node.key, node.hash)
+        self._expired += 1
+        return True
+
     def contains_key(self, key: str) -> bool:
         """
         Checks if key is found in map.
         :param key: string representing key to be found
         :return: true if map contains key, false if not
         """
-        # find location of key
-        hash = self._hash_function(key)
-        index = hash % self._capacity
+        if self._old is not None:
+            self._migrate()
 
-        l_list = self._buckets[index]
+        # find location of key, unless the filter rules it out
+        hash = self._hash_function(key)
+        membership = self._filter
+        if membership is not None and membership.rules_out(hash):
+            return False
+        if self._old is not None:
+            node = self._find_migrating(key, hash)
+        else:
+            index = self._bucket_index(hash)
+            l_list = self._buckets[index]
+            node = l_list.find(key, hash)
 
         # does not contain key
-        if l_list.contains(key) is None:
+        if node is None:
+            if membership is not None:
+                membership.missed()
             return False
 
-        # contains key
-        return True
+        # contains key, unless it has expired
+        return type(node.value) is not Expiring or not self._expire(node)
 
     def remove(self, key: str) -> None:
         """
@@ -226,15 +1004,158 @@ class HashMap:
         :param key: key corresponding to node to be removed
         :return: none
         """
+        if self._old is not None:
+            self._migrate()
+
+        self._remove(key, self._hash_function(key))
+
+    def _remove(self, key: str, hash: int) -> None:
+        """
+        Removes node corresponding to key from map.
+        :param key: key corresponding to node to be removed
+        :param hash: integer hash of key
+        :return: none
+        """
         # find location of node
-        hash = self._hash_function(key)
-        index = hash % self._capacity
+        index = self._bucket_index(hash)
 
         l_list = self._buckets[index]
 
+        # node may still be in a bucket that has not been migrated
+        if self._old is not None:
+            old_lst = self._old_bucket(hash)
+            if old_lst is not None and old_lst.remove(key):
+                self._size -= 1
+                self._version += 1
+                if self._filter is not None:
+                    self._filter.discard(hash)
+                return
+
+            if l_list is None:
+                return
+
         # remove node if present
         if l_list.remove(key):
             self._size -= 1
+            self._version += 1
+            if self._filter is not None:
+                self._filter.discard(hash)
+            length = l_list.length()
+            if length == 0:
+                self._used -= 1
+            if self._chain_lengths is not None:
+                _count_chain(self._chain_lengths, length + 1, length)
+
+            # shrink once table load falls below min_load
+            if self._size < self._capacity * self._min_load:
+                self._shrink()
+
+    def get_many(self, keys, default: object = None,
+                 as_array: bool = False):
+        """
+        Returns the values corresponding to a batch of keys. Every key
+        is hashed before any bucket is searched.
+        :param keys: iterable of keys, or a NumPy array
+        :param default: value returned for keys not in map
+        :param as_array: if true, return a NumPy array instead of a list
+        :return: list or NumPy array of values, in the order of keys
+        """
+        keys, hashes = hash_batch(self._hash_function, keys)
+        now = time.time()
+        values = []
+        for node in self._find_many(keys, hashes):
+            value = default if node is None else node.value
+            if type(value) is Expiring:
+                value = default if value.deadline <= now else value.value
+            values.append(value)
+
+        return batch_array(values) if as_array else values
+
+    def contains_many(self, keys, as_array: bool = False):
+        """
+        Checks if each key of a batch is found in map. Every key is
+        hashed before any bucket is searched.
+        :param keys: iterable of keys, or a NumPy array
+        :param as_array: if true, return a NumPy array instead of a list
+        :return: list or NumPy array of booleans, in the order of keys
+        """
+        keys, hashes = hash_batch(self._hash_function, keys)
+        now = time.time()
+        found = [node is not None and not expired(node.value, now)
+                 for node in self._find_many(keys, hashes)]
+
+        return batch_array(found) if as_array else found
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key of a batch from map. Every key is hashed
+        before any bucket is searched.
+        :param keys: iterable of keys, or a NumPy array
+        :return: none
+        """
+        keys, hashes = hash_batch(self._hash_function, keys)
+        if self._old is not None:
+            self._migrate(self._migration_step * len(keys))
+
+        for key, hash in zip(keys, hashes):
+            self._remove(key, hash)
+
+    def _find_many(self, keys: list, hashes: list) -> list:
+        """
+        Finds the nodes holding a batch of already hashed keys.
+        :param keys: list of keys
+        :param hashes: list of integer hashes of keys
+        :return: list of HashNodes, none for keys not in map
+        """
+        # move as many buckets as the same number of single lookups would
+        if self._old is not None:
+            self._migrate(self._migration_step * len(keys))
+        if self._filter is not None:
+            return self._find_many_filtered(keys, hashes)
+        if self._old is not None:
+            return [self._find_migrating(key, hash)
+                    for key, hash in zip(keys, hashes)]
+
+        buckets = self._buckets
+        capacity, shift = self._capacity, self._shift
+        mask = capacity - 1
+
+        nodes = []
+        for key, hash in zip(keys, hashes):
+            if shift is None:
+                index = hash % capacity
+            else:
+                index = (hash * MIX_MULTIPLIER) >> shift & mask
+            nodes.append(buckets[index].find(key, hash))
+
+        return nodes
+
+    def _find_many_filtered(self, keys: list, hashes: list) -> list:
+        """
+        Finds the nodes holding a batch of already hashed keys, searching
+        only for the keys the membership filter lets through.
+        :param keys: list of keys
+        :param hashes: list of integer hashes of keys
+        :return: list of HashNodes, none for keys not in map
+        """
+        rules_out, missed = self._filter.rules_out, self._filter.missed
+        migrating = self._old is not None
+
+        nodes = []
+        for key, hash in zip(keys, hashes):
+            if rules_out(hash):
+                nodes.append(None)
+                continue
+
+            if migrating:
+                node = self._find_migrating(key, hash)
+            else:
+                node = self._buckets[self._bucket_index(hash)].find(key, hash)
+            if node is None:
+                missed()
+            nodes.append(node)
+
+        return nodes
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -243,58 +1164,162 @@ class HashMap:
         """
         key_arr = DynamicArray()
 
-        # iterate through each list in map and add value to array
-        for index in range(0, self._capacity, 1):
-            l_list = self._buckets[index]
-            for node in l_list:
-                key_arr.append((node.key, node.value))
+        # add each pair of map to array
+        for pair in self.items():
+            key_arr.append(pair)
 
         return key_arr
 
-def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
+    def _nodes(self):
+        """
+        Yields every node of map, one bucket at a time, skipping
+        expired entries. Raises RuntimeError if keys are added or
+        removed, or the table is resized, while the nodes are being
+        yielded.
+        :return: generator of HashNodes
+        """
+        self._finish_migration()
+        version = self._version
+        buckets = self._buckets
+        now = time.time()
+
+        for index in range(self._capacity):
+            for node in buckets[index]:
+                value = node.value
+                if type(value) is Expiring and value.deadline <= now:
+                    continue
+                yield node
+                if self._version != version:
+                    raise RuntimeError("HashMap changed during iteration")
+
+    def _pairs(self, start: int, stop: int) -> list:
+        """
+        Returns the key/value pairs in buckets start to stop - 1,
+        skipping expired entries, so callers can walk the table a piece
+        at a time. No table may be migrating.
+        :param start: index of first bucket
+        :param stop: index after last bucket
+        :return: list of (key, value) tuples
+        """
+        buckets = self._buckets
+        now = time.time()
+        pairs = []
+        for index in range(start, min(stop, self._capacity)):
+            for node in buckets[index]:
+                value = node.value
+                if type(value) is Expiring:
+                    if value.deadline <= now:
+                        continue
+                    value = value.value
+                pairs.append((node.key, value))
+
+        return pairs
+
+    def keys(self):
+        """
+        Returns a lazy view of the keys in map. Each call gets its own
+        generator, and no pairs are copied.
+        :return: generator of keys
+        """
+        for node in self._nodes():
+            yield node.key
+
+    def values(self):
+        """
+        Returns a lazy view of the values in map. Each call gets its own
+        generator, and no pairs are copied.
+        :return: generator of values
+        """
+        for node in self._nodes():
+            value = node.value
+            yield value.value if type(value) is Expiring else value
+
+    def items(self):
+        """
+        Returns a lazy view of the key/value pairs in map. Each call gets
+        its own generator, and no pairs are copied.
+        :return: generator of (key, value) tuples
+        """
+        for node in self._nodes():
+            value = node.value
+            yield node.key, value.value if type(value) is Expiring else value
+
+    def __iter__(self):
+        """
+        Iterate through the keys of map
+        :return: generator of keys
+        """
+        return self.keys()
+
+def find_mode(values) -> tuple[DynamicArray, int]:
     """
-    Finds the mode value(s) of unsorted Dynamic Array.
-    :param da: Dynamic Array
+    Finds the mode value(s) of an unsorted Dynamic Array, or of any
+    other iterable or generator, in a single pass. Each value is hashed
+    and looked up once.
+    :param values: Dynamic Array or other iterable of values
     :return: tuple containing Dynamic Array of value(s) and frequency
     """
     map = HashMap()
-    mode_values = DynamicArray()
+    mode_values = []
     mode_frequency = 0
 
-    for index in range(da.length()):
-        key = da[index]
-
-        # value has not yet been added to map
-        if not map.contains_key(key):
-            # add to map
-            map.put(key, 1)
+    for key in values:
+        # count value, adding it to map if it is new
+        frequency = map._increment(key)
 
-            # first value added to map
-            if mode_frequency == 0:
-                mode_values.append(key)
-                mode_frequency += 1
+        # frequency greater than current mode frequency
+        if frequency > mode_frequency:
+            mode_values.clear()
+            mode_values.append(key)
+            mode_frequency = frequency
 
-            # frequency = mode frequency
-            elif mode_frequency == 1:
-                mode_values.append(key)
+        # frequency same as current mode frequency
+        elif frequency == mode_frequency:
+            mode_values.append(key)
 
-        # value has been added to map
-        else:
-            # update frequency of value
-            frequency = map.get(key) + 1
-            map.put(key, frequency)
+    return DynamicArray(mode_values), mode_frequency
 
-            # frequency greater than current mode frequency
-            if frequency > mode_frequency:
-                mode_values = DynamicArray()
-                mode_values.append(key)
-                mode_frequency = frequency
 
-            # frequency same as current mode frequency
-            elif frequency == mode_frequency:
-                mode_values.append(key)
+def find_heavy_hitters(values, counters: int = 100) -> tuple[DynamicArray,
+                                                             int]:
+    """
+    Finds the frequent values of a stream too large to count exactly,
+    using the Misra-Gries summary with a fixed number of counters.
+    Every value occurring more than n / (counters + 1) times in a stream
+    of n values is returned. Each returned count is a lower bound that
+    is at most n / (counters + 1) below the true frequency.
+    :param values: Dynamic Array or other iterable of values
+    :param counters: most values counted at once, which bounds memory
+    :return: tuple containing Dynamic Array of (value, low, high) tuples,
+        most frequent first, where low <= frequency <= high, and n
+    """
+    if counters < 1:
+        raise ValueError("counters must be at least 1")
 
-    return mode_values, mode_frequency
+    map = HashMap()
+    length = 0
+    decrements = 0
+
+    for key in values:
+        length += 1
+
+        # count value if it already has a counter or one is free
+        if map._increment(key, insert=map.get_size() < counters):
+            continue
+
+        # no counter is free, take one from every counted value
+        decrements += 1
+        exhausted = []
+        for node in map._nodes():
+            node.value -= 1
+            if node.value == 0:
+                exhausted.append(node.key)
+        map.remove_many(exhausted)
+
+    # every decrement undercounted each value by at most one
+    hitters = sorted(map.items(), key=lambda pair: pair[1], reverse=True)
+    return DynamicArray([(key, count, count + decrements)
+                         for key, count in hitters]), length
 
 
 # ------------------- BASIC TESTING ---------------------------------------- #
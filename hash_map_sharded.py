@@ -0,0 +1,528 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Sharded hashmap that routes keys across worker processes,
+# each owning one of the single-process hash maps, with batched operations
+# and a map-reduce find_mode
+
+import multiprocessing
+import os
+import random
+import time
+
+from a6_include import DynamicArray, hash_function_1
+import hash_map_oa
+import hash_map_sc
+import hash_map_swiss
+
+
+MAP_CLASSES = {
+    'chaining': hash_map_sc.HashMap,
+    'open_addressing': hash_map_oa.HashMap,
+    'swiss': hash_map_swiss.HashMap,
+}
+
+# commands a worker runs as a method call on its map
+_METHODS = frozenset((
+    'put', 'get', 'contains_key', 'remove', 'clear', 'resize_table',
+    'put_many', 'get_many', 'contains_many', 'remove_many',
+    'get_size', 'get_capacity', 'empty_buckets', 'stats',
+))
+
+
+def _worker(connection, map_class: type, capacity: int, function,
+            options: dict) -> None:
+    """
+    Runs in each worker process. Owns one HashMap and answers commands
+    from the parent until told to close.
+    :param connection: end of a Pipe shared with the parent
+    :param map_class: HashMap class of the shard
+    :param capacity: integer capacity of the shard
+    :param function: hash function, or its registered name
+    :param options: other HashMap constructor arguments
+    :return: none
+    """
+    map = map_class(capacity, function, **options)
+
+    while True:
+        command, args = connection.recv()
+        if command == 'close':
+            connection.close()
+            return
+
+        try:
+            if command in _METHODS:
+                result = getattr(map, command)(*args)
+            elif command == 'items':
+                result = list(map.items())
+            elif command == 'find_mode':
+                modes, frequency = hash_map_sc.find_mode(args[0])
+                result = [modes[i] for i in range(modes.length())], frequency
+            else:
+                raise ValueError(f"unknown command {command!r}")
+        except Exception as error:
+            connection.send((False, error))
+        else:
+            connection.send((True, result))
+
+
+class ShardedHashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function=hash_function_1,
+                 shards: int = None,
+                 kind: str = 'chaining',
+                 start_method: str = None,
+                 **options) -> None:
+        """
+        Initialize new HashMap split into shards, each owned by a worker
+        process. Keys are routed to shards by the interpreter's hash(),
+        which only the parent computes, so the hash function of the
+        shards is run inside the workers.
+        :param capacity: integer total capacity, split between shards
+        :param function: hash function used by the shards, or the name
+            it is registered under in hash_functions. Must be picklable
+            under the spawn start method
+        :param shards: number of worker processes, defaults to the
+            number of cores
+        :param kind: map each shard owns, 'chaining', 'open_addressing'
+            or 'swiss'
+        :param start_method: multiprocessing start method, none for the
+            platform default
+        :param options: other constructor arguments of the shard maps
+        """
+        if kind not in MAP_CLASSES:
+            raise ValueError(f"kind must be one of {sorted(MAP_CLASSES)}, "
+                             f"not {kind!r}")
+        if shards is None:
+            shards = os.cpu_count() or 1
+        if shards < 1:
+            raise ValueError(f"shards must be at least 1, not {shards}")
+
+        context = multiprocessing.get_context(start_method)
+        shard_capacity = max(-(-capacity // shards), 1)
+
+        self._connections = []
+        self._processes = []
+        for _ in range(shards):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker, daemon=True,
+                args=(child, MAP_CLASSES[kind], shard_capacity, function,
+                      options))
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def __enter__(self) -> "ShardedHashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stops the worker processes. The map cannot be used afterwards.
+        :return: none
+        """
+        for connection in self._connections:
+            connection.send(('close', ()))
+            connection.close()
+        for process in self._processes:
+            process.join()
+
+        self._connections = []
+        self._processes = []
+
+    def _shard(self, key) -> int:
+        """
+        Returns the index of the shard owning key.
+        :param key: key to route
+        :return: integer shard index
+        """
+        return hash(key) % len(self._connections)
+
+    def _call(self, shard: int, command: str, *args):
+        """
+        Runs one command on one shard and waits for its result.
+        :param shard: integer shard index
+        :param command: name of the command
+        :param args: arguments of the command
+        :return: result of the command
+        """
+        connection = self._connections[shard]
+        connection.send((command, args))
+
+        return self._result(connection)
+
+    @staticmethod
+    def _result(connection):
+        """
+        Receives the result of a command, raising the error the worker
+        hit if it failed.
+        """
+        ok, result = connection.recv()
+        if not ok:
+            raise result
+
+        return result
+
+    @staticmethod
+    def _gather(connections: list) -> list:
+        """
+        Receives the result of a command from every connection it was
+        sent to, then raises the first error a worker hit. Every reply
+        is read even when one failed, so no pipe is left holding a
+        reply that a later command would read as its own.
+        :param connections: list of connections sent one command each
+        :return: list of results, in the order of connections
+        """
+        replies = [connection.recv() for connection in connections]
+        for ok, result in replies:
+            if not ok:
+                raise result
+
+        return [result for _, result in replies]
+
+    def _broadcast(self, command: str, *args) -> list:
+        """
+        Runs the same command on every shard. All shards are sent the
+        command before any result is read, so they run in parallel.
+        :param command: name of the command
+        :param args: arguments of the command
+        :return: list of results, one per shard
+        """
+        for connection in self._connections:
+            connection.send((command, args))
+
+        return self._gather(self._connections)
+
+    def _scatter(self, command: str, items: list, *args,
+                 key=None) -> list:
+        """
+        Splits items between shards by key, runs command on every shard
+        that received any, and puts the results back in item order when
+        the command returns one result per item.
+        :param command: name of a batch command
+        :param items: list of keys, or of pairs when key is given
+        :param args: other arguments of the command, after the batch
+        :param key: callable returning the key of an item, none if the
+            items are keys
+        :return: list of results in the order of items, or none
+        """
+        count = len(self._connections)
+        batches = [[] for _ in range(count)]
+        positions = [[] for _ in range(count)]
+        for position, item in enumerate(items):
+            shard = hash(item if key is None else key(item)) % count
+            batches[shard].append(item)
+            positions[shard].append(position)
+
+        # send every batch before reading any result
+        busy = [shard for shard in range(count) if batches[shard]]
+        for shard in busy:
+            self._connections[shard].send((command, (batches[shard],) + args))
+
+        replies = self._gather([self._connections[shard] for shard in busy])
+
+        results = None
+        for shard, result in zip(busy, replies):
+            if result is None:
+                continue
+            if results is None:
+                results = [None] * len(items)
+            for position, value in zip(positions[shard], result):
+                results[position] = value
+
+        return results
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(self._broadcast('get_size'))
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, summed over shards
+        """
+        return sum(self._broadcast('get_capacity'))
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Adds key/value pair to map. If map already contains key,
+        updates value of key. Each call is one round trip to a worker,
+        so put_many is much faster for many pairs.
+        :param key: string representing key
+        :param value: value to be added/updated
+        :return: none
+        """
+        self._call(self._shard(key), 'put', key, value)
+
+    def get(self, key: str):
+        """
+        Returns the value corresponding to the given key
+        :param key: string representing key
+        :return: value if key found, none if not found
+        """
+        return self._call(self._shard(key), 'get', key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if key is found in map.
+        :param key: string representing key to be found
+        :return: true if map contains key, false if not
+        """
+        return self._call(self._shard(key), 'contains_key', key)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes node corresponding to key from map.
+        :param key: key corresponding to node to be removed
+        :return: none
+        """
+        self._call(self._shard(key), 'remove', key)
+
+    def put_many(self, pairs) -> None:
+        """
+        Adds every key/value pair from an iterable to map, sending each
+        shard its pairs in one message.
+        :param pairs: iterable of (key, value) tuples
+        :return: none
+        """
+        self._scatter('put_many', list(pairs), key=lambda pair: pair[0])
+
+    def get_many(self, keys, default: object = None) -> list:
+        """
+        Returns the values corresponding to a batch of keys, sending each
+        shard its keys in one message.
+        :param keys: iterable of keys
+        :param default: value returned for keys not in map
+        :return: list of values, in the order of keys
+        """
+        return self._scatter('get_many', list(keys), default) or []
+
+    def contains_many(self, keys) -> list:
+        """
+        Checks if each key of a batch is found in map, sending each
+        shard its keys in one message.
+        :param keys: iterable of keys
+        :return: list of booleans, in the order of keys
+        """
+        return self._scatter('contains_many', list(keys)) or []
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key of a batch from map, sending each shard its
+        keys in one message.
+        :param keys: iterable of keys
+        :return: none
+        """
+        self._scatter('remove_many', list(keys))
+
+    def clear(self) -> None:
+        """
+        Empties buckets of every shard while maintaining capacity.
+        :return: none
+        """
+        self._broadcast('clear')
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes map to new total capacity, split evenly between shards.
+        :param new_capacity: integer representing new capacity
+        :return: none
+        """
+        if new_capacity < 1:
+            return
+
+        self._broadcast('resize_table',
+                        max(-(-new_capacity // len(self._connections)), 1))
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets in map
+        :return: integer value of empty buckets
+        """
+        return sum(self._broadcast('empty_buckets'))
+
+    def table_load(self) -> float:
+        """
+        Returns the hash table load factor, across all shards.
+        :return: float representing load factor
+        """
+        return self.get_size() / self.get_capacity()
+
+    def stats(self) -> dict:
+        """
+        Returns the stats() of every shard, along with their totals.
+        :return: dictionary with size, capacity, empty_buckets and
+            resizes summed over shards, and shards, the list of
+            per-shard stats
+        """
+        shards = self._broadcast('stats')
+
+        return {
+            'size': sum(stats['size'] for stats in shards),
+            'capacity': sum(stats['capacity'] for stats in shards),
+            'empty_buckets': sum(stats['empty_buckets'] for stats in shards),
+            'resizes': sum(stats['resizes'] for stats in shards),
+            'shards': shards,
+        }
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns Dynamic Array containing all key/value pairs in map
+        :return: Dynamic Array containing tuples
+        """
+        key_arr = DynamicArray()
+
+        # add each pair of map to array
+        for pair in self.items():
+            key_arr.append(pair)
+
+        return key_arr
+
+    def items(self):
+        """
+        Returns the key/value pairs in map, fetched from every shard
+        when iteration starts.
+        :return: generator of (key, value) tuples
+        """
+        for pairs in self._broadcast('items'):
+            yield from pairs
+
+    def keys(self):
+        """
+        Returns the keys in map, fetched from every shard when iteration
+        starts.
+        :return: generator of keys
+        """
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        """
+        Returns the values in map, fetched from every shard when
+        iteration starts.
+        :return: generator of values
+        """
+        for _, value in self.items():
+            yield value
+
+    def __iter__(self):
+        """
+        Iterate through the keys of map
+        :return: generator of keys
+        """
+        return self.keys()
+
+    def find_mode(self, values) -> tuple[DynamicArray, int]:
+        """
+        Finds the mode value(s) of values with map-reduce. Values are
+        routed to shards like keys, so every copy of a value is counted
+        by the same worker. Each worker finds the modes of its part, and
+        the parent keeps the modes with the highest frequency.
+        :param values: Dynamic Array or other iterable of values
+        :return: tuple containing Dynamic Array of value(s) and frequency
+        """
+        count = len(self._connections)
+        parts = [[] for _ in range(count)]
+        for value in values:
+            parts[hash(value) % count].append(value)
+
+        busy = [shard for shard in range(count) if parts[shard]]
+        for shard in busy:
+            self._connections[shard].send(('find_mode', (parts[shard],)))
+
+        replies = self._gather([self._connections[shard] for shard in busy])
+
+        mode_values = []
+        mode_frequency = 0
+        for modes, frequency in replies:
+            if frequency > mode_frequency:
+                mode_values = modes
+                mode_frequency = frequency
+            elif frequency == mode_frequency:
+                mode_values.extend(modes)
+
+        return DynamicArray(mode_values), mode_frequency
+
+
+def throughput(shards: int, pairs: int = 100000, batch: int = 10000,
+               kind: str = 'chaining', seed: int = 261) -> float:
+    """
+    Measures batched puts and gets per second of a ShardedHashMap.
+    :param shards: number of worker processes
+    :param pairs: number of pairs put and then looked up
+    :param batch: number of pairs sent per put_many or get_many call
+    :param kind: map each shard owns
+    :param seed: integer seed for the keys
+    :return: float operations per second
+    """
+    rng = random.Random(seed)
+    keys = ['key' + str(rng.randrange(pairs * 4)) for _ in range(pairs)]
+
+    with ShardedHashMap(11, 'fnv1a', shards, kind) as sharded:
+        start = time.perf_counter()
+        for index in range(0, pairs, batch):
+            sharded.put_many((key, key) for key in keys[index:index + batch])
+        for index in range(0, pairs, batch):
+            sharded.get_many(keys[index:index + batch])
+        elapsed = time.perf_counter() - start
+
+    return pairs * 2 / elapsed
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - put, get and remove")
+    print("-------------------------")
+    with ShardedHashMap(53, hash_function_1, shards=4) as m:
+        for i in range(150):
+            m.put('str' + str(i), i * 100)
+        print(m.get_size(), m.get('str42'), m.contains_key('str149'))
+        m.remove('str42')
+        print(m.get_size(), m.get('str42'))
+
+        m.put_many(('key' + str(i), i) for i in range(1000))
+        print(m.get_size(), m.get_many(['key1', 'key999', 'key1000']))
+
+    print("\nPDF - find_mode example 1")
+    print("-------------------------")
+    test_cases = (
+        ["Arch", "Manjaro", "Manjaro", "Mint", "Mint", "Mint", "Ubuntu", "Ubuntu", "Ubuntu"],
+        ["one", "two", "three", "four", "five"],
+        ["2", "4", "2", "6", "8", "4", "1", "3", "4", "5", "7", "3", "3", "2"]
+    )
+    with ShardedHashMap(shards=3) as m:
+        for case in test_cases:
+            mode, frequency = m.find_mode(case)
+            print(f"Input: {case}\nMode : {mode}, Frequency: {frequency}\n")
+
+    print("\nFailed batch leaves every shard in step")
+    print("---------------------------------------")
+    with ShardedHashMap(shards=4) as m:
+        m.put_many(('a' + str(i), i) for i in range(10))
+        try:
+            # keys that are not strings fail in hash_function_1
+            m.put_many((i, i) for i in range(10))
+        except TypeError as error:
+            print('put_many failed:', error)
+        print(m.get('a5'), m.get_many(['a1', 'a9']), m.get_size())
+
+    # the parent hashes, routes and pickles every key on its own, so
+    # more shards only help while workers do most of the work and have
+    # cores of their own
+    print("\nThroughput, batched puts and gets")
+    print("---------------------------------")
+    print(os.cpu_count(), 'cores')
+    for count in sorted({1, 2, os.cpu_count() or 1}):
+        print(count, 'shards:', round(throughput(count)), 'ops/sec')
@@ -0,0 +1,881 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Open addressing hashmap laid out as fixed-width slots and a
+# key/value data region inside shared memory or a memory-mapped file, so
+# many processes can read one table without copying it
+
+import mmap
+import os
+import pickle
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from a6_include import DynamicArray
+from hash_capacity import (MIX_MULTIPLIER, POWER_OF_TWO, check_load_factors,
+                           fit_capacity, mix_shift, next_power_of_two)
+from hash_functions import (PROCESS_LOCAL_FUNCTIONS, get_hash_function,
+                            hash_function_name, is_portable)
+from hash_snapshot import decode, encode
+
+
+_MAGIC = b'HMAP'
+_FORMAT_VERSION = 1
+
+# magic, format version, hash function name, name of the segment that
+# replaced this one
+_HEADER = struct.Struct('<4sI32s64s')
+
+# sequence, capacity, size, tombstones, data used, data size, retired
+_COUNTERS = struct.Struct('<QQQQQQB')
+_COUNTERS_OFFSET = _HEADER.size
+
+# slots start at a fixed, aligned offset after the header
+_SLOTS_OFFSET = 256
+
+# state, key length, value length, data offset, hash
+_SLOT = struct.Struct('<B3xII4xQQ')
+
+# slot states
+_EMPTY = 0
+_FULL = 1
+_TOMBSTONE = 2
+
+_INT64 = struct.Struct('<q')
+
+
+def _segment_size(capacity: int, data_size: int) -> int:
+    """
+    Returns the number of bytes a segment of capacity slots and
+    data_size bytes of key/value data needs.
+    """
+    return _SLOTS_OFFSET + capacity * _SLOT.size + data_size
+
+
+def _attach_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attaches to an existing shared memory block without registering it
+    with the resource tracker, which would unlink the block when this
+    reader exits, or forget the writer's registration if the tracker is
+    shared with the writer.
+    :param name: shared memory name
+    :return: SharedMemory
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        pass
+
+    # before Python 3.13 registering cannot be turned off
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+class _Segment:
+    """
+    One shared memory block or mapped file holding a whole table.
+    """
+
+    def __init__(self, name: str = None, path: str = None, size: int = 0,
+                 create: bool = False) -> None:
+        """
+        Creates or attaches to a segment. Exactly one of name and path
+        is used: path for a memory-mapped file, otherwise shared memory
+        named name (a new unique name if creating without one).
+        :param name: shared memory name
+        :param path: file path
+        :param size: integer size in bytes when creating
+        :param create: if true, create a new zeroed segment
+        """
+        self.path = path
+        self.memory = None
+
+        if path is not None:
+            self.name = path
+            if create:
+                with open(path, 'wb') as file:
+                    file.truncate(size)
+            with open(path, 'r+b' if create else 'rb') as file:
+                access = mmap.ACCESS_WRITE if create else mmap.ACCESS_READ
+                self.buffer = mmap.mmap(file.fileno(), 0, access=access)
+            return
+
+        if create:
+            self.memory = shared_memory.SharedMemory(name, True, size)
+        else:
+            self.memory = _attach_memory(name)
+        self.name = self.memory.name
+        self.buffer = self.memory.buf
+
+    def close(self) -> None:
+        """
+        Unmaps the segment in this process.
+        :return: none
+        """
+        if self.memory is None:
+            self.buffer.close()
+        else:
+            self.buffer = None
+            self.memory.close()
+
+    def unlink(self) -> None:
+        """
+        Removes the segment's name, so no new process can attach. Maps
+        that already exist stay valid.
+        :return: none
+        """
+        if self.memory is None:
+            return
+        try:
+            self.memory.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedHashMap:
+    """
+    Open addressing hash map stored in one shared memory block or mapped
+    file. One writer process creates the map with create or from_pairs,
+    and any number of processes attach to it with attach and read it in
+    place. A writer that dies in the middle of a write leaves the
+    table half written and marked as being written, so readers raise
+    RuntimeError once it has stayed that way for their timeout. A new
+    writer must then build a fresh map for readers to attach to.
+    """
+
+    def __init__(self, segment: _Segment, writable: bool,
+                 max_load: float = .5, timeout: float = 1.0) -> None:
+        """
+        Wraps an existing segment. Use create, from_pairs or attach
+        instead of calling this directly.
+        """
+        self._segment = segment
+        self._writable = writable
+        self._max_load = max_load
+        self._timeout = timeout
+
+        # the first segment keeps its name for the life of the map, and
+        # points at the segment currently holding the table
+        self._root = segment
+        self._load_header()
+
+    @classmethod
+    def create(cls, capacity: int = 1024, function='fnv1a',
+               data_size: int = 1 << 16, name: str = None,
+               path: str = None, max_load: float = .5) -> "SharedHashMap":
+        """
+        Creates an empty map that this process can write to.
+        :param capacity: integer minimum capacity, rounded up to a power
+            of two
+        :param function: registered name of a hash function, or the
+            function itself. It must give the same hashes in every
+            process, so 'builtin' cannot be used, and put refuses keys
+            that 'multiplicative' hashes with the builtin hash()
+        :param data_size: integer bytes reserved for encoded keys and
+            values, grown as needed
+        :param name: shared memory name readers attach by, none for a
+            new unique name (see the name attribute)
+        :param path: file to map instead of shared memory
+        :param max_load: load factor, counting tombstones, at which put
+            grows the table
+        :return: new SharedHashMap
+        """
+        check_load_factors(max_load, 2, 0, limit=1)
+        if not isinstance(function, str):
+            function = hash_function_name(function)
+        if function is None or function in PROCESS_LOCAL_FUNCTIONS:
+            raise ValueError("hash function must be registered and give "
+                             "the same hashes in every process")
+        get_hash_function(function)
+
+        capacity = next_power_of_two(capacity)
+        segment = cls._new_segment(name, path, capacity, data_size, function)
+
+        return cls(segment, True, max_load)
+
+    @classmethod
+    def from_pairs(cls, pairs, **options) -> "SharedHashMap":
+        """
+        Creates a map holding every key/value pair from an iterable, for
+        example the items() of another HashMap, sized so the table does
+        not grow while it is filled.
+        :param pairs: iterable of (key, value) tuples
+        :param options: other create arguments
+        :return: new SharedHashMap
+        """
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+
+        max_load = options.get('max_load', .5)
+        options['capacity'] = fit_capacity(options.get('capacity', 16),
+                                           len(pairs), max_load, POWER_OF_TWO)
+        options.setdefault('data_size', max(
+            sum(len(encode(key)) + len(encode(value))
+                for key, value in pairs), 1))
+
+        map = cls.create(**options)
+        map.put_many(pairs)
+
+        return map
+
+    @classmethod
+    def attach(cls, name: str = None, path: str = None,
+               timeout: float = 1.0) -> "SharedHashMap":
+        """
+        Attaches read-only to a map created by another process. Nothing
+        is copied: get and contains_key read the shared slots directly.
+        :param name: shared memory name of the map
+        :param path: file of the map, instead of name
+        :param timeout: seconds a read waits for one write, or for a
+            replacement table to appear, before raising RuntimeError
+        :return: SharedHashMap that can only be read
+        """
+        if timeout <= 0:
+            raise ValueError(f"timeout must be positive, not {timeout}")
+
+        return cls(_Segment(name, path), False, timeout=timeout)
+
+    @staticmethod
+    def _new_segment(name: str, path: str, capacity: int, data_size: int,
+                     function: str) -> _Segment:
+        """
+        Creates a zeroed segment with its header filled in.
+        """
+        segment = _Segment(name, path, _segment_size(capacity, data_size),
+                           create=True)
+        _HEADER.pack_into(segment.buffer, 0, _MAGIC, _FORMAT_VERSION,
+                          function.encode(), b'')
+        _COUNTERS.pack_into(segment.buffer, _COUNTERS_OFFSET,
+                            0, capacity, 0, 0, 0, data_size, 0)
+
+        return segment
+
+    def _load_header(self) -> None:
+        """
+        Reads the fixed fields of the current segment.
+        :return: none
+        """
+        buffer = self._segment.buffer
+        magic, version, function, _ = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"{self._segment.name} is not a SharedHashMap")
+
+        self._function_name = function.rstrip(b'\0').decode()
+        self._hash_function = get_hash_function(self._function_name)
+
+        counters = _COUNTERS.unpack_from(buffer, _COUNTERS_OFFSET)
+        self._capacity = counters[1]
+        self._data_size = counters[5]
+        self._shift = mix_shift(self._capacity)
+        self._data_offset = _SLOTS_OFFSET + self._capacity * _SLOT.size
+
+        # writer keeps its own copies of the changing counters
+        self._sequence, _, self._size, self._tombstones, self._data_used = \
+            counters[:5]
+
+    def _write_counters(self) -> None:
+        """
+        Publishes the writer's counters to the segment.
+        :return: none
+        """
+        _COUNTERS.pack_into(self._segment.buffer, _COUNTERS_OFFSET,
+                            self._sequence, self._capacity, self._size,
+                            self._tombstones, self._data_used,
+                            self._data_size, 0)
+
+    def _begin_write(self) -> None:
+        """
+        Makes the sequence odd, telling readers a write is under way.
+        :return: none
+        """
+        if not self._writable:
+            raise RuntimeError("map was attached read-only")
+        self._sequence += 1
+        self._write_counters()
+
+    def _end_write(self) -> None:
+        """
+        Makes the sequence even again, publishing the write.
+        :return: none
+        """
+        self._sequence += 1
+        self._write_counters()
+
+    def _follow(self) -> None:
+        """
+        Moves a reader to the segment that replaced its current one
+        after the writer resized the table.
+        :return: none
+        """
+        buffer = self._segment.buffer
+        if not buffer[_COUNTERS_OFFSET + _COUNTERS.size - 1]:
+            return
+
+        # the root segment, or the file path, names the current table,
+        # which a writer that died while resizing may never publish
+        deadline = time.monotonic() + self._timeout
+        while True:
+            if self._root.path is not None:
+                name, path = None, self._root.path
+            else:
+                forward = _HEADER.unpack_from(self._root.buffer, 0)[3]
+                name, path = forward.rstrip(b'\0').decode(), None
+            try:
+                segment = _Segment(name, path)
+            except FileNotFoundError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"table replacing "
+                                       f"{self._segment.name} did not "
+                                       f"appear within {self._timeout} s")
+                time.sleep(0)
+                continue
+            break
+
+        if self._segment is not self._root:
+            self._segment.close()
+        self._segment = segment
+        self._load_header()
+
+    def _read(self, method, *args):
+        """
+        Runs a read-only method, retrying it if the writer changed the
+        table while it ran. The writer itself never has to retry.
+        :param method: bound method reading the table
+        :param args: arguments of method
+        :return: result of method
+        """
+        if self._writable:
+            return method(*args)
+
+        # odd sequence being waited on, and when waiting on it started
+        waiting, since = None, 0.0
+        while True:
+            self._follow()
+            buffer = self._segment.buffer
+            sequence = _INT64.unpack_from(buffer, _COUNTERS_OFFSET)[0]
+            if sequence & 1:
+                # a write taking longer than timeout means the writer
+                # died during it, and the sequence will stay odd for good
+                if sequence != waiting:
+                    waiting, since = sequence, time.monotonic()
+                elif time.monotonic() - since > self._timeout:
+                    raise RuntimeError(f"writer of {self.name} left a write "
+                                       f"unfinished for {self._timeout} s, "
+                                       f"it may have died mid-write")
+
+                # let the writer finish instead of spinning on its write
+                time.sleep(0)
+                continue
+
+            try:
+                result = method(*args)
+            except (IndexError, ValueError, struct.error,
+                    pickle.UnpicklingError):
+                # a half-written slot, retried below
+                result = None
+
+            if _INT64.unpack_from(buffer, _COUNTERS_OFFSET)[0] == sequence \
+                    and not buffer[_COUNTERS_OFFSET + _COUNTERS.size - 1]:
+                return result
+
+    @property
+    def name(self) -> str:
+        """
+        Shared memory name, or file path, that readers attach by.
+        """
+        return self._root.name
+
+    def __enter__(self) -> "SharedHashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Unmaps the map in this process. The writer's shared memory stays
+        until unlink is called.
+        :return: none
+        """
+        if self._segment is not self._root:
+            self._segment.close()
+        self._root.close()
+
+    def unlink(self) -> None:
+        """
+        Removes the map's shared memory, called once by the writer when
+        no new reader needs to attach. Files are left in place.
+        :return: none
+        """
+        if self._segment is not self._root:
+            self._segment.unlink()
+        self._root.unlink()
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        if self._writable:
+            return self._size
+        self._follow()
+        return _COUNTERS.unpack_from(self._segment.buffer,
+                                     _COUNTERS_OFFSET)[2]
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        if not self._writable:
+            self._follow()
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: bytes, hash: int) -> int:
+        """
+        Finds the slot holding an encoded key, comparing cached hashes
+        and then the key bytes in place.
+        :param key: encoded key
+        :param hash: integer hash of key
+        :return: integer index of slot if found, otherwise -1 minus the
+            first free slot passed, or minus capacity if there was none
+        """
+        buffer = self._segment.buffer
+        capacity, data_offset = self._capacity, self._data_offset
+        mask = capacity - 1
+        index = (hash * MIX_MULTIPLIER) >> self._shift & mask
+        free = -1
+        unpack = _SLOT.unpack_from
+        key_length = len(key)
+
+        # triangular steps visit every slot of a power of two table
+        for step in range(1, capacity + 1):
+            state, length, _, offset, slot_hash = \
+                unpack(buffer, _SLOTS_OFFSET + index * _SLOT.size)
+            if state == _EMPTY:
+                return -1 - (index if free < 0 else free)
+            if state == _TOMBSTONE:
+                if free < 0:
+                    free = index
+            elif slot_hash == hash and length == key_length:
+                start = data_offset + offset
+                if buffer[start:start + length] == key:
+                    return index
+            index = (index + step) & mask
+
+        return -1 - (capacity if free < 0 else free)
+
+    def _get(self, key, default):
+        """
+        Returns the value of key, or default, from the current segment.
+        """
+        index = self._find(encode(key), self._hash_function(key))
+        if index < 0:
+            return default
+
+        buffer = self._segment.buffer
+        _, key_length, value_length, offset, _ = \
+            _SLOT.unpack_from(buffer, _SLOTS_OFFSET + index * _SLOT.size)
+
+        return decode(buffer, self._data_offset + offset + key_length,
+                       value_length)
+
+    def get(self, key: str, default: object = None):
+        """
+        Returns the value corresponding to the given key
+        :param key: string representing key
+        :param default: value returned if key is not in map
+        :return: value if key found, default if not found
+        """
+        return self._read(self._get, key, default)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if key is found in map.
+        :param key: string representing key to be found
+        :return: true if map contains key, false if not
+        """
+        return self._read(self._contains, key)
+
+    def _contains(self, key) -> bool:
+        """
+        Checks the current segment for key.
+        """
+        return self._find(encode(key), self._hash_function(key)) >= 0
+
+    def get_many(self, keys, default: object = None) -> list:
+        """
+        Returns the values corresponding to a batch of keys.
+        :param keys: iterable of keys
+        :param default: value returned for keys not in map
+        :return: list of values, in the order of keys
+        """
+        return [self.get(key, default) for key in keys]
+
+    def contains_many(self, keys) -> list:
+        """
+        Checks if each key of a batch is found in map.
+        :param keys: iterable of keys
+        :return: list of booleans, in the order of keys
+        """
+        return [self.contains_key(key) for key in keys]
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Adds key/value pair to map. If map already contains key,
+        updates value of key. Only the process that created the map may
+        call this.
+        :param key: string representing key
+        :param value: value to be added/updated
+        :return: none
+        """
+        if not self._writable:
+            raise RuntimeError("map was attached read-only")
+
+        # readers in other processes must compute the same hash
+        if not is_portable(self._function_name, key):
+            raise ValueError(f"hash function {self._function_name!r} "
+                             f"gives keys of type {type(key).__name__} "
+                             f"different hashes in each process")
+
+        encoded_key, encoded_value = encode(key), encode(value)
+        hash = self._hash_function(key)
+        index = self._find(encoded_key, hash)
+        new = index < 0
+
+        # rebuild before adding if the slots or the data region are full
+        needed = len(encoded_key) + len(encoded_value)
+        full = new and (self._size + self._tombstones + 1
+                        > self._capacity * self._max_load)
+        if full or self._data_used + needed > self._data_size:
+            capacity = self._capacity
+            if full and self._size + 1 > capacity * self._max_load / 2:
+                capacity *= 2
+            self._rebuild(capacity, needed)
+            index = self._find(encoded_key, hash)
+
+        # the key and value are written past the used data before the
+        # slot points at them, old values are left until the next rebuild
+        self._begin_write()
+        buffer = self._segment.buffer
+        start = self._data_offset + self._data_used
+        buffer[start:start + needed] = encoded_key + encoded_value
+
+        if index < 0:
+            index = -1 - index
+            slot_offset = _SLOTS_OFFSET + index * _SLOT.size
+            if buffer[slot_offset] == _TOMBSTONE:
+                self._tombstones -= 1
+            self._size += 1
+        _SLOT.pack_into(buffer, _SLOTS_OFFSET + index * _SLOT.size, _FULL,
+                        len(encoded_key), len(encoded_value),
+                        self._data_used, hash)
+        self._data_used += needed
+        self._end_write()
+
+    def put_many(self, pairs) -> None:
+        """
+        Adds every key/value pair from an iterable to map.
+        :param pairs: iterable of (key, value) tuples
+        :return: none
+        """
+        for key, value in pairs:
+            self.put(key, value)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the pair corresponding to key from map, leaving a
+        tombstone in its slot.
+        :param key: key corresponding to pair to be removed
+        :return: none
+        """
+        if not self._writable:
+            raise RuntimeError("map was attached read-only")
+
+        index = self._find(encode(key), self._hash_function(key))
+        if index < 0:
+            return
+
+        self._begin_write()
+        self._segment.buffer[_SLOTS_OFFSET + index * _SLOT.size] = _TOMBSTONE
+        self._size -= 1
+        self._tombstones += 1
+        self._end_write()
+
+    def clear(self) -> None:
+        """
+        Empties the map while maintaining capacity.
+        :return: none
+        """
+        self._rebuild(self._capacity, 0, keep=False)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes map to new capacity, rounded up to a power of two and
+        grown further if the current pairs would overfill it.
+        :param new_capacity: integer representing new capacity
+        :return: none
+        """
+        if not self._writable:
+            raise RuntimeError("map was attached read-only")
+        if new_capacity < self._size:
+            return
+
+        self._rebuild(next_power_of_two(new_capacity), 0)
+
+    def _rebuild(self, capacity: int, extra: int, keep: bool = True) -> None:
+        """
+        Copies the live pairs into a new segment, dropping tombstones and
+        old values, and retires the current segment. Key and value bytes
+        are copied as they are and cached hashes are reused. Readers
+        move to the new segment on their next operation.
+        :param capacity: integer power of two capacity of new segment
+        :param extra: integer bytes of data the caller is about to add
+        :param keep: if false, the new segment is left empty
+        :return: none
+        """
+        if not self._writable:
+            raise RuntimeError("map was attached read-only")
+
+        capacity = fit_capacity(capacity, self._size if keep else 0,
+                                self._max_load, POWER_OF_TWO)
+        old, old_data = self._segment, self._data_offset
+        buffer = old.buffer
+
+        # live data plus the new pair, with room for as much again
+        live = [_SLOT.unpack_from(buffer, _SLOTS_OFFSET + index * _SLOT.size)
+                for index in range(self._capacity)] if keep else []
+        live = [slot for slot in live if slot[0] == _FULL]
+        used = sum(slot[1] + slot[2] for slot in live)
+        data_size = max(2 * (used + extra), self._data_size if keep else 0,
+                        1 << 10)
+
+        # a file is replaced in place, shared memory gets a new name
+        if self._root.path is not None:
+            path = self._root.path + '.new'
+            segment = self._new_segment(None, path, capacity, data_size,
+                                        self._function_name)
+        else:
+            segment = self._new_segment(None, None, capacity, data_size,
+                                        self._function_name)
+
+        new_buffer = segment.buffer
+        data_offset = _SLOTS_OFFSET + capacity * _SLOT.size
+        mask = capacity - 1
+        shift = mix_shift(capacity)
+        position = 0
+        for _, key_length, value_length, offset, hash in live:
+            index = (hash * MIX_MULTIPLIER) >> shift & mask
+            step = 1
+            while new_buffer[_SLOTS_OFFSET + index * _SLOT.size] != _EMPTY:
+                index = (index + step) & mask
+                step += 1
+
+            length = key_length + value_length
+            start = old_data + offset
+            new_buffer[data_offset + position:
+                       data_offset + position + length] = \
+                buffer[start:start + length]
+            _SLOT.pack_into(new_buffer, _SLOTS_OFFSET + index * _SLOT.size,
+                            _FULL, key_length, value_length, position, hash)
+            position += length
+
+        _COUNTERS.pack_into(new_buffer, _COUNTERS_OFFSET, 0, capacity,
+                            len(live), 0, position, data_size, 0)
+
+        # publish the new segment, then mark the old one retired
+        if self._root.path is not None:
+            segment.buffer.flush()
+            os.replace(segment.path, self._root.path)
+            segment.path = segment.name = self._root.path
+        else:
+            _HEADER.pack_into(self._root.buffer, 0, _MAGIC, _FORMAT_VERSION,
+                              self._function_name.encode(),
+                              segment.name.encode())
+        buffer[_COUNTERS_OFFSET + _COUNTERS.size - 1] = 1
+
+        # the root keeps the shared memory name alive, other retired
+        # blocks lose their name but stay mapped by any reader using them
+        if old is not self._root:
+            old.unlink()
+            old.close()
+        elif self._root.path is not None:
+            self._root = segment
+            old.close()
+
+        self._segment = segment
+        self._load_header()
+
+    def table_load(self) -> float:
+        """
+        Returns the hash table load factor.
+        :return: float representing load factor
+        """
+        return self.get_size() / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets in map
+        :return: integer value of empty buckets
+        """
+        if self._writable:
+            return self._capacity - self._size - self._tombstones
+
+        self._follow()
+        counters = _COUNTERS.unpack_from(self._segment.buffer,
+                                         _COUNTERS_OFFSET)
+        return counters[1] - counters[2] - counters[3]
+
+    def stats(self) -> dict:
+        """
+        Returns the counters stored in the segment header.
+        :return: dictionary with size, capacity, table_load,
+            empty_buckets, tombstones, data_used and data_size
+        """
+        if not self._writable:
+            self._follow()
+        _, capacity, size, tombstones, data_used, data_size, _ = \
+            _COUNTERS.unpack_from(self._segment.buffer, _COUNTERS_OFFSET)
+
+        return {
+            'size': size,
+            'capacity': capacity,
+            'table_load': size / capacity,
+            'empty_buckets': capacity - size - tombstones,
+            'tombstones': tombstones,
+            'data_used': data_used,
+            'data_size': data_size,
+        }
+
+    def _items(self) -> list:
+        """
+        Decodes every pair of the current segment.
+        """
+        buffer = self._segment.buffer
+        data_offset = self._data_offset
+        pairs = []
+        for index in range(self._capacity):
+            state, key_length, value_length, offset, _ = \
+                _SLOT.unpack_from(buffer, _SLOTS_OFFSET + index * _SLOT.size)
+            if state == _FULL:
+                start = data_offset + offset
+                pairs.append((decode(buffer, start, key_length),
+                              decode(buffer, start + key_length,
+                                      value_length)))
+
+        return pairs
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns Dynamic Array containing all key/value pairs in map
+        :return: Dynamic Array containing tuples
+        """
+        return DynamicArray(self._read(self._items))
+
+    def items(self):
+        """
+        Returns the key/value pairs in map, decoded when iteration
+        starts so the writer cannot change them part way.
+        :return: generator of (key, value) tuples
+        """
+        yield from self._read(self._items)
+
+    def keys(self):
+        """
+        Returns the keys in map.
+        :return: generator of keys
+        """
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        """
+        Returns the values in map.
+        :return: generator of values
+        """
+        for _, value in self.items():
+            yield value
+
+    def __iter__(self):
+        """
+        Iterate through the keys of map
+        :return: generator of keys
+        """
+        return self.keys()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import multiprocessing
+    import subprocess
+    import sys
+
+    def reader(name: str, keys: list, results) -> None:
+        with SharedHashMap.attach(name) as shared:
+            results.put([shared.get(key) for key in keys])
+
+    print("\nShared memory map read by other processes")
+    print("-----------------------------------------")
+    with SharedHashMap.from_pairs(('str' + str(i), i * 100)
+                                  for i in range(1000)) as m:
+        queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=reader,
+                                             args=(m.name, ['str1', 'str999',
+                                                            'missing'], queue))
+                     for _ in range(3)]
+        for process in processes:
+            process.start()
+        for _ in processes:
+            print(queue.get())
+        for process in processes:
+            process.join()
+
+        # the writer grows the table, readers follow it
+        for i in range(1000, 3000):
+            m.put('str' + str(i), i * 100)
+        m.remove('str1')
+        process = multiprocessing.Process(target=reader,
+                                          args=(m.name, ['str1', 'str2999'],
+                                                queue))
+        process.start()
+        print(queue.get(), m.get_size(), m.get_capacity())
+        process.join()
+
+        # a write left unfinished, as by a writer that died during it
+        m._begin_write()
+        start = time.monotonic()
+        with SharedHashMap.attach(m.name, timeout=.2) as shared:
+            try:
+                shared.get('str2')
+            except RuntimeError as error:
+                print(f"after {time.monotonic() - start:.1f} s: {error}")
+        m._end_write()
+        m.unlink()
+
+    print("\nMultiplicative map read under another string hash seed")
+    print("-------------------------------------------------------")
+    with SharedHashMap.from_pairs((('str' + str(i), i) for i in range(1000)),
+                                  function='multiplicative') as m:
+        code = ("import sys\n"
+                "from hash_map_shared import SharedHashMap\n"
+                "with SharedHashMap.attach(sys.argv[1]) as m:\n"
+                "    print([m.get(key) for key in ('str1', b'missing')])")
+        seed = '2' if os.environ.get('PYTHONHASHSEED') == '1' else '1'
+        environment = dict(os.environ, PYTHONHASHSEED=seed)
+        print(subprocess.run([sys.executable, '-c', code, m.name],
+                             env=environment, check=True, capture_output=True,
+                             text=True).stdout.strip())
+
+        try:
+            m.put(('str', 1), 1)
+        except ValueError as error:
+            print(error)
+        m.unlink()
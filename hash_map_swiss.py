@@ -0,0 +1,600 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Implementation of hashmap in the style of a Swiss table:
+# a control byte array holding 7 bits of each hash, scanned a group of
+# slots at a time, next to parallel slot arrays
+
+import time
+
+from a6_include import (DynamicArray, HashEntry,
+                        hash_function_1, hash_function_2)
+from hash_capacity import (MIX_MULTIPLIER, POWER_OF_TWO, check_load_factors,
+                           fit_capacity, mix_shift, next_power_of_two)
+from hash_functions import batch_array, get_hash_function, hash_batch
+
+
+# number of slots whose control bytes are scanned together
+GROUP_SIZE = 16
+
+# control byte values, full slots hold 7 bits of their hash (0 to 127)
+_EMPTY = 0x80
+_DELETED = 0xFE
+
+# stands in for the value of keys not found by batch lookups
+_MISSING = object()
+
+
+class HashMap:
+    def __init__(self, capacity: int, function,
+                 max_load: float = .875,
+                 growth: float = 2) -> None:
+        """
+        Initialize new HashMap that uses group probing over an
+        array of control bytes for collision resolution
+        :param capacity: integer minimum capacity, rounded up to a power
+            of two of at least GROUP_SIZE slots
+        :param function: hash function, or the name it is registered
+            under in hash_functions
+        :param max_load: load factor, counting deleted slots, at which
+            put grows or cleans up the table
+        :param growth: multiplier applied to capacity when growing
+        """
+        check_load_factors(max_load, growth, 0, limit=1)
+        self._max_load = max_load
+        self._growth = growth
+
+        self._set_capacity(capacity)
+        self._allocate()
+
+        # hash function may be given by its registered name
+        if isinstance(function, str):
+            function = get_hash_function(function)
+        self._hash_function = function
+
+        # counts changes to the set of keys or the slot layout, so
+        # iterators can tell the map changed under them
+        self._version = 0
+
+        self._resizes = 0
+        self._resize_seconds = 0.0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            out += str(i) + ': ' + str(self._entry(i)) + '\n'
+        return out
+
+    def _set_capacity(self, capacity: int) -> None:
+        """
+        Sets capacity, rounded up to a power of two number of groups,
+        and the shift that picks a group from a mixed hash.
+        :param capacity: integer minimum capacity
+        :return: none
+        """
+        groups = next_power_of_two(-(-capacity // GROUP_SIZE))
+        self._capacity = groups * GROUP_SIZE
+        self._group_mask = groups - 1
+        self._shift = mix_shift(groups)
+
+    def _allocate(self) -> None:
+        """
+        Creates empty control bytes and slot arrays for the current
+        capacity. Each slot has a cached hash, key and value.
+        :return: none
+        """
+        self._control = bytearray([_EMPTY]) * self._capacity
+        self._hashes = [0] * self._capacity
+        self._keys = [None] * self._capacity
+        self._values = [None] * self._capacity
+        self._size = 0
+        self._deleted = 0
+
+    def _entry(self, index: int) -> HashEntry:
+        """
+        Builds a HashEntry for the slot at index.
+        :param index: integer representing slot index
+        :return: HashEntry, or none if slot is empty
+        """
+        control = self._control[index]
+        if control == _EMPTY:
+            return None
+
+        entry = HashEntry(self._keys[index], self._values[index])
+        entry.is_tombstone = control == _DELETED
+        return entry
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str, hash: int) -> int:
+        """
+        Finds the slot holding key. Each group of control bytes is
+        scanned in one call for bytes equal to the 7 bit tag of hash,
+        and only those slots have their cached hash and key compared.
+        A group with an empty slot ends the search, so most misses are
+        decided from the control bytes alone.
+        :param key: string representing key
+        :param hash: integer hash of key
+        :return: integer index of slot, -1 if key not in map
+        """
+        control, hashes, keys = self._control, self._hashes, self._keys
+        group_mask = self._group_mask
+
+        # top bits of the mixed hash pick the first group, the 7 bits
+        # below them are the tag stored in the control byte
+        mixed = hash * MIX_MULTIPLIER
+        group = mixed >> self._shift & group_mask
+        tag = mixed >> (self._shift - 7) & 0x7F
+
+        # groups are probed by triangular numbers, which visits every
+        # group of a power of two table
+        for step in range(1, group_mask + 2):
+            start = group * GROUP_SIZE
+            end = start + GROUP_SIZE
+
+            index = control.find(tag, start, end)
+            while index >= 0:
+                if hashes[index] == hash and keys[index] == key:
+                    return index
+                index = control.find(tag, index + 1, end)
+
+            if control.find(_EMPTY, start, end) >= 0:
+                return -1
+
+            group = (group + step) & group_mask
+
+        return -1
+
+    def _free_slot(self, hash: int) -> int:
+        """
+        Returns the first empty or deleted slot on the probe sequence of
+        hash. The table always has one, since it is never full.
+        :param hash: integer hash of key
+        :return: integer index of slot
+        """
+        control = self._control
+        group_mask = self._group_mask
+        group = hash * MIX_MULTIPLIER >> self._shift & group_mask
+
+        for step in range(1, group_mask + 2):
+            start = group * GROUP_SIZE
+            end = start + GROUP_SIZE
+
+            empty = control.find(_EMPTY, start, end)
+            deleted = control.find(_DELETED, start, end)
+            if empty >= 0 or deleted >= 0:
+                if empty < 0 or 0 <= deleted < empty:
+                    return deleted
+                return empty
+
+            group = (group + step) & group_mask
+
+        return -1
+
+    def _store(self, index: int, hash: int, key: str, value: object) -> None:
+        """
+        Stores a new entry in a free slot and counts it.
+        :param index: integer index of an empty or deleted slot
+        :param hash: integer hash of key
+        :param key: string representing key
+        :param value: value to be stored
+        :return: none
+        """
+        if self._control[index] == _DELETED:
+            self._deleted -= 1
+
+        self._control[index] = \
+            hash * MIX_MULTIPLIER >> (self._shift - 7) & 0x7F
+        self._hashes[index] = hash
+        self._keys[index] = key
+        self._values[index] = value
+        self._size += 1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Adds key/value pair to map. If map already contains key,
+        updates value of key.
+        :param key: string representing key
+        :param value: value to be added/updated
+        :return: none
+        """
+        self._insert(key, value, self._hash_function(key))
+
+    def _insert(self, key: str, value: object, hash: int) -> None:
+        """
+        Adds or updates key/value pair, growing the table or clearing
+        deleted slots first if a new key would pass max_load.
+        :param key: string representing key
+        :param value: value to be added/updated
+        :param hash: integer hash of key
+        :return: none
+        """
+        index = self._find(key, hash)
+
+        # key in map
+        if index >= 0:
+            self._values[index] = value
+            return
+
+        # deleted slots count towards the load, since they lengthen
+        # probe sequences just like full ones
+        if self._size + self._deleted + 1 > self._capacity * self._max_load:
+            if self._size + 1 > self._capacity * self._max_load / 2:
+                self._rehash(int(self._capacity * self._growth))
+            else:
+                self._rehash(self._capacity)
+
+        self._store(self._free_slot(hash), hash, key, value)
+        self._version += 1
+
+    def put_many(self, pairs) -> None:
+        """
+        Adds every key/value pair from an iterable to map. The table is
+        resized at most once, before any pair is added.
+        :param pairs: iterable of (key, value) tuples
+        :return: none
+        """
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+
+        # grow once to the capacity the whole load needs
+        count = self._size + self._deleted + len(pairs)
+        capacity = fit_capacity(self._capacity, count, self._max_load,
+                                POWER_OF_TWO)
+        if capacity != self._capacity:
+            self.resize_table(capacity)
+
+        keys, hashes = hash_batch(self._hash_function,
+                                  [pair[0] for pair in pairs])
+        for key, hash, pair in zip(keys, hashes, pairs):
+            self._insert(key, pair[1], hash)
+
+    @classmethod
+    def from_pairs(cls, pairs, capacity: int = 16,
+                   function=hash_function_1, **options) -> "HashMap":
+        """
+        Creates a new map holding every key/value pair from an iterable.
+        Slots are allocated once, at the final capacity.
+        :param pairs: iterable of (key, value) tuples
+        :param capacity: integer representing minimum capacity
+        :param function: hash function used by the new map
+        :param options: other HashMap constructor arguments
+        :return: new HashMap
+        """
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+
+        max_load = options.get('max_load', .875)
+        map = cls(fit_capacity(capacity, len(pairs), max_load, POWER_OF_TWO),
+                  function, **options)
+        map.put_many(pairs)
+
+        return map
+
+    def table_load(self) -> float:
+        """
+        Returns the hash table load factor.
+        :return: float representing load factor
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets in map
+        :return: integer value of empty buckets
+        """
+        return self._capacity - self._size - self._deleted
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes map to new capacity, rounded up to a power of two
+        number of groups. Cached hashes are reused, so keys are not
+        rehashed.
+        :param new_capacity: integer representing new capacity
+        :return: none
+        """
+        if new_capacity < self._size:
+            return
+
+        # grow further if the current pairs would overfill new capacity
+        self._rehash(fit_capacity(new_capacity, self._size, self._max_load,
+                                  POWER_OF_TWO))
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every entry into new arrays of new capacity, dropping
+        deleted slots.
+        :param new_capacity: integer representing new capacity
+        :return: none
+        """
+        start = time.perf_counter()
+
+        # keep arrays of current map
+        control, hashes = self._control, self._hashes
+        keys, values = self._keys, self._values
+        size = self._size
+        self._version += 1
+
+        self._set_capacity(new_capacity)
+        self._allocate()
+        new_control, new_hashes = self._control, self._hashes
+        new_keys, new_values = self._keys, self._values
+        shift, group_mask = self._shift, self._group_mask
+
+        # keys are unique, so only an empty slot has to be found
+        for index in range(len(control)):
+            if control[index] >= _EMPTY:
+                continue
+
+            hash = hashes[index]
+            mixed = hash * MIX_MULTIPLIER
+            group = mixed >> shift & group_mask
+            step = 1
+            while True:
+                start_slot = group * GROUP_SIZE
+                slot = new_control.find(_EMPTY, start_slot,
+                                        start_slot + GROUP_SIZE)
+                if slot >= 0:
+                    break
+                group = (group + step) & group_mask
+                step += 1
+
+            new_control[slot] = mixed >> (shift - 7) & 0x7F
+            new_hashes[slot] = hash
+            new_keys[slot] = keys[index]
+            new_values[slot] = values[index]
+
+        self._size = size
+        self._resizes += 1
+        self._resize_seconds += time.perf_counter() - start
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value corresponding to the given key
+        :param key: string representing key
+        :return: value if key found, none if not found
+        """
+        index = self._find(key, self._hash_function(key))
+        if index < 0:
+            return None
+
+        return self._values[index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if key is found in map.
+        :param key: string representing key to be found
+        :return: true if map contains key, false if not
+        """
+        return self._find(key, self._hash_function(key)) >= 0
+
+    def remove(self, key: str) -> None:
+        """
+        Removes node corresponding to key from map.
+        :param key: key corresponding to node to be removed
+        :return: none
+        """
+        self._remove(key, self._hash_function(key))
+
+    def _remove(self, key: str, hash: int) -> None:
+        """
+        Removes node corresponding to key from map. The slot becomes
+        empty again if its group has another empty slot, since no probe
+        sequence can then have passed through the group.
+        :param key: key corresponding to node to be removed
+        :param hash: integer hash of key
+        :return: none
+        """
+        index = self._find(key, hash)
+
+        # key not in map
+        if index < 0:
+            return
+
+        start = index - index % GROUP_SIZE
+        if self._control.find(_EMPTY, start, start + GROUP_SIZE) >= 0:
+            self._control[index] = _EMPTY
+        else:
+            self._control[index] = _DELETED
+            self._deleted += 1
+
+        self._keys[index] = self._values[index] = None
+        self._size -= 1
+        self._version += 1
+
+    def get_many(self, keys, default: object = None,
+                 as_array: bool = False):
+        """
+        Returns the values corresponding to a batch of keys. Every key
+        is hashed before any group is scanned.
+        :param keys: iterable of keys, or a NumPy array
+        :param default: value returned for keys not in map
+        :param as_array: if true, return a NumPy array instead of a list
+        :return: list or NumPy array of values, in the order of keys
+        """
+        keys, hashes = hash_batch(self._hash_function, keys)
+        find, values = self._find, self._values
+        results = []
+        for key, hash in zip(keys, hashes):
+            index = find(key, hash)
+            results.append(default if index < 0 else values[index])
+
+        return batch_array(results) if as_array else results
+
+    def contains_many(self, keys, as_array: bool = False):
+        """
+        Checks if each key of a batch is found in map. Every key is
+        hashed before any group is scanned.
+        :param keys: iterable of keys, or a NumPy array
+        :param as_array: if true, return a NumPy array instead of a list
+        :return: list or NumPy array of booleans, in the order of keys
+        """
+        keys, hashes = hash_batch(self._hash_function, keys)
+        find = self._find
+        found = [find(key, hash) >= 0 for key, hash in zip(keys, hashes)]
+
+        return batch_array(found) if as_array else found
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key of a batch from map. Every key is hashed
+        before any group is scanned.
+        :param keys: iterable of keys, or a NumPy array
+        :return: none
+        """
+        keys, hashes = hash_batch(self._hash_function, keys)
+        for key, hash in zip(keys, hashes):
+            self._remove(key, hash)
+
+    def clear(self) -> None:
+        """
+        Empties buckets while maintaining capacity.
+        :return: none
+        """
+        self._allocate()
+        self._version += 1
+
+    def stats(self) -> dict:
+        """
+        Returns counters kept up to date by the map operations.
+        :return: dictionary with size, capacity, table_load,
+            empty_buckets, tombstones, resizes and resize_seconds
+        """
+        return {
+            'size': self._size,
+            'capacity': self._capacity,
+            'table_load': self.table_load(),
+            'empty_buckets': self.empty_buckets(),
+            'tombstones': self._deleted,
+            'resizes': self._resizes,
+            'resize_seconds': self._resize_seconds,
+        }
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns Dynamic Array containing all key/value pairs in map
+        :return: Dynamic Array containing tuples
+        """
+        key_arr = DynamicArray()
+
+        # add each pair of map to array
+        for pair in self.items():
+            key_arr.append(pair)
+
+        return key_arr
+
+    def _full_slots(self):
+        """
+        Yields the index of every full slot. Raises RuntimeError if keys
+        are added or removed, or the table is resized, while the indices
+        are being yielded.
+        :return: generator of integer indices
+        """
+        version = self._version
+        control = self._control
+
+        for index in range(self._capacity):
+            if control[index] < _EMPTY:
+                yield index
+                if self._version != version:
+                    raise RuntimeError("HashMap changed during iteration")
+
+    def keys(self):
+        """
+        Returns a lazy view of the keys in map. Each call gets its own
+        generator, and no pairs are copied.
+        :return: generator of keys
+        """
+        keys = self._keys
+        for index in self._full_slots():
+            yield keys[index]
+
+    def values(self):
+        """
+        Returns a lazy view of the values in map. Each call gets its own
+        generator, and no pairs are copied.
+        :return: generator of values
+        """
+        values = self._values
+        for index in self._full_slots():
+            yield values[index]
+
+    def items(self):
+        """
+        Returns a lazy view of the key/value pairs in map. Each call gets
+        its own generator, and no pairs are copied.
+        :return: generator of (key, value) tuples
+        """
+        keys, values = self._keys, self._values
+        for index in self._full_slots():
+            yield keys[index], values[index]
+
+    def __iter__(self):
+        """
+        Iterate through the keys of map
+        :return: generator of keys
+        """
+        return self.keys()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - put example 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - put example 2")
+    print("-------------------")
+    m = HashMap(41, hash_function_2)
+    for i in range(50):
+        m.put('str' + str(i // 3), i * 100)
+        if i % 10 == 9:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - remove example 1")
+    print("----------------------")
+    m = HashMap(53, hash_function_1)
+    print(m.get('key1'))
+    m.put('key1', 10)
+    print(m.get('key1'))
+    m.remove('key1')
+    print(m.get('key1'))
+    m.remove('key4')
+
+    print("\nPDF - get_keys_and_values example 1")
+    print("------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    print(m.get_keys_and_values())
+
+    m.resize_table(2)
+    print(m.get_keys_and_values())
+
+    m.put('20', '200')
+    m.remove('1')
+    m.resize_table(12)
+    print(m.get_keys_and_values())
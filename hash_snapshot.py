@@ -0,0 +1,334 @@
+# Name: Paige Knickerbocker
+# OSU Email: knickerp@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Due Date: 08-15-2023
+# Description: Compact binary snapshot format for the hash maps, storing
+# capacity, hash function name, cached hashes and the bucket or slot
+# layout, with lazy loading through mmap
+
+import json
+import mmap
+import pickle
+import struct
+
+from hash_functions import (PORTABLE_KEY_TYPES, PROCESS_LOCAL_FUNCTIONS,
+                            get_hash_function, hash_function_name,
+                            is_portable)
+
+
+# type tags of encoded keys and values
+_NONE = 0
+_BYTES = 1
+_STR = 2
+_INT = 3
+_FLOAT = 4
+_PICKLE = 5
+
+_INT64 = struct.Struct('<q')
+_FLOAT64 = struct.Struct('<d')
+
+_MAGIC = b'HSNP'
+_FORMAT_VERSION = 1
+
+# magic, format version, capacity, size, number of entries, length of
+# the JSON settings, length of the table section, length of the map kind
+_HEADER = struct.Struct('<4sIQQQQQQ')
+
+# hash, second hash, data offset, key length, value length
+ENTRY = struct.Struct('<QQQII')
+
+# first entry and number of entries of a chaining bucket
+BUCKET = struct.Struct('<QQ')
+
+# stands in for keys and values not decoded yet
+_UNLOADED = object()
+
+
+def encode(value) -> bytes:
+    """
+    Encodes a key or value as a type tag and its bytes. Strings, bytes,
+    small integers and floats are stored as they are, anything else is
+    pickled.
+    :param value: key or value to encode
+    :return: encoded bytes
+    """
+    if value is None:
+        return bytes((_NONE,))
+    if isinstance(value, str):
+        return bytes((_STR,)) + value.encode()
+    if isinstance(value, bytes):
+        return bytes((_BYTES,)) + value
+    if type(value) is int and -(1 << 63) <= value < 1 << 63:
+        return bytes((_INT,)) + _INT64.pack(value)
+    if type(value) is float:
+        return bytes((_FLOAT,)) + _FLOAT64.pack(value)
+
+    return bytes((_PICKLE,)) + pickle.dumps(value)
+
+
+def decode(buffer, start: int, length: int):
+    """
+    Decodes a key or value encoded by encode from a buffer.
+    :param buffer: bytes, shared memory or mmap buffer
+    :param start: integer offset of the type tag
+    :param length: integer length including the type tag
+    :return: decoded key or value
+    """
+    tag = buffer[start]
+    start += 1
+    end = start + length - 1
+    if tag == _STR:
+        return str(buffer[start:end], 'utf-8')
+    if tag == _INT:
+        return _INT64.unpack_from(buffer, start)[0]
+    if tag == _FLOAT:
+        return _FLOAT64.unpack_from(buffer, start)[0]
+    if tag == _BYTES:
+        return bytes(buffer[start:end])
+    if tag == _NONE:
+        return None
+
+    return pickle.loads(buffer[start:end])
+
+
+def function_id(function, keys=()) -> str:
+    """
+    Returns the registered name a snapshot stores for a hash function,
+    once it is known to give every key being saved the same hash in
+    every process, as loading trusts the saved hashes.
+    :param function: hash function, or none
+    :param keys: iterable of the keys being saved
+    :return: string name, none if function is none
+    """
+    if function is None:
+        return None
+
+    name = hash_function_name(function)
+    if name is None or name in PROCESS_LOCAL_FUNCTIONS:
+        raise ValueError("hash function must be registered and give the "
+                         "same hashes in every process to be saved")
+
+    # functions that only hash some key types portably check each key
+    if name in PORTABLE_KEY_TYPES:
+        for key in keys:
+            if not is_portable(name, key):
+                raise ValueError(f"hash function {name!r} gives keys of "
+                                 f"type {type(key).__name__} different "
+                                 f"hashes in each process, so they cannot "
+                                 f"be saved")
+    return name
+
+
+def write_snapshot(path: str, kind: str, capacity: int, size: int,
+                   settings: dict, table: bytes, entries) -> None:
+    """
+    Writes a snapshot file: a header, the JSON settings, the table
+    section (slot states or bucket ranges), one fixed-width entry per
+    stored pair and a data region of encoded keys and values.
+    :param path: file path to write
+    :param kind: 'chaining' or 'open_addressing'
+    :param capacity: integer capacity of the map
+    :param size: integer number of keys in the map
+    :param settings: dictionary of JSON values needed to rebuild the map
+    :param table: bytes of the table section
+    :param entries: iterable of (hash, second hash, key, value) tuples,
+        with key none for an entry that holds nothing
+    :return: none
+    """
+    records = bytearray()
+    data = bytearray()
+    count = 0
+    for hash, hash2, key, value in entries:
+        if key is None:
+            records += ENTRY.pack(0, 0, 0, 0, 0)
+        else:
+            encoded_key, encoded_value = encode(key), encode(value)
+            records += ENTRY.pack(hash, hash2 or 0, len(data),
+                                  len(encoded_key), len(encoded_value))
+            data += encoded_key
+            data += encoded_value
+        count += 1
+
+    kind = kind.encode()
+    settings = json.dumps(settings).encode()
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, capacity, size,
+                                count, len(settings), len(table), len(kind)))
+        file.write(kind)
+        file.write(settings)
+        file.write(table)
+        file.write(records)
+        file.write(data)
+
+
+class Snapshot:
+    """
+    Snapshot file mapped into memory. Keys and values are decoded only
+    when asked for, so the pages of a lazily loaded map are only read
+    from disk when first used.
+    """
+
+    def __init__(self, path: str, kind: str) -> None:
+        """
+        Maps a snapshot file and reads its header.
+        :param path: file path to read
+        :param kind: map kind the caller expects
+        """
+        with open(path, 'rb') as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = self._buffer
+
+        magic, version, self.capacity, self.size, self.count, \
+            settings_length, table_length, kind_length = \
+            _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"{path} is not a hash map snapshot")
+
+        offset = _HEADER.size
+        saved_kind = bytes(buffer[offset:offset + kind_length]).decode()
+        if saved_kind != kind:
+            raise ValueError(f"{path} holds a {saved_kind} map, not {kind}")
+        offset += kind_length
+
+        self.settings = json.loads(buffer[offset:offset + settings_length])
+        offset += settings_length
+        self._table_offset = offset
+        self._table_length = table_length
+        self._entries_offset = offset + table_length
+        self._data_offset = self._entries_offset + self.count * ENTRY.size
+
+        self.function = get_hash_function(self.settings['function'])
+
+    def close(self) -> None:
+        """
+        Unmaps the file. Nothing may be decoded afterwards.
+        :return: none
+        """
+        self._buffer.close()
+
+    def table(self) -> bytes:
+        """
+        Returns the table section.
+        """
+        start = self._table_offset
+        return self._buffer[start:start + self._table_length]
+
+    def entries(self) -> list:
+        """
+        Returns every entry as a (hash, second hash, data offset, key
+        length, value length) tuple, without decoding keys or values.
+        """
+        start = self._entries_offset
+        return list(ENTRY.iter_unpack(
+            self._buffer[start:start + self.count * ENTRY.size]))
+
+    def key(self, entry: tuple):
+        """
+        Decodes the key of an entry.
+        :param entry: tuple returned by entries
+        :return: key, none if the entry holds nothing
+        """
+        if not entry[3]:
+            return None
+        return decode(self._buffer, self._data_offset + entry[2], entry[3])
+
+    def value(self, entry: tuple):
+        """
+        Decodes the value of an entry.
+        :param entry: tuple returned by entries
+        :return: value, none if the entry holds nothing
+        """
+        if not entry[3]:
+            return None
+        return decode(self._buffer, self._data_offset + entry[2] + entry[3],
+                      entry[4])
+
+
+class LazyList:
+    """
+    List-like sequence whose items are loaded the first time each one
+    is read. Items written replace the loaded ones. It also has the
+    length() method of DynamicArray, so it can stand in for the buckets
+    of the chaining map.
+    """
+
+    def __init__(self, load: callable, length: int) -> None:
+        """
+        :param load: callable taking an index and returning its item
+        :param length: integer number of items
+        """
+        self._load = load
+        self._items = [_UNLOADED] * length
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def length(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index: int):
+        item = self._items[index]
+        if item is _UNLOADED:
+            item = self._items[index] = self._load(index)
+        return item
+
+    def __setitem__(self, index: int, item) -> None:
+        self._items[index] = item
+
+    def __iter__(self):
+        for index in range(len(self._items)):
+            yield self[index]
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import os
+    import subprocess
+    import sys
+    import tempfile
+
+    # saves a map in one process and loads it in another with a
+    # different string hash seed, which must find every key
+    save = """
+import sys, {module}
+m = {module}.HashMap(11, sys.argv[2])
+for i in range(100):
+    m.put('key' + str(i), i)
+m.save(sys.argv[1])
+"""
+    load = """
+import sys, {module}
+m = {module}.HashMap.load(sys.argv[1])
+found = sum(m.contains_key('key' + str(i)) for i in range(100))
+print(m.get_size(), found)
+"""
+
+    def run(code: str, seed: str, *args) -> str:
+        environment = dict(os.environ, PYTHONHASHSEED=seed)
+        return subprocess.run([sys.executable, '-c', code, *args],
+                              env=environment, check=True,
+                              capture_output=True, text=True).stdout
+
+    print("\nSaved under PYTHONHASHSEED=1, loaded under 2")
+    print("--------------------------------------------")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'map.bin')
+        for module in ('hash_map_sc', 'hash_map_oa'):
+            for name in ('hash_function_1', 'fnv1a', 'multiplicative'):
+                run(save.format(module=module), '1', path, name)
+                size, found = run(load.format(module=module), '2',
+                                  path).split()
+                print(f"{module} {name:16} size {size}, found {found}")
+
+    print("\nFunctions refused for the keys being saved")
+    print("------------------------------------------")
+    import hash_map_sc
+    for name, key in (('builtin', 'key'), ('multiplicative', ('a', 1))):
+        m = hash_map_sc.HashMap(11, name)
+        m.put(key, 1)
+        try:
+            m.save(os.devnull)
+        except ValueError as error:
+            print(f"{name}: {error}")